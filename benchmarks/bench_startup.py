@@ -0,0 +1,51 @@
+"""
+Measure the startup time of the `scansplitter` CLI for headless & `--help` invocations.
+
+Run from the root of the repository using: `python -m benchmarks.bench_startup`
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+
+INVOCATIONS = {
+    "interpreter": ["-c", "pass"],
+    "import src.ui": ["-c", "import src.ui"],
+    "scansplitter --help": ["-m", "src.ui", "--help"],
+    "scansplitter batch --help": ["-m", "src.ui", "batch", "--help"],
+}
+# Modules that headless invocations should never need to import
+HEAVY_MODULES = ("tkinter", "rich", "concurrent.futures.process", "hashlib", "tempfile")
+N_REPEATS = 10
+
+
+def _time_invocation(args: list[str]) -> float:
+    """Time a single interpreter invocation with the provided arguments, in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def _imported_heavy_modules() -> list[str]:
+    """List the heavy modules imported as a side effect of importing the CLI."""
+    check = f"import sys, src.ui; print(*(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    imported = subprocess.run(
+        [sys.executable, "-c", check], check=True, capture_output=True, text=True
+    ).stdout
+    return imported.split()
+
+
+def main() -> None:  # noqa: D103
+    for name, args in INVOCATIONS.items():
+        timings = [_time_invocation(args) for _ in range(N_REPEATS)]
+        print(
+            f"{name:<26} min {min(timings) * 1e3:7.1f} ms, "
+            f"median {statistics.median(timings) * 1e3:7.1f} ms"
+        )
+
+    print(f"Heavy modules imported by `src.ui`: {_imported_heavy_modules() or 'None'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the fused line tokenizer against the original line cleaner + CSV conversion.
+
+Run from the root of the repository using: `python -m benchmarks.bench_tokenizer`
+"""
+import timeit
+
+from src import parser
+
+
+SAMPLE_LINES = [
+    "1  Actual Weight: 123.45",
+    "1  Chest / Bust Circum Tape Measure: 98.7",
+    "1  Body Fat (men): 12.3",
+    "1  Waist at 50%: 80.1",
+    "1  *****  Body Fat / Fitness: *****",
+    "1  AbdomenBack\t5.6\t7.8\t-9.10",
+    "1  Bust60DegreesLeft\t1.2\t-3.4\t5.6",
+    "0  Right heel\t5.6\t7.8\t-9.10",
+]
+N_REPEATS = 10
+N_LOOPS = 20_000
+
+
+def _clean_and_convert(lines: list[str]) -> None:
+    for line in lines:
+        cleaned = parser._clean_line(line)
+        if not cleaned.startswith("*"):
+            parser._line2csv(cleaned)
+
+
+def _tokenize(lines: list[str]) -> None:
+    for line in lines:
+        parser._tokenize_line(line)
+
+
+def main() -> None:  # noqa: D103
+    n_lines = len(SAMPLE_LINES) * N_LOOPS
+    baseline = min(
+        timeit.repeat(lambda: _clean_and_convert(SAMPLE_LINES), repeat=N_REPEATS, number=N_LOOPS)
+    )
+    fused = min(timeit.repeat(lambda: _tokenize(SAMPLE_LINES), repeat=N_REPEATS, number=N_LOOPS))
+
+    print(f"_clean_line + _line2csv: {baseline / n_lines * 1e6:.3f} µs/line")
+    print(f"_tokenize_line:          {fused / n_lines * 1e6:.3f} µs/line")
+    print(f"Speedup: {baseline / fused:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
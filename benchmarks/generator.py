@@ -0,0 +1,172 @@
+"""Synthetic composite scan generator for benchmarking."""
+import random
+import typing as t
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+COMPOSITE_PREAMBLE = [
+    "#SizeStream Measurements",
+    "#Stored on Tue May 18 06:49:24 2021",
+]
+MEASUREMENT_HEADER = [
+    "#format - Measurement Valid (1 = valid), Measurement Name, Measurement",
+    "#",
+]
+LANDMARK_HEADER = [
+    "#format - Landmarks Valid (1 = valid), Landmark Name, Landmark x y z",
+    "#",
+]
+
+# Name fragments to build realistic looking measurement & landmark names from
+NAME_WORDS = (
+    "Abdomen",
+    "Back",
+    "Bust",
+    "Chest",
+    "Circum",
+    "Front",
+    "Hip",
+    "Left",
+    "Neck",
+    "Right",
+    "Seat",
+    "Shoulder",
+    "Tape",
+    "Thigh",
+    "Waist",
+)
+NAME_SUFFIXES = ("", " (men)", " at 50%", " / Fitness")
+
+BASE_TIMESTAMP = datetime(2021, 5, 18, 6, 0, 0)
+
+
+class CompositeSpec(t.NamedTuple):
+    """Section sizes & content mix for a synthetic composite scan."""
+
+    n_core: int = 40
+    n_custom: int = 150
+    n_landmarks: int = 120
+    n_comments: int = 5
+    invalid_fraction: float = 0.02
+
+
+DEFAULT_SPEC = CompositeSpec()
+
+
+def _measurement_name(rng: random.Random, idx: int) -> str:
+    """Build a random, space-delimited measurement name."""
+    words = rng.sample(NAME_WORDS, k=rng.randint(1, 4))
+    return f"{' '.join(words)} {idx}{rng.choice(NAME_SUFFIXES)}"
+
+
+def _landmark_name(rng: random.Random, idx: int) -> str:
+    """Build a random, CamelCase landmark name."""
+    words = rng.sample(NAME_WORDS, k=rng.randint(1, 3))
+    return f"{''.join(words)}{idx}"
+
+
+def _validity_flag(rng: random.Random, invalid_fraction: float) -> str:
+    """Build a random validity flag, invalid (`0`) with a probability of `invalid_fraction`."""
+    return "0" if rng.random() < invalid_fraction else "1"
+
+
+def _measurement_section(
+    rng: random.Random, title: str, n_rows: int, n_comments: int, invalid_fraction: float
+) -> list[str]:
+    """Build a measurement section, including its header lines & randomly placed comments."""
+    rows = [
+        f"{_validity_flag(rng, invalid_fraction)}  {_measurement_name(rng, idx)}: "
+        f"{rng.uniform(0, 200):.3f}"
+        for idx in range(n_rows)
+    ]
+    for _ in range(n_comments):
+        rows.insert(rng.randint(0, len(rows)), f"1  *****  {_measurement_name(rng, 0)}: *****")
+
+    return [f"#SizeStream {title} Measurements", *MEASUREMENT_HEADER, *rows]
+
+
+def generate_composite(spec: CompositeSpec = DEFAULT_SPEC, seed: int = 0) -> str:
+    """Generate the contents of a synthetic composite scan file for the provided specification."""
+    rng = random.Random(seed)
+
+    core = _measurement_section(rng, "Core", spec.n_core, spec.n_comments, spec.invalid_fraction)
+    custom = _measurement_section(
+        rng, "Custom", spec.n_custom, spec.n_comments, spec.invalid_fraction
+    )
+    landmarks = [
+        f"{_validity_flag(rng, spec.invalid_fraction)}  {_landmark_name(rng, idx)}\t"
+        f"{rng.uniform(-1, 1):.6f}\t{rng.uniform(-1, 1):.6f}\t{rng.uniform(0, 2):.6f}"
+        for idx in range(spec.n_landmarks)
+    ]
+
+    lines = [
+        *COMPOSITE_PREAMBLE,
+        *core,
+        *custom,
+        "#SizeStream Landmarks",
+        *LANDMARK_HEADER,
+        *landmarks,
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def composite_filename(
+    subj_id: int, location: str = "", repeat: int = 0, repeat_style: str = "hyphen"
+) -> str:
+    """
+    Build a composite scan filename for the provided subject.
+
+    Repeat scans are denoted by either a hyphen (e.g. `102-2`) or parentheses (e.g. `102 (2)`),
+    selected by `repeat_style`.
+    """
+    full_id = f"{location}{subj_id:03}"
+    if repeat:
+        full_id = f"{full_id}-{repeat}" if repeat_style == "hyphen" else f"{full_id} ({repeat})"
+
+    timestamp = BASE_TIMESTAMP + timedelta(minutes=17 * subj_id + repeat)
+    return f"{full_id} {timestamp:%Y-%m-%d_%H-%M-%S}_composite.txt"
+
+
+def write_cohort(
+    out_dir: Path,
+    n_files: int,
+    spec: CompositeSpec = DEFAULT_SPEC,
+    repeat_fraction: float = 0.05,
+    locations: t.Sequence[str] = ("",),
+    seed: int = 0,
+) -> list[Path]:
+    """
+    Write a synthetic cohort of `n_files` composite scans to the provided directory.
+
+    A `repeat_fraction` of the scans are repeat scans of the preceeding subject. All scans share
+    the same contents, so measurement & landmark names are consistent as they would be for a single
+    version of the scanner software.
+    """
+    rng = random.Random(seed)
+    composite_src = generate_composite(spec, seed=seed)
+
+    filepaths = []
+    subj_id = 0
+    repeat = 0
+    location = ""
+    for _ in range(n_files):
+        if subj_id and rng.random() < repeat_fraction:
+            # Repeat numbering starts at 2, e.g. `102-2`
+            repeat = repeat + 1 if repeat else 2
+        else:
+            subj_id += 1
+            repeat = 0
+            location = rng.choice(locations)
+
+        filename = composite_filename(
+            subj_id,
+            location=location,
+            repeat=repeat,
+            repeat_style=rng.choice(("hyphen", "parentheses")),
+        )
+        filepath = out_dir / filename
+        filepath.write_text(composite_src)
+        filepaths.append(filepath)
+
+    return filepaths
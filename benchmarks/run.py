@@ -0,0 +1,165 @@
+"""
+Reproducible benchmark suite for the scan splitting & aggregation pipelines.
+
+Run from the root of the repository using: `python -m benchmarks.run --help`
+
+Results are saved as JSON so they can be compared between versions using the `compare` command.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import typing as t
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+import typer
+from benchmarks import generator
+from src import io, parser
+
+
+DEFAULT_SCALES = [10, 1_000, 10_000]
+
+bench_cli = typer.Typer()
+
+
+def _git_revision() -> str:
+    """Get the short revision of the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _time(
+    func: t.Callable[[], t.Any], repeats: int, setup: t.Optional[t.Callable[[], t.Any]] = None
+) -> list[float]:
+    """Time `repeats` calls of `func`, calling `setup` (untimed) before each, if provided."""
+    timings = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+
+        # Pipelines report their progress to the console, which we don't want to spam
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+def _clear_outputs(scan_dir: Path) -> None:
+    """Remove any split or aggregated outputs from the provided scan directory."""
+    for pattern in ("*.csv", "*.CSV", "*.json", "*.npz"):
+        for filepath in scan_dir.glob(pattern):
+            filepath.unlink()
+
+
+def _summarize(name: str, n_files: int, timings: list[float]) -> dict[str, t.Any]:
+    """Summarize the provided benchmark timings into a JSON-serializable dictionary."""
+    return {
+        "benchmark": name,
+        "n_files": n_files,
+        "repeats": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "timings_s": timings,
+    }
+
+
+def run_benchmarks(
+    scales: list[int], repeats: int, spec: generator.CompositeSpec
+) -> list[dict[str, t.Any]]:
+    """Run the benchmark suite at each of the provided cohort scales."""
+    results = []
+
+    # Parsing is independent of cohort size, so a single composite file is sufficient
+    composite_lines = generator.generate_composite(spec).splitlines()
+    timings = _time(partial(parser.split_composite_file, composite_lines), repeats)
+    results.append(_summarize("split_composite_file", 1, timings))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (composite_file,) = generator.write_cohort(Path(tmp_dir), 1, spec)
+        timings = _time(partial(io.file_split_pipeline, composite_file), repeats)
+        results.append(_summarize("file_split_pipeline", 1, timings))
+
+    for n_files in scales:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            scan_dir = Path(tmp_dir)
+            generator.write_cohort(scan_dir, n_files, spec)
+
+            timings = _time(
+                partial(io.batch_split_pipeline, scan_dir),
+                repeats,
+                setup=partial(_clear_outputs, scan_dir),
+            )
+            results.append(_summarize("batch_split_pipeline", n_files, timings))
+
+            # Aggregation works on the anthro files left over from the last batch run
+            timings = _time(partial(io.anthro_measure_aggregation_pipeline, scan_dir), repeats)
+            results.append(_summarize("anthro_measure_aggregation_pipeline", n_files, timings))
+
+        typer.echo(f"Finished benchmarks for {n_files} files")
+
+    return results
+
+
+@bench_cli.command()
+def run(
+    out_filepath: Path = typer.Option(Path("bench_results.json")),
+    scales: list[int] = typer.Option(DEFAULT_SCALES),
+    repeats: int = 3,
+    n_core: int = generator.DEFAULT_SPEC.n_core,
+    n_custom: int = generator.DEFAULT_SPEC.n_custom,
+    n_landmarks: int = generator.DEFAULT_SPEC.n_landmarks,
+    n_comments: int = generator.DEFAULT_SPEC.n_comments,
+) -> None:
+    """Run the benchmark suite & save the results to JSON."""
+    spec = generator.CompositeSpec(
+        n_core=n_core, n_custom=n_custom, n_landmarks=n_landmarks, n_comments=n_comments
+    )
+    results = run_benchmarks(scales, repeats, spec)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": spec._asdict(),
+        "results": results,
+    }
+    out_filepath.write_text(json.dumps(report, indent=2))
+
+    for result in results:
+        typer.echo(f"{result['benchmark']:<40}{result['n_files']:>8}{result['min_s']:>12.4f} s")
+
+    typer.echo(f"Results written to: '{out_filepath}'")
+
+
+@bench_cli.command()
+def compare(baseline_filepath: Path, candidate_filepath: Path) -> None:
+    """Compare the minimum timings of two sets of benchmark results."""
+    baseline = json.loads(baseline_filepath.read_text())
+    candidate = json.loads(candidate_filepath.read_text())
+
+    baseline_timings = {(r["benchmark"], r["n_files"]): r["min_s"] for r in baseline["results"]}
+    typer.echo(f"Baseline: {baseline['git_revision']}, Candidate: {candidate['git_revision']}")
+    for result in candidate["results"]:
+        key = (result["benchmark"], result["n_files"])
+        if key not in baseline_timings:
+            continue
+
+        ratio = result["min_s"] / baseline_timings[key]
+        typer.echo(f"{key[0]:<40}{key[1]:>8}{ratio:>10.2f}x")
+
+
+if __name__ == "__main__":
+    bench_cli()
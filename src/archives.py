@@ -0,0 +1,212 @@
+import io
+import locale
+import typing as t
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+
+from src import discovery
+
+if t.TYPE_CHECKING:
+    import tarfile
+    import zipfile
+
+
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# Compression used when writing a tar output archive, keyed by suffix
+TAR_WRITE_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tbz2": "w:bz2",
+    ".tar.xz": "w:xz",
+    ".txz": "w:xz",
+}
+
+
+class ArchiveMember(t.NamedTuple):
+    """
+    A file member of an archive, opened for streaming.
+
+    `name` is the POSIX path of the member within the archive & `size` its uncompressed size, in
+    bytes. `src` lazily yields the decoded lines of the member, including any line endings, & is
+    only valid until the next member is yielded.
+    """
+
+    name: str
+    size: int
+    src: t.Iterator[str]
+
+
+def _has_suffix(filepath: Path, suffixes: t.Iterable[str]) -> bool:
+    """Check whether the name of the provided filepath ends with any of the provided suffixes."""
+    name = filepath.name.lower()
+    return any(name.endswith(suffix) for suffix in suffixes)
+
+
+def is_archive(filepath: Path) -> bool:
+    """Check whether the provided filepath is a zip or tar archive, based on its suffix."""
+    return _has_suffix(filepath, (*ZIP_SUFFIXES, *TAR_SUFFIXES))
+
+
+def _name_matcher(
+    include: t.Iterable[str], exclude: t.Iterable[str] = (), ignore_case: bool = False
+) -> t.Callable[[str], bool]:
+    """Build a check for whether a member's file name matches `include` & not `exclude`."""
+    include_re = discovery.compile_patterns(include, ignore_case)
+    exclude_re = discovery.compile_patterns(exclude, ignore_case)
+
+    def matches(member_name: str) -> bool:
+        name = PurePosixPath(member_name).name
+        if include_re is None or not include_re.match(name):
+            return False
+
+        return not (exclude_re and exclude_re.match(name))
+
+    return matches
+
+
+def iter_members(
+    archive: Path,
+    include: t.Iterable[str],
+    exclude: t.Iterable[str] = (),
+    ignore_case: bool = False,
+) -> t.Iterator[ArchiveMember]:
+    """
+    Stream the file members of the provided zip or tar archive whose names match the patterns.
+
+    As with `discovery.FileListing`, member file names must match any of the `include` & none of
+    the `exclude` glob patterns, optionally ignoring case; the member's directory within the archive
+    is not considered.
+
+    Members are decompressed & decoded as they are consumed rather than being extracted to disk, so
+    an archive member may be passed directly to `parser.split_composite_file`.
+    Tar archives are read as a stream, so members are yielded in archive order & each member must be
+    consumed before advancing to the next.
+    """
+    matches = _name_matcher(include, exclude, ignore_case)
+    encoding = locale.getpreferredencoding(False)  # Match the default used to open text files
+    if _has_suffix(archive, ZIP_SUFFIXES):
+        import zipfile  # Only needed for archive input, so don't pay for it at startup
+
+        with zipfile.ZipFile(archive) as zip_f:
+            for info in zip_f.infolist():
+                if info.is_dir() or not matches(info.filename):
+                    continue
+
+                with zip_f.open(info) as member_f:
+                    src = io.TextIOWrapper(member_f, encoding)
+                    yield ArchiveMember(info.filename, info.file_size, src)
+    else:
+        import tarfile
+
+        # Stream mode never seeks, so the archive is only read once regardless of its compression
+        with tarfile.open(archive, "r|*") as tar_f:
+            for tar_info in tar_f:
+                if not tar_info.isfile() or not matches(tar_info.name):
+                    continue
+
+                tar_member_f = tar_f.extractfile(tar_info)
+                if tar_member_f is None:  # pragma: no cover
+                    continue
+
+                # Members of a streamed tar can't be wrapped in a `TextIOWrapper`, since they report
+                # themselves as seekable but their underlying stream is not, so decode line by line
+                with tar_member_f:
+                    lines = (line.decode(encoding) for line in tar_member_f)
+                    yield ArchiveMember(tar_info.name, tar_info.size, lines)
+
+
+def list_members(
+    archive: Path,
+    include: t.Iterable[str],
+    exclude: t.Iterable[str] = (),
+    ignore_case: bool = False,
+) -> list[str]:
+    """
+    List the names of the file members of the provided archive whose names match the patterns.
+
+    See `iter_members` for a description of the pattern matching.
+    """
+    matches = _name_matcher(include, exclude, ignore_case)
+    if _has_suffix(archive, ZIP_SUFFIXES):
+        import zipfile
+
+        with zipfile.ZipFile(archive) as zip_f:
+            return [
+                info.filename
+                for info in zip_f.infolist()
+                if not info.is_dir() and matches(info.filename)
+            ]
+
+    import tarfile
+
+    with tarfile.open(archive, "r|*") as tar_f:
+        return [
+            tar_info.name for tar_info in tar_f if tar_info.isfile() and matches(tar_info.name)
+        ]
+
+
+class ArchiveWriter:
+    """
+    Write in-memory files to a new zip or tar archive, selected by the archive's suffix.
+
+    Zip archives are deflate compressed; tar archives are compressed according to their suffix, e.g.
+    `.tar.gz`. Use as a context manager, the archive is finalized on exit.
+
+    NOTE: Any existing archive will be overwritten
+    """
+
+    def __init__(self, archive: Path) -> None:
+        if not is_archive(archive):
+            raise ValueError(f"Unsupported output archive type: '{archive.name}'")
+
+        self.archive = archive
+        self._zip_f: t.Optional["zipfile.ZipFile"] = None
+        self._tar_f: t.Optional["tarfile.TarFile"] = None
+
+    def __enter__(self) -> "ArchiveWriter":
+        if _has_suffix(self.archive, ZIP_SUFFIXES):
+            import zipfile
+
+            self._zip_f = zipfile.ZipFile(self.archive, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            import tarfile
+
+            name = self.archive.name.lower()
+            mode = next(mode for suffix, mode in TAR_WRITE_MODES.items() if name.endswith(suffix))
+            self._tar_f = tarfile.open(self.archive, mode)  # type: ignore[call-overload]
+
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._zip_f is not None:
+            self._zip_f.close()
+        if self._tar_f is not None:
+            self._tar_f.close()
+
+    def write(self, name: str, data: bytes) -> None:
+        """Add a file with the provided POSIX path & contents to the archive."""
+        if self._zip_f is not None:
+            self._zip_f.writestr(name, data)
+        elif self._tar_f is not None:
+            import tarfile
+            import time
+
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = len(data)
+            tar_info.mtime = int(time.time())
+            self._tar_f.addfile(tar_info, io.BytesIO(data))
+
+
+@contextmanager
+def open_writer(archive: t.Optional[Path]) -> t.Iterator[t.Optional[ArchiveWriter]]:
+    """Open an `ArchiveWriter` for the provided archive, or provide `None` if there's no archive."""
+    if archive is None:
+        yield None
+        return
+
+    with ArchiveWriter(archive) as writer:
+        yield writer
@@ -0,0 +1,204 @@
+import json
+import typing as t
+from pathlib import Path
+
+import numpy as np
+from src import parser
+
+
+LANDMARK_INDEX_SUFFIX = ".index.json"
+LANDMARK_INDEX_VERSION = 1
+
+
+class ScanArrays(t.NamedTuple):
+    """
+    Typed representation of a split composite scan.
+
+    Measurement values are stored as a float64 array of shape `(n_measurements,)` and landmark
+    coordinates as a float64 array of shape `(n_landmarks, 3)`. Values that cannot be parsed as a
+    float are stored as `NaN`.
+    """
+
+    measurement_names: list[str]
+    measurements: np.ndarray
+    landmark_names: list[str]
+    landmarks: np.ndarray
+
+
+def _to_float(value: str) -> float:
+    """Convert the provided string to a float, or `NaN` if it can't be converted."""
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _to_coords(values: list[str]) -> list[float]:
+    """Convert the provided coordinate strings to floats, padded or truncated to 3 coordinates."""
+    coords = [_to_float(value) for value in values[:3]]
+    coords.extend([np.nan] * (3 - len(coords)))
+    return coords
+
+
+def split_composite_arrays(composite_src: t.Iterable[str]) -> ScanArrays:
+    """
+    Split composite data file into its components as typed arrays.
+
+    See `parser.iter_composite_file` for a description of the composite file parsing.
+    """
+    return rows_to_arrays(*parser.split_composite_file(composite_src))
+
+
+def rows_to_arrays(anthro: list[str], landmark: list[str]) -> ScanArrays:
+    """
+    Convert the provided parsed anthro & landmark rows into typed arrays.
+
+    See `parser.split_composite_file` for a description of the rows.
+    """
+    measurement_names = []
+    measurements = []
+    for row in anthro:
+        name, *values = row.split(",")
+        measurement_names.append(name)
+        measurements.append(_to_float(values[0]) if values else np.nan)
+
+    landmark_names = []
+    landmarks = []
+    for row in landmark:
+        # Pad or truncate to 3 coordinates so we always end up with an (N, 3) array
+        name, *values = row.split(",")
+        landmark_names.append(name)
+        landmarks.append(_to_coords(values))
+
+    return ScanArrays(
+        measurement_names=measurement_names,
+        measurements=np.array(measurements, dtype=np.float64),
+        landmark_names=landmark_names,
+        landmarks=np.array(landmarks, dtype=np.float64).reshape(-1, 3),
+    )
+
+
+def dump_scan(filepath: t.Union[Path, t.BinaryIO], scan: ScanArrays) -> None:
+    """
+    Write the provided scan arrays to the provided `.npz` filepath or binary file object.
+
+    NOTE: Any existing file will be overwritten
+    """
+    np.savez(
+        filepath,
+        measurement_names=np.array(scan.measurement_names, dtype=str),
+        measurements=scan.measurements,
+        landmark_names=np.array(scan.landmark_names, dtype=str),
+        landmarks=scan.landmarks,
+    )
+
+
+def load_scan(filepath: Path) -> ScanArrays:
+    """Load scan arrays from the provided `.npz` filepath, as written by `dump_scan`."""
+    with np.load(filepath) as scan_src:
+        return ScanArrays(
+            measurement_names=scan_src["measurement_names"].tolist(),
+            measurements=scan_src["measurements"],
+            landmark_names=scan_src["landmark_names"].tolist(),
+            landmarks=scan_src["landmarks"],
+        )
+
+
+class LandmarkIndex(t.TypedDict):  # noqa: D101
+    version: int
+    shape: list[int]
+    subjects: list[str]
+    landmark_names: list[str]
+    files: list[str]
+
+
+def parse_landmark_csv(landmark_src: str) -> tuple[list[str], np.ndarray]:
+    """
+    Parse the landmark names & coordinates from the provided split landmark CSV source.
+
+    Coordinates are returned as a float64 array of shape `(n_landmarks, 3)`; see `ScanArrays` for
+    how unparseable or missing coordinates are handled.
+    """
+    landmark_names = []
+    landmarks = []
+    for line in landmark_src.splitlines()[1:]:  # skip header line
+        if not line:
+            continue
+
+        name, *values = line.split(",")
+        landmark_names.append(name)
+        landmarks.append(_to_coords(values))
+
+    return landmark_names, np.array(landmarks, dtype=np.float64).reshape(-1, 3)
+
+
+def align_landmarks(
+    names: list[str], coords: np.ndarray, landmark_names: list[str]
+) -> np.ndarray:
+    """
+    Reorder the provided landmark coordinates to match the provided reference landmark names.
+
+    Reference landmarks missing from `names` are filled with `NaN`, landmarks not present in the
+    reference are dropped.
+    """
+    if names == landmark_names:
+        return coords
+
+    aligned = np.full((len(landmark_names), 3), np.nan)
+    name_idx = {name: idx for idx, name in enumerate(names)}
+    for ref_idx, name in enumerate(landmark_names):
+        idx = name_idx.get(name)
+        if idx is not None:
+            aligned[ref_idx] = coords[idx]
+
+    return aligned
+
+
+def open_landmark_stack(filepath: Path, n_subjects: int, n_landmarks: int) -> np.memmap:
+    """
+    Create a memory-mapped `.npy` file for a subjects x landmarks x 3 float64 array.
+
+    NOTE: Any existing file will be overwritten
+    """
+    return np.lib.format.open_memmap(
+        filepath, mode="w+", dtype=np.float64, shape=(n_subjects, n_landmarks, 3)
+    )
+
+
+def _landmark_index_path(stack_filepath: Path) -> Path:
+    """Build the sidecar index filepath for the provided landmark stack."""
+    return stack_filepath.with_name(f"{stack_filepath.name}{LANDMARK_INDEX_SUFFIX}")
+
+
+def dump_landmark_index(
+    stack_filepath: Path,
+    subjects: list[str],
+    landmark_names: list[str],
+    landmark_files: t.Iterable[Path],
+) -> None:
+    """
+    Write the sidecar subject & landmark index for the provided landmark stack.
+
+    Landmark files are recorded by their POSIX path relative to the landmark stack.
+
+    NOTE: Any existing index will be overwritten
+    """
+    landmark_index: LandmarkIndex = {
+        "version": LANDMARK_INDEX_VERSION,
+        "shape": [len(subjects), len(landmark_names), 3],
+        "subjects": subjects,
+        "landmark_names": landmark_names,
+        "files": [file.relative_to(stack_filepath.parent).as_posix() for file in landmark_files],
+    }
+    _landmark_index_path(stack_filepath).write_text(json.dumps(landmark_index, indent=2))
+
+
+def load_landmark_stack(stack_filepath: Path) -> tuple[np.ndarray, LandmarkIndex]:
+    """
+    Load the provided landmark stack as a read-only memory-mapped array, along with its index.
+
+    Since the array is memory-mapped, slicing e.g. a single landmark across all subjects only reads
+    the required data from disk.
+    """
+    landmark_index: LandmarkIndex = json.loads(_landmark_index_path(stack_filepath).read_text())
+    return np.load(stack_filepath, mmap_mode="r"), landmark_index
@@ -0,0 +1,190 @@
+import locale
+import os
+import typing as t
+from pathlib import Path
+
+from src import compression, parser
+from src.compression import Compression
+
+
+DEFAULT_CACHE_SIZE = 256  # MB
+
+ENTRY_SUFFIX = ".scan"
+
+# Each cache entry leads off with its number of anthro & landmark rows, as a `struct` format
+ENTRY_HEADER_FORMAT = "<II"
+
+# Once the cache exceeds its size cap, evict down to this fraction of the cap so we're not evicting
+# on every subsequent insert
+EVICTION_TARGET = 0.9
+
+ParsedComposite = tuple[list[str], list[str]]
+
+
+def encode_entry(anthro: list[str], landmark: list[str]) -> bytes:
+    """
+    Encode the provided anthro & landmark rows into a compact binary cache entry.
+
+    Entries consist of an `ENTRY_HEADER_FORMAT` header containing the number of anthro & landmark
+    rows, followed by the zlib compressed, newline-joined UTF-8 rows.
+    """
+    # Only needed when a cache is used, so don't pay for them at startup
+    import struct
+    import zlib
+
+    rows = "\n".join([*anthro, *landmark]).encode("utf-8")
+    return struct.pack(ENTRY_HEADER_FORMAT, len(anthro), len(landmark)) + zlib.compress(rows)
+
+
+def decode_entry(entry: bytes) -> ParsedComposite:
+    """
+    Decode the anthro & landmark rows from the provided binary cache entry.
+
+    A `ValueError` is raised if the entry is corrupt.
+    """
+    import struct  # Only needed when a cache is used, so don't pay for them at startup
+    import zlib
+
+    header_size = struct.calcsize(ENTRY_HEADER_FORMAT)
+    try:
+        n_anthro, n_landmark = struct.unpack_from(ENTRY_HEADER_FORMAT, entry)
+        rows_src = zlib.decompress(entry[header_size:]).decode("utf-8")
+    except (struct.error, zlib.error) as e:
+        raise ValueError(f"Corrupt cache entry: {e}") from None
+
+    rows = rows_src.split("\n") if (n_anthro + n_landmark) else []
+    if len(rows) != n_anthro + n_landmark:
+        raise ValueError(f"Expected {n_anthro + n_landmark} cached rows, found {len(rows)}")
+
+    return rows[:n_anthro], rows[n_anthro:]
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed composite files, keyed by content hash & parser version.
+
+    Each parsed composite file is stored as a compact binary entry in `cache_dir`, see
+    `encode_entry`, named by the SHA-256 hash of its contents & `parser.PARSER_VERSION`, so entries
+    from a different parser version are never used. A cache hit costs little more than hashing the
+    composite file.
+
+    The cache is capped at approximately `max_bytes`; once exceeded, the least recently used entries
+    are evicted. Recency is tracked using entry modification times, which are refreshed on every
+    hit. Entries are written atomically, so a cache directory may be safely shared between
+    processes, though with multiple processes the size cap is only enforced approximately.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_SIZE * 1_000_000) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size: t.Optional[int] = None  # Calculated on first insert
+
+    def _entry_path(self, key: str) -> Path:
+        """Build the entry filepath for the provided content hash."""
+        return self.cache_dir / f"{key}-v{parser.PARSER_VERSION}{ENTRY_SUFFIX}"
+
+    def get(self, key: str) -> t.Optional[ParsedComposite]:
+        """
+        Look up the parsed composite file with the provided content hash.
+
+        `None` is returned if there is no entry for the content hash; corrupt entries are discarded.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            parsed = decode_entry(entry_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            entry_path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(entry_path)
+        except OSError:  # pragma: no cover
+            pass  # Evicted by another process, no big deal
+
+        return parsed
+
+    def put(self, key: str, anthro: list[str], landmark: list[str]) -> None:
+        """Store the parsed composite file with the provided content hash, evicting if required."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = encode_entry(anthro, landmark)
+        entry_path = self._entry_path(key)
+
+        # Write to a temporary file first so another process never reads a partially written entry
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(entry)
+        os.replace(tmp_path, entry_path)
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._scan_entries())
+        else:
+            self._size += len(entry)
+
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _scan_entries(self) -> list[tuple[int, int, Path]]:
+        """List the modification time, size, and filepath of each entry in the cache."""
+        entries = []
+        with os.scandir(self.cache_dir) as dir_entries:
+            for dir_entry in dir_entries:
+                if not dir_entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+
+                try:
+                    stat = dir_entry.stat()
+                except FileNotFoundError:  # pragma: no cover
+                    continue
+
+                entries.append((stat.st_mtime_ns, stat.st_size, Path(dir_entry.path)))
+
+        return entries
+
+    def _evict(self) -> None:
+        """Evict the least recently used entries until the cache is below its eviction target."""
+        entries = sorted(self._scan_entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_path in entries:
+            if size <= self.max_bytes * EVICTION_TARGET:
+                break
+
+            entry_path.unlink(missing_ok=True)
+            size -= entry_size
+
+        self._size = size
+
+    def split_composite_bytes(
+        self, data: bytes, compress: Compression = Compression.NONE
+    ) -> ParsedComposite:
+        """
+        Split the provided raw composite file contents into their components, using the cache.
+
+        Contents are hashed as provided, and are only decompressed using `compress` & parsed on a
+        cache miss; see `parser.split_composite_file` for a description of the parsing.
+        """
+        import hashlib  # Only needed when a cache is used, so don't pay for it at startup
+
+        key = hashlib.sha256(data).hexdigest()
+        parsed = self.get(key)
+        if parsed is None:
+            # Decode as if opened in text mode, to match parsing the file directly
+            encoding = locale.getpreferredencoding(False)
+            composite_src = compression.decompress(data, compress).decode(encoding).splitlines()
+            parsed = parser.split_composite_file(composite_src)
+            self.put(key, *parsed)
+
+        return parsed
+
+    def split_composite_file(self, filepath: Path) -> ParsedComposite:
+        """Split the provided composite file into its components, using the cache."""
+        return self.split_composite_bytes(filepath.read_bytes(), compression.detect(filepath))
+
+    def split_composite_src(self, composite_src: t.Iterable[str]) -> ParsedComposite:
+        """
+        Split the provided composite file lines into their components, using the cache.
+
+        Lines are expected to include their line endings, e.g. an opened file or archive member.
+        """
+        encoding = locale.getpreferredencoding(False)
+        return self.split_composite_bytes("".join(composite_src).encode(encoding))
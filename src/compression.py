@@ -0,0 +1,153 @@
+import typing as t
+from enum import Enum
+from pathlib import Path
+
+
+class Compression(str, Enum):
+    """
+    Supported compression formats for split output files.
+
+    Compressed files are identified by their suffix, which is appended to the uncompressed name of
+    the file, e.g. `some_scan_composite.anthro.csv.gz`.
+    """
+
+    NONE = "none"
+    GZIP = "gz"
+    BZ2 = "bz2"
+    XZ = "xz"
+
+    @property
+    def suffix(self) -> str:  # noqa: D102
+        return "" if self == Compression.NONE else f".{self.value}"
+
+
+COMPRESSED_SUFFIXES = {
+    compression.suffix: compression
+    for compression in Compression
+    if compression != Compression.NONE
+}
+
+
+def detect(filepath: Path) -> Compression:
+    """Identify the compression format of the provided file from its suffix."""
+    return COMPRESSED_SUFFIXES.get(filepath.suffix.lower(), Compression.NONE)
+
+
+def strip_suffix(filepath: Path) -> Path:
+    """Remove any compression suffix from the provided filepath."""
+    if detect(filepath) == Compression.NONE:
+        return filepath
+
+    return filepath.with_suffix("")
+
+
+def with_suffixes(patterns: t.Iterable[str]) -> list[str]:
+    """
+    Extend the provided glob patterns to also match compressed variants of the files they match.
+
+    e.g. `["*_composite.txt"]` becomes:
+        `["*_composite.txt", "*_composite.txt.gz", "*_composite.txt.bz2", "*_composite.txt.xz"]`
+
+    Patterns that already end in a wildcard or a compression suffix are left as-is.
+    """
+    extended = []
+    for pattern in patterns:
+        extended.append(pattern)
+        if pattern.endswith("*") or detect(Path(pattern)) != Compression.NONE:
+            continue
+
+        extended.extend(f"{pattern}{suffix}" for suffix in COMPRESSED_SUFFIXES)
+
+    return extended
+
+
+def _open(filepath: Path, mode: str) -> t.IO:
+    """Open the provided file, transparently (de)compressing it based on its suffix."""
+    compression = detect(filepath)
+    if compression == Compression.GZIP:
+        import gzip
+
+        return t.cast(t.IO, gzip.open(filepath, mode))
+    elif compression == Compression.BZ2:
+        import bz2
+
+        return t.cast(t.IO, bz2.open(filepath, mode))
+    elif compression == Compression.XZ:
+        import lzma
+
+        return t.cast(t.IO, lzma.open(filepath, mode))
+
+    return filepath.open(mode)
+
+
+def open_text(filepath: Path, mode: str = "r") -> t.TextIO:
+    """
+    Open the provided file in text mode, transparently (de)compressing it based on its suffix.
+
+    Compression modules are only imported when a compressed file is opened.
+    """
+    return t.cast(t.TextIO, _open(filepath, f"{mode}t"))
+
+
+def open_binary(filepath: Path, mode: str = "r") -> t.BinaryIO:
+    """
+    Open the provided file in binary mode, transparently (de)compressing it based on its suffix.
+
+    Compression modules are only imported when a compressed file is opened.
+    """
+    return t.cast(t.BinaryIO, _open(filepath, f"{mode}b"))
+
+
+def read_text(filepath: Path) -> str:
+    """Read the contents of the provided file, decompressing it if required."""
+    if detect(filepath) == Compression.NONE:
+        return filepath.read_text()
+
+    with open_text(filepath) as f:
+        return f.read()
+
+
+def write_text(filepath: Path, data: str) -> None:
+    """
+    Write the provided contents to the provided file, compressing it based on its suffix.
+
+    NOTE: Any existing file will be overwritten
+    """
+    with open_text(filepath, "w") as f:
+        f.write(data)
+
+
+def compress(data: bytes, compression: Compression) -> bytes:
+    """Compress the provided contents using the provided compression format."""
+    if compression == Compression.GZIP:
+        import gzip
+
+        return gzip.compress(data)
+    elif compression == Compression.BZ2:
+        import bz2
+
+        return bz2.compress(data)
+    elif compression == Compression.XZ:
+        import lzma
+
+        return lzma.compress(data)
+
+    return data
+
+
+def decompress(data: bytes, compression: Compression) -> bytes:
+    """Decompress the provided contents using the provided compression format."""
+    if compression == Compression.GZIP:
+        import gzip
+
+        return gzip.decompress(data)
+    elif compression == Compression.BZ2:
+        import bz2
+
+        return bz2.decompress(data)
+    elif compression == Compression.XZ:
+        import lzma
+
+        return lzma.decompress(data)
+
+    return data
@@ -0,0 +1,167 @@
+import sys
+import time
+import typing as t
+from datetime import timedelta
+from enum import Enum
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    from rich.console import RenderableType
+    from rich.progress import Progress, ProgressColumn, TaskID
+
+
+# Minimum number of seconds between progress updates, so rendering cost is bounded by the runtime
+# rather than growing with the number of files processed
+PROGRESS_INTERVAL = 0.1
+LOG_INTERVAL = 5.0
+
+
+class ConsoleMode(str, Enum):
+    """
+    Console output modes.
+
+    `AUTO` resolves to `INTERACTIVE` if stdout is a terminal, otherwise `LOG`.
+    """
+
+    AUTO = "auto"
+    INTERACTIVE = "interactive"
+    LOG = "log"
+    QUIET = "quiet"
+
+
+_mode = ConsoleMode.AUTO
+
+
+def set_mode(mode: ConsoleMode) -> None:
+    """Set the console output mode used for all subsequent output."""
+    global _mode
+    _mode = mode
+
+
+def get_mode() -> ConsoleMode:
+    """Get the current console output mode, resolving `ConsoleMode.AUTO` for the current stdout."""
+    if _mode != ConsoleMode.AUTO:
+        return _mode
+
+    return ConsoleMode.INTERACTIVE if sys.stdout.isatty() else ConsoleMode.LOG
+
+
+def rprint(*objects: "RenderableType", end: str = "\n") -> None:
+    """
+    Print the provided objects to the console using `rich`, unless in `ConsoleMode.QUIET`.
+
+    `rich` is imported on first use rather than at import time, so headless & `--help` invocations
+    don't pay for it until something is actually printed.
+    """
+    if _mode == ConsoleMode.QUIET:
+        return
+
+    from rich import print as rich_print
+
+    rich_print(*objects, end=end)
+
+
+class ProgressReporter:
+    """
+    Report progress through a number of files, along with throughput & ETA.
+
+    If the total number of files is not known up front, e.g. when files are processed as they are
+    discovered, progress is reported without a bar or ETA.
+
+    Progress is rendered according to the console output mode:
+        * `ConsoleMode.INTERACTIVE` - A live progress bar
+        * `ConsoleMode.LOG` - Plain text progress lines, suitable for redirecting to a log file
+        * `ConsoleMode.QUIET` - Nothing
+
+    Rendering is throttled to at most one update every `PROGRESS_INTERVAL` seconds for the progress
+    bar, or every `LOG_INTERVAL` seconds for log lines, so the cost of reporting progress does not
+    grow with the number of files. A final update is always rendered on exit.
+    """
+
+    def __init__(self, total: t.Optional[int], description: str = "Processing") -> None:
+        self.total = total
+        self.description = description
+        self.mode = get_mode()
+
+        self.n_files = 0
+        self.n_bytes = 0
+        self._n_rendered = 0
+        self._start = self._last_render = time.perf_counter()
+
+        self._progress: t.Optional["Progress"] = None
+        self._task: t.Optional["TaskID"] = None
+
+    def __enter__(self) -> "ProgressReporter":
+        if self.mode == ConsoleMode.INTERACTIVE:
+            from rich.progress import BarColumn, Progress, TextColumn
+
+            columns: list["ProgressColumn"]
+            if self.total is None:
+                columns = [TextColumn("{task.description} {task.completed} files")]
+            else:
+                columns = [
+                    TextColumn("{task.description}"),
+                    BarColumn(),
+                    TextColumn("{task.completed}/{task.total}"),
+                ]
+
+            self._progress = Progress(
+                *columns,
+                TextColumn("{task.fields[stats]}"),
+                refresh_per_second=1 / PROGRESS_INTERVAL,
+            )
+            self._progress.start()
+            self._task = self._progress.add_task(
+                self.description, total=self.total or 0, stats=""
+            )
+
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self.n_files != self._n_rendered:
+            self._render(time.perf_counter())
+
+        if self._progress is not None:
+            self._progress.stop()
+
+    def advance(self, filepath: Path, n_bytes: t.Optional[int] = None) -> None:
+        """
+        Mark the provided file as processed, rendering progress if the update interval is up.
+
+        The size of the file is used for the throughput, unless `n_bytes` is provided, e.g. for a
+        member of an archive.
+        """
+        self.n_files += 1
+        self.n_bytes += filepath.stat().st_size if n_bytes is None else n_bytes
+        if self.mode == ConsoleMode.QUIET:
+            return
+
+        now = time.perf_counter()
+        interval = LOG_INTERVAL if self.mode == ConsoleMode.LOG else PROGRESS_INTERVAL
+        if now - self._last_render >= interval:
+            self._render(now)
+
+    def stats(self, now: float) -> str:
+        """Build a summary of the current throughput & ETA."""
+        elapsed = max(now - self._start, 1e-9)
+        files_rate = self.n_files / elapsed
+        stats = f"{files_rate:.1f} files/s, {self.n_bytes / elapsed / 1e6:.2f} MB/s"
+        if self.total is None:
+            return stats
+
+        eta = "?"
+        if files_rate:
+            eta = str(timedelta(seconds=round((self.total - self.n_files) / files_rate)))
+
+        return f"{stats}, ETA {eta}"
+
+    def _render(self, now: float) -> None:
+        """Render the current progress for the console output mode."""
+        self._last_render = now
+        self._n_rendered = self.n_files
+        if self._progress is not None and self._task is not None:
+            self._progress.update(self._task, completed=self.n_files, stats=self.stats(now))
+        elif self.mode == ConsoleMode.LOG:
+            # Plain print rather than rich, there's no need for markup when logging
+            n_files = self.n_files if self.total is None else f"{self.n_files}/{self.total}"
+            print(f"{self.description} {n_files} files ({self.stats(now)})")
@@ -0,0 +1,172 @@
+import sqlite3
+import typing as t
+from pathlib import Path
+
+
+DATABASE_FILENAME = "scansplitter.db"
+
+# Scans are inserted in batches, each in its own transaction, so a large ingest doesn't pay for a
+# commit per scan
+INGEST_BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    location TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (scan_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS landmarks (
+    scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    x REAL,
+    y REAL,
+    z REAL,
+    PRIMARY KEY (scan_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scans_subject ON scans (subject);
+CREATE INDEX IF NOT EXISTS scans_location ON scans (location);
+CREATE INDEX IF NOT EXISTS measurements_name ON measurements (name);
+CREATE INDEX IF NOT EXISTS landmarks_name ON landmarks (name);
+"""
+
+
+class ScanRecord(t.NamedTuple):
+    """
+    A parsed composite scan, ready to be ingested.
+
+    `path` is the POSIX path of the composite file relative to the ingested directory, which
+    identifies the scan in the database, & `sha256` is the hex digest of its contents. `anthro` &
+    `landmark` are the parsed rows of the scan; see `parser.split_composite_file`.
+    """
+
+    path: str
+    sha256: str
+    subject: str
+    location: str
+    anthro: list[str]
+    landmark: list[str]
+
+
+def connect(database_path: Path) -> sqlite3.Connection:
+    """Open the provided scan database, creating its tables & indexes if they don't exist."""
+    connection = sqlite3.connect(database_path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def scan_hashes(connection: sqlite3.Connection) -> dict[str, str]:
+    """Map the path of each ingested scan to the SHA-256 hex digest of its contents."""
+    return dict(connection.execute("SELECT path, sha256 FROM scans"))
+
+
+def _landmark_row(scan_id: int, position: int, row: str) -> tuple[t.Any, ...]:
+    """Build the landmark table row for the provided landmark, padded or truncated to 3 coords."""
+    name, *coords = row.split(",")
+    coords = coords[:3]
+    return (scan_id, position, name, *coords, *([None] * (3 - len(coords))))
+
+
+def upsert_scans(connection: sqlite3.Connection, scans: t.Iterable[ScanRecord]) -> int:
+    """
+    Insert the provided scans into the database in a single transaction, replacing existing scans.
+
+    Existing scans with the same path are replaced along with their measurements & landmarks. The
+    number of scans inserted is returned.
+    """
+    n = 0
+    with connection:
+        for scan in scans:
+            connection.execute("DELETE FROM scans WHERE path = ?", (scan.path,))
+            cursor = connection.execute(
+                "INSERT INTO scans (path, sha256, subject, location) VALUES (?, ?, ?, ?)",
+                (scan.path, scan.sha256, scan.subject, scan.location),
+            )
+            scan_id = t.cast(int, cursor.lastrowid)
+            connection.executemany(
+                "INSERT INTO measurements (scan_id, position, name, value) VALUES (?, ?, ?, ?)",
+                (
+                    (scan_id, position, *row.split(",", 2)[:2])
+                    for position, row in enumerate(scan.anthro)
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO landmarks (scan_id, position, name, x, y, z) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    _landmark_row(scan_id, position, row)
+                    for position, row in enumerate(scan.landmark)
+                ),
+            )
+            n += 1
+
+    return n
+
+
+def subject_ids(connection: sqlite3.Connection, location_fill: str = "") -> list[str]:
+    """
+    Build the location-prefixed subject ID of each ingested scan, ordered by path.
+
+    Scans without a measurement location use `location_fill`.
+    """
+    return [
+        subject_id
+        for (subject_id,) in connection.execute(
+            "SELECT COALESCE(NULLIF(location, ''), ?) || subject FROM scans ORDER BY path",
+            (location_fill,),
+        )
+    ]
+
+
+def measurement_names(connection: sqlite3.Connection) -> list[str]:
+    """List the measurement names of the first ingested scan, ordered by path."""
+    return [
+        name
+        for (name,) in connection.execute(
+            """
+            SELECT name FROM measurements
+            WHERE scan_id = (SELECT id FROM scans ORDER BY path LIMIT 1)
+            ORDER BY position
+            """
+        )
+    ]
+
+
+def iter_measurement_columns(connection: sqlite3.Connection) -> t.Iterator[list[str]]:
+    """
+    Yield the measurement values of each ingested scan, ordered by path.
+
+    Values are streamed from a single query, so only one scan's values are held in memory at once.
+    """
+    column: list[str] = []
+    current_id = None
+    rows = connection.execute(
+        """
+        SELECT scans.id, measurements.value
+        FROM scans LEFT JOIN measurements ON measurements.scan_id = scans.id
+        ORDER BY scans.path, measurements.position
+        """
+    )
+    for scan_id, value in rows:
+        if scan_id != current_id:
+            if current_id is not None:
+                yield column
+
+            column = []
+            current_id = scan_id
+
+        if value is not None:
+            column.append(value)
+
+    if current_id is not None:
+        yield column
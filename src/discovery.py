@@ -0,0 +1,168 @@
+import fnmatch
+import os
+import re
+import time
+import typing as t
+from pathlib import Path
+
+
+def compile_patterns(
+    patterns: t.Iterable[str], ignore_case: bool = False
+) -> t.Optional[t.Pattern[str]]:
+    """
+    Compile the provided glob patterns into a single regex matching any of them.
+
+    If no patterns are provided, `None` is returned.
+    """
+    translated = [fnmatch.translate(pattern) for pattern in patterns]
+    if not translated:
+        return None
+
+    return re.compile("|".join(translated), re.IGNORECASE if ignore_case else 0)
+
+
+class FileListing:
+    """
+    Cached listing of the files in a directory tree, discovered using `os.scandir`.
+
+    The tree is scanned lazily on first use & matching files are streamed to the caller as they are
+    discovered. Once a scan has completed, subsequent queries reuse the cached listing rather than
+    rescanning the tree, so a listing may be shared between the stages of a single run. Files
+    created by an earlier stage can be registered using `add` so later stages don't need to rescan.
+
+    Child directories are only scanned if `recurse` is `True`; directories whose name matches any of
+    the `prune` glob patterns are never scanned. Symlinked directories are not followed.
+
+    All pattern matching is against file & directory names, and may optionally be made case
+    insensitive using `ignore_case`.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        recurse: bool = False,
+        prune: t.Iterable[str] = (),
+        ignore_case: bool = False,
+    ) -> None:
+        self.root = root
+        self.recurse = recurse
+        self.ignore_case = ignore_case
+        self._prune_re = compile_patterns(prune, ignore_case)
+
+        # File names are cached alongside their parent directory, which is cheaper to join into a
+        # `Path` for matching files than building the `Path` from scratch
+        self._entries: list[tuple[str, Path]] = []
+        self._complete = False
+        self._added: dict[Path, None] = {}  # Insertion ordered set
+
+    def _scan(self) -> t.Iterator[tuple[str, Path]]:
+        """Scan the directory tree, yielding the name & parent of each file as it is discovered."""
+        entries = []
+        dirs = [self.root]
+        while dirs:
+            dir_path = dirs.pop()
+            with os.scandir(dir_path) as dir_entries:
+                for entry in dir_entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recurse and not (
+                            self._prune_re and self._prune_re.match(entry.name)
+                        ):
+                            dirs.append(dir_path / entry.name)
+                    elif entry.is_file():
+                        entries.append((entry.name, dir_path))
+                        yield entry.name, dir_path
+
+        # Only cache complete scans, an interrupted scan will be restarted by the next query
+        self._entries = entries
+        self._complete = True
+
+    def iter_files(
+        self, include: t.Iterable[str], exclude: t.Iterable[str] = ()
+    ) -> t.Iterator[Path]:
+        """
+        Yield the files whose names match any of the `include` & none of the `exclude` patterns.
+
+        Files are yielded in discovery order, followed by any matching files registered using `add`
+        that weren't discovered by the scan.
+        """
+        include_re = compile_patterns(include, self.ignore_case)
+        if include_re is None:
+            return
+
+        exclude_re = compile_patterns(exclude, self.ignore_case)
+        entries = self._entries if self._complete else self._scan()
+
+        matched = []
+        for name, dir_path in entries:
+            if include_re.match(name) and not (exclude_re and exclude_re.match(name)):
+                filepath = dir_path / name
+                matched.append(filepath)
+                yield filepath
+
+        if not self._added:
+            return
+
+        seen = set(matched)
+        for filepath in list(self._added):
+            if filepath in seen:
+                continue
+
+            name = filepath.name
+            if include_re.match(name) and not (exclude_re and exclude_re.match(name)):
+                yield filepath
+
+    def add(self, filepaths: t.Iterable[Path]) -> None:
+        """Register files created since the directory tree was scanned."""
+        self._added.update(dict.fromkeys(filepaths))
+
+
+class SettledFiles:
+    """
+    Track files across repeated directory polls, reporting each once it has been fully written.
+
+    A file is considered fully written once its size & modification time are unchanged for at least
+    `settle_time` seconds, across at least two polls. Each file is reported once; it's only reported
+    again if it is subsequently modified & settles again.
+    """
+
+    def __init__(self, settle_time: float = 2.0) -> None:
+        self.settle_time = settle_time
+        # Size & modification time of each file, along with when it was first seen with that stat
+        self._pending: dict[Path, tuple[int, int, float]] = {}
+        self._settled: dict[Path, tuple[int, int]] = {}
+
+    def update(self, filepaths: t.Iterable[Path], now: t.Optional[float] = None) -> list[Path]:
+        """
+        Update the tracked files from the latest poll, returning those that have newly settled.
+
+        Files no longer present in the poll are forgotten.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        settled = []
+        seen = set()
+        for filepath in filepaths:
+            try:
+                stat = filepath.stat()
+            except FileNotFoundError:
+                continue
+
+            seen.add(filepath)
+            file_stat = (stat.st_size, stat.st_mtime_ns)
+            if self._settled.get(filepath) == file_stat:
+                continue
+
+            pending = self._pending.get(filepath)
+            if pending is None or pending[:2] != file_stat:
+                self._pending[filepath] = (*file_stat, now)
+            elif now - pending[2] >= self.settle_time:
+                del self._pending[filepath]
+                self._settled[filepath] = file_stat
+                settled.append(filepath)
+
+        for tracked in (self._pending, self._settled):
+            for filepath in tracked.keys() - seen:
+                del tracked[filepath]
+
+        return settled
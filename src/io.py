@@ -1,137 +1,1713 @@
+import itertools
+import locale
+import mmap
+import os
+import re
+import time
 import typing as t
-from pathlib import Path
+from contextlib import ExitStack, contextmanager
+from enum import Enum
+from functools import partial
+from pathlib import Path, PurePosixPath
 
-from rich import print as rprint
-from src import parser
+import click
+from src import (
+    archives,
+    compression,
+    console,
+    discovery,
+    manifest,
+    parser,
+    profiling,
+    repeats,
+    sharding,
+    store,
+)
+from src.compression import Compression
+from src.console import rprint
+from src.repeats import RepeatPolicy
+
+if t.TYPE_CHECKING:
+    import sqlite3
+
+    from src.arrays import ScanArrays
+    from src.cache import ParseCache
+    from src.staging import StageLimits
 
 
 # Default Headers
 ANTHRO_HEADER = ["Measurement Name,Measurement"]
 LANDMARK_HEADER = ["Landmark Name,x,y,z"]
 
+# Rough in-memory footprint of a single measurement value (string object + list slot), used to
+# size aggregation column blocks for a given memory budget
+BYTES_PER_MEASUREMENT = 64
+
+# Maximum number of aggregation spill files read at once, spilled blocks are merged in multiple
+# passes beyond this to stay well clear of the open file limit
+MAX_OPEN_SPILLS = 64
+
+# Bytes a memory-mapped composite file can't be split as-is with: non-ASCII bytes & the ASCII
+# separators, which `str.split` treats as whitespace, & CRs not followed by a LF, which text mode
+# treats as a newline
+UNMAPPABLE_RE = rb"[\x1c-\x1f\x80-\xff]|\r(?!\n)"
+
+T = t.TypeVar("T")
+
+
+class OutputFormat(str, Enum):  # noqa: D101
+    CSV = "csv"
+    NPZ = "npz"
+
+
+class RowAlignment(str, Enum):
+    """
+    Measurement row alignment modes for aggregation.
+
+    `POSITION` assumes all anthro files contain the same measurements in the same order, `UNION` &
+    `INTERSECTION` align measurements by name across all anthro files, keeping either every
+    measurement or only those present in every file.
+    """
+
+    POSITION = "position"
+    UNION = "union"
+    INTERSECTION = "intersection"
+
+
+def _dump_chunk(filepath: Path, data: list[str], header: t.Optional[list[str]] = None) -> None:
+    """
+    Write the input header & data line(s) to the provided output filepath.
+
+    The output is compressed if the filepath has a compression suffix, e.g. `.csv.gz`; see
+    `compression.Compression` for the supported formats.
+
+    NOTE: Any existing file will be overwritten
+    """
+    with compression.open_text(filepath, "w") as f:
+        f.write(_chunk_src(data, header))
+
+
+def _chunk_src(data: list[str], header: t.Optional[list[str]] = None) -> str:
+    """
+    Join the input header & data line(s) into the contents written by `_dump_chunk`.
+
+    Headers always have a trailing newline, so a chunk without any data ends with a newline.
+    """
+    # Headers need a trailing newline since they'll be followed by our data
+    header_src = "".join(f"{line}\n" for line in header) if header else ""
+    return header_src + "\n".join(data)
+
+
+def _split_output_paths(
+    in_file: Path, compress: Compression = Compression.NONE
+) -> tuple[Path, Path]:
+    """
+    Build the anthro & landmark output filepaths for the provided composite file.
+
+    Any compression suffix of the composite file is ignored, & the suffix of the `compress` format
+    is appended to the output filepaths.
+    """
+    base_stem = compression.strip_suffix(in_file).stem
+    anthro_filepath = in_file.with_name(f"{base_stem}.anthro.csv{compress.suffix}")
+    landmark_filepath = in_file.with_name(f"{base_stem}.lmk.csv{compress.suffix}")
+
+    return anthro_filepath, landmark_filepath
+
+
+def _output_paths(
+    in_file: Path, output_format: OutputFormat, compress: Compression = Compression.NONE
+) -> tuple[Path, ...]:
+    """Build the output filepath(s) for the provided composite file & output format."""
+    if output_format == OutputFormat.NPZ:
+        return (in_file.with_name(f"{compression.strip_suffix(in_file).stem}.npz"),)
+
+    return _split_output_paths(in_file, compress)
+
+
+def _check_numpy() -> None:
+    """Raise a `click.ClickException` if NumPy is not available for binary output."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise click.ClickException(
+            "NumPy is required for binary output, please install the 'numpy' extra."
+        ) from None
+
+
+def _check_output_format(output_format: OutputFormat, compress: Compression) -> None:
+    """Raise a `click.ClickException` if the output format & compression can't be written."""
+    if output_format != OutputFormat.NPZ:
+        return
+
+    if compress != Compression.NONE:
+        raise click.ClickException("Output compression is only supported for CSV output.")
+
+    _check_numpy()
+
+
+def _split_composite(
+    in_file: Path, cache: t.Optional["ParseCache"] = None
+) -> tuple[list[str], list[str]]:
+    """
+    Parse the anthro & landmark rows from the provided composite file.
+
+    If a parse `cache` is provided, the file is only parsed if it isn't already in the cache; see
+    `cache.ParseCache` for details.
+    """
+    if cache is not None:
+        return cache.split_composite_file(in_file)
+
+    with compression.open_text(in_file) as composite_src:
+        return parser.split_composite_file(composite_src)
+
+
+def _profiled_split_composite(
+    in_file: Path, file_profile: profiling.FileProfile, cache: t.Optional["ParseCache"] = None
+) -> tuple[list[str], list[str]]:
+    """
+    Parse the anthro & landmark rows from the provided composite file, timing the read & parse.
+
+    The composite file is read into memory in full so reading & parsing can be timed separately. If
+    a parse `cache` is provided, the parse stage includes hashing the file & the cache lookup, and
+    the number of lines parsed isn't recorded.
+    """
+    stages = file_profile["stages"]
+    if cache is not None:
+        with profiling.timed(stages, "read"):
+            data = in_file.read_bytes()
+
+        file_profile["bytes_read"] = len(data)
+        with profiling.timed(stages, "parse"):
+            return cache.split_composite_bytes(data, compression.detect(in_file))
+
+    with profiling.timed(stages, "read"):
+        composite_src = compression.read_text(in_file).splitlines()
+
+    file_profile["bytes_read"] = in_file.stat().st_size
+    file_profile["lines_parsed"] = len(composite_src)
+
+    with profiling.timed(stages, "parse"):
+        return parser.split_composite_file(composite_src)
+
+
+@contextmanager
+def _replaced_on_success(*filepaths: Path) -> t.Iterator[tuple[Path, ...]]:
+    """
+    Provide temporary filepaths to write the provided outputs to, swapped into place on success.
+
+    If the context raises, the temporary files are removed & any existing outputs are left as they
+    were, so a composite file that fails to parse partway through never leaves truncated outputs
+    behind. Temporary files keep the name & suffixes of their output, so they are compressed alike.
+    """
+    tmp_filepaths = tuple(filepath.with_name(f".tmp-{filepath.name}") for filepath in filepaths)
+    try:
+        yield tmp_filepaths
+    except BaseException:
+        for tmp_filepath in tmp_filepaths:
+            tmp_filepath.unlink(missing_ok=True)
+        raise
+
+    for tmp_filepath, filepath in zip(tmp_filepaths, filepaths):
+        os.replace(tmp_filepath, filepath)
+
+
+@contextmanager
+def _map_file(filepath: Path) -> t.Iterator[t.Union[bytes, mmap.mmap]]:
+    """Memory-map the provided file read-only for the duration of the context."""
+    with filepath.open("rb") as f:
+        # Empty files can't be memory-mapped
+        if not os.fstat(f.fileno()).st_size:
+            yield b""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _is_mappable(data: t.Union[bytes, mmap.mmap]) -> bool:
+    """
+    Check whether the provided raw composite file contents split identically as bytes & as text.
+
+    `parser.iter_composite_bytes` only matches the text parser for ASCII contents in an
+    ASCII-compatible locale encoding, with rows that only contain spaces & tabs as whitespace and
+    lines terminated by LF or CRLF newlines. The contents are checked with a single regex scan.
+    """
+    ascii_bytes = bytes(range(128))
+    if ascii_bytes.decode("ascii").encode(locale.getpreferredencoding(False)) != ascii_bytes:
+        return False
+
+    return re.search(UNMAPPABLE_RE, data) is None
+
+
+def _split_mapped_file(
+    data: t.Union[bytes, mmap.mmap],
+    anthro_filepath: Path,
+    landmark_filepath: Path,
+    collect_anthro: bool = False,
+) -> list[str]:
+    """
+    Split the provided raw contents of an uncompressed composite file, working on its bytes.
+
+    The contents, e.g. from a memory-mapped file, are parsed with `parser.iter_composite_bytes`, so
+    they are never decoded, and rows are written to their respective CSV as-is; see `_split_file`
+    for details. Newlines are written as they would be by a file opened in text mode, so output is
+    identical to the text-based split for contents that pass `_is_mappable`.
+    """
+    encoding = locale.getpreferredencoding(False)
+    newline = os.linesep.encode(encoding)
+
+    anthro = []
+    anthro_f = compression.open_binary(anthro_filepath, "w")
+    landmark_f = compression.open_binary(landmark_filepath, "w")
+    with anthro_f, landmark_f:
+        out_files = {parser.ANTHRO: anthro_f, parser.LANDMARK: landmark_f}
+
+        anthro_f.write(newline.join(header.encode(encoding) for header in ANTHRO_HEADER))
+        landmark_f.write(newline.join(header.encode(encoding) for header in LANDMARK_HEADER))
+        empty_sections = set(out_files)
+        for section, row in parser.iter_composite_bytes(data):
+            out_f = out_files[section]
+            out_f.write(newline)
+            out_f.write(row)
+            empty_sections.discard(section)
+            if collect_anthro and section == parser.ANTHRO:
+                anthro.append(row.decode(encoding))
+
+        # As with `_dump_chunk`, a section without any rows keeps its header's trailing newline
+        for section in empty_sections:
+            out_files[section].write(newline)
+
+    return anthro
+
+
+def _split_text_file(
+    in_file: Path, anthro_filepath: Path, landmark_filepath: Path, collect_anthro: bool = False
+) -> list[str]:
+    """
+    Split the provided composite file, decoding it as text; see `_split_file` for details.
+
+    Compressed composite files are transparently decompressed.
+    """
+    anthro = []
+    with compression.open_text(in_file) as composite_src:
+        anthro_f = compression.open_text(anthro_filepath, "w")
+        landmark_f = compression.open_text(landmark_filepath, "w")
+        with anthro_f, landmark_f:
+            out_files = {parser.ANTHRO: anthro_f, parser.LANDMARK: landmark_f}
+
+            # Since our headers are always present, we can lead off every data row with a newline
+            # rather than tracking the first row, which matches the output of `_dump_chunk`
+            anthro_f.write("\n".join(ANTHRO_HEADER))
+            landmark_f.write("\n".join(LANDMARK_HEADER))
+            empty_sections = set(out_files)
+            for section, row in parser.iter_composite_file(composite_src):
+                out_files[section].write(f"\n{row}")
+                empty_sections.discard(section)
+                if collect_anthro and section == parser.ANTHRO:
+                    anthro.append(row)
+
+            # As with `_dump_chunk`, a section without any rows keeps its header's trailing newline
+            for section in empty_sections:
+                out_files[section].write("\n")
+
+    return anthro
+
+
+def _split_file(
+    in_file: Path,
+    collect_anthro: bool = False,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> list[str]:
+    """
+    Split the provided composite file & write its anthro & landmark CSVs.
+
+    Compressed composite files are transparently decompressed, & the CSVs may be optionally
+    compressed using `compress`.
+
+    The composite file is streamed line by line & rows are written to their respective CSV as soon
+    as they are parsed, so memory usage is independent of the size of the composite file. Output is
+    identical to dumping the fully parsed chunks with `_dump_chunk`. Rows are streamed into
+    temporary files that only replace the CSVs once the whole file has been parsed, so a parsing
+    error leaves any existing CSVs untouched. Uncompressed composite files are memory-mapped & split
+    without being decoded, unless their contents would split differently to text; see
+    `_split_mapped_file` & `_is_mappable`. If a parse `cache` is provided, the parsed rows are
+    instead taken from the cache where possible & written in full.
+
+    If `collect_anthro` is `True`, the anthro rows are also collected & returned, otherwise an empty
+    list is returned.
+
+    This is the console-free worker for `file_split_pipeline`, so it may be safely dispatched to a
+    worker process.
+    """
+    anthro_filepath, landmark_filepath = _split_output_paths(in_file, compress)
+    if cache is not None:
+        anthro, landmark = cache.split_composite_file(in_file)
+        compression.write_text(anthro_filepath, _chunk_src(anthro, ANTHRO_HEADER))
+        compression.write_text(landmark_filepath, _chunk_src(landmark, LANDMARK_HEADER))
+        return anthro if collect_anthro else []
+
+    with _replaced_on_success(anthro_filepath, landmark_filepath) as (anthro_tmp, landmark_tmp):
+        if compression.detect(in_file) == Compression.NONE:
+            with _map_file(in_file) as data:
+                if _is_mappable(data):
+                    return _split_mapped_file(data, anthro_tmp, landmark_tmp, collect_anthro)
+
+        return _split_text_file(in_file, anthro_tmp, landmark_tmp, collect_anthro)
+
+
+def _split_file_arrays(in_file: Path, cache: t.Optional["ParseCache"] = None) -> None:
+    """
+    Split the provided composite file & write its anthro & landmark arrays to a single `.npz` file.
+
+    See `arrays.ScanArrays` for a description of the array representation. The parsed rows are
+    taken from the parse `cache` where possible, if provided.
+
+    This is the console-free binary output worker for `file_split_pipeline`, so it may be safely
+    dispatched to a worker process.
+    """
+    from src import arrays  # NumPy is an optional dependency
+
+    scan = arrays.rows_to_arrays(*_split_composite(in_file, cache))
+
+    (npz_filepath,) = _output_paths(in_file, OutputFormat.NPZ)
+    arrays.dump_scan(npz_filepath, scan)
+
+
+def _profiled_split_file(
+    in_file: Path,
+    output_format: OutputFormat = OutputFormat.CSV,
+    collect_anthro: bool = False,
+    write_splits: bool = True,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> tuple[list[str], profiling.FileProfile]:
+    """
+    Split the provided composite file, timing each stage of the split.
+
+    Output is identical to the unprofiled workers, but the composite file is read, parsed, and
+    written in sequential stages so time can be attributed to each; see `profiling.FileProfile` for
+    a description of what is measured, & `_profiled_split_composite` for how a parse `cache` is
+    timed. The anthro rows are returned if `collect_anthro` is `True`, along with the profile of the
+    split.
+
+    Writing of the split output may be optionally disabled by `write_splits`, & CSV output may be
+    optionally compressed using `compress`.
+
+    This is the console-free profiling worker for `file_split_pipeline`, so it may be safely
+    dispatched to a worker process.
+    """
+    file_profile = profiling.new_file_profile(in_file)
+    stages = file_profile["stages"]
+    anthro, landmark = _profiled_split_composite(in_file, file_profile, cache)
+
+    outputs = _output_paths(in_file, output_format, compress)
+    if output_format == OutputFormat.NPZ:
+        from src import arrays  # NumPy is an optional dependency
+
+        with profiling.timed(stages, "parse"):
+            scan = arrays.rows_to_arrays(anthro, landmark)
+
+        if write_splits:
+            with profiling.timed(stages, "write"):
+                arrays.dump_scan(outputs[0], scan)
+    elif write_splits:
+        with profiling.timed(stages, "write"):
+            compression.write_text(outputs[0], _chunk_src(anthro, ANTHRO_HEADER))
+            compression.write_text(outputs[1], _chunk_src(landmark, LANDMARK_HEADER))
+
+    if write_splits:
+        file_profile["bytes_written"] = sum(output.stat().st_size for output in outputs)
+
+    return (anthro if collect_anthro else []), file_profile
+
+
+def _split_worker(
+    output_format: OutputFormat,
+    profile: bool = False,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> t.Callable[[Path], t.Any]:
+    """
+    Select the worker used to split composite files for the provided output format & compression.
+
+    If `profile` is `True`, the selected worker also returns a profile of each split; see
+    `_profiled_split_file` for details. If a parse `cache` is provided, the worker consults it.
+    """
+    _check_output_format(output_format, compress)
+    if output_format == OutputFormat.NPZ:
+        if profile:
+            return partial(_profiled_split_file, output_format=output_format, cache=cache)
+
+        return partial(_split_file_arrays, cache=cache)
+
+    if profile:
+        return partial(_profiled_split_file, compress=compress, cache=cache)
+
+    return partial(_split_file, compress=compress, cache=cache)
+
+
+class _LongFormatScan(t.NamedTuple):
+    subject: str
+    location: str
+    repeat: str
+    block: bytes
+
+
+def _long_format_scan(in_file: Path, cache: t.Optional["ParseCache"] = None) -> _LongFormatScan:
+    """
+    Parse the provided composite file into an encoded block of long-format rows.
+
+    The subject ID, location, & repeat number are extracted from the file's name; see
+    `store.long_format_block` for the row format. The parsed rows are taken from the parse `cache`
+    where possible, if provided.
+
+    This is the console-free long-format worker for `batch_split_pipeline`, so it may be safely
+    dispatched to a worker process.
+    """
+    subj_id, location = parser.extract_subj_id(in_file.name)
+    subject, repeat = parser.split_repeat(subj_id)
+    anthro, landmark = _split_composite(in_file, cache)
+    block = store.long_format_block(anthro, landmark, subject, location, repeat)
+
+    return _LongFormatScan(subject, location, repeat, block.encode())
+
+
+def _profiled_long_format_scan(
+    in_file: Path, cache: t.Optional["ParseCache"] = None
+) -> tuple[_LongFormatScan, profiling.FileProfile]:
+    """
+    Parse the provided composite file into a block of long-format rows, timing each stage.
+
+    Output is identical to `_long_format_scan`, but the composite file is read & parsed in
+    sequential stages so time can be attributed to each. Blocks are written to the store by the
+    caller, so no write time is recorded.
+    """
+    file_profile = profiling.new_file_profile(in_file)
+    anthro, landmark = _profiled_split_composite(in_file, file_profile, cache)
+
+    with profiling.timed(file_profile["stages"], "parse"):
+        subj_id, location = parser.extract_subj_id(in_file.name)
+        subject, repeat = parser.split_repeat(subj_id)
+        block = store.long_format_block(anthro, landmark, subject, location, repeat).encode()
+
+    file_profile["bytes_written"] = len(block)
+    return _LongFormatScan(subject, location, repeat, block), file_profile
+
+
+class _ParsedScan(t.NamedTuple):
+    subject: str
+    location: str
+    anthro: list[str]
+    landmark: list[str]
+
+
+def _parse_scan(in_file: Path, cache: t.Optional["ParseCache"] = None) -> _ParsedScan:
+    """
+    Parse the provided composite file into its subject ID, location, anthro rows, & landmark rows.
+
+    The parsed rows are taken from the parse `cache` where possible, if provided.
+
+    This is the console-free ingest worker for `ingest_pipeline`, so it may be safely dispatched to
+    a worker process.
+    """
+    subj_id, location = parser.extract_subj_id(in_file.name)
+    anthro, landmark = _split_composite(in_file, cache)
+
+    return _ParsedScan(subj_id, location, anthro, landmark)
+
+
+def _profiled_parse_scan(
+    in_file: Path, cache: t.Optional["ParseCache"] = None
+) -> tuple[_ParsedScan, profiling.FileProfile]:
+    """
+    Parse the provided composite file for ingest, timing each stage.
+
+    Output is identical to `_parse_scan`, but the composite file is read & parsed in sequential
+    stages so time can be attributed to each. Scans are written to the database by the caller, so
+    no write time is recorded.
+    """
+    file_profile = profiling.new_file_profile(in_file)
+    anthro, landmark = _profiled_split_composite(in_file, file_profile, cache)
+
+    with profiling.timed(file_profile["stages"], "parse"):
+        subj_id, location = parser.extract_subj_id(in_file.name)
+
+    return _ParsedScan(subj_id, location, anthro, landmark), file_profile
+
+
+def _read_anthro(in_file: Path, cache: t.Optional["ParseCache"] = None) -> list[str]:
+    """
+    Parse the anthro rows from the provided composite file, without writing any output.
+
+    The parsed rows are taken from the parse `cache` where possible, if provided.
+    """
+    if cache is not None:
+        anthro, _ = cache.split_composite_file(in_file)
+        return anthro
+
+    with compression.open_text(in_file) as composite_src:
+        return [
+            row
+            for section, row in parser.iter_composite_file(composite_src)
+            if section == parser.ANTHRO
+        ]
+
+
+def _parse_staged(
+    in_file: Path,
+    data: bytes,
+    output_format: OutputFormat = OutputFormat.CSV,
+    cache: t.Optional["ParseCache"] = None,
+) -> t.Union[tuple[str, str], "ScanArrays"]:
+    """
+    Parse the provided raw composite file contents into their split outputs, ready to be written.
+
+    CSV output is a pair of anthro & landmark CSV contents, NPZ output is an `arrays.ScanArrays`.
+    Compressed contents are decompressed based on the suffix of `in_file`, & the parsed rows are
+    taken from the parse `cache` where possible, if provided.
+
+    This is the parse stage of the staged batch split, so it may be safely dispatched to a worker
+    process.
+    """
+    in_compression = compression.detect(in_file)
+    if cache is not None:
+        anthro, landmark = cache.split_composite_bytes(data, in_compression)
+    else:
+        # Decode as if opened in text mode, to match parsing the file directly
+        encoding = locale.getpreferredencoding(False)
+        composite_src = compression.decompress(data, in_compression).decode(encoding).splitlines()
+        anthro, landmark = parser.split_composite_file(composite_src)
+
+    if output_format == OutputFormat.NPZ:
+        from src import arrays  # NumPy is an optional dependency
+
+        return arrays.rows_to_arrays(anthro, landmark)
+
+    return _chunk_src(anthro, ANTHRO_HEADER), _chunk_src(landmark, LANDMARK_HEADER)
+
+
+def _write_staged(
+    in_file: Path,
+    parsed: t.Union[tuple[str, str], "ScanArrays"],
+    output_format: OutputFormat = OutputFormat.CSV,
+    compress: Compression = Compression.NONE,
+) -> tuple[Path, ...]:
+    """
+    Write the split outputs parsed by `_parse_staged` for the provided composite file.
+
+    CSV output may be optionally compressed using `compress`. The written filepaths are returned.
+    """
+    outputs = _output_paths(in_file, output_format, compress)
+    if output_format == OutputFormat.NPZ:
+        from src import arrays  # NumPy is an optional dependency
+
+        arrays.dump_scan(outputs[0], t.cast("ScanArrays", parsed))
+    else:
+        for output, contents in zip(outputs, t.cast(tuple[str, str], parsed)):
+            compression.write_text(output, contents)
+
+    return outputs
+
+
+@contextmanager
+def _report_scan(name: str, profiler: t.Optional[profiling.Profiler] = None) -> t.Iterator[None]:
+    """Report the splitting of a single named scan to the console, finishing once it is done."""
+    with profiling.stage(profiler, "console"):
+        rprint(f"Processing {name!r} ... ", end="")
+
+    yield
+
+    with profiling.stage(profiler, "console"):
+        rprint("[green]Done!")
+
+
+def file_split_pipeline(
+    in_file: Path,
+    output_format: OutputFormat = OutputFormat.CSV,
+    profiler: t.Optional[profiling.Profiler] = None,
+    member: str = "*_composite.txt",
+    output_archive: t.Optional[Path] = None,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> None:
+    """
+    Split the provided composite file into CSVs of its anthro & landmark components.
+
+    Split files are written to the same directory as the input file:
+        * Anthro components append ".anthro" to the name of the file
+        * Landmark components append ".lmk" to the name of the file
+
+    e.g. `./some_scan_composite.txt` becomes:
+        `./some_scan_composite.anthro.csv` and `./some_scan_composite.lmk.csv`
+
+    Composite files compressed with gzip, bzip2, or xz are transparently decompressed, e.g.
+    `./some_scan_composite.txt.gz`. The CSVs may be optionally compressed using `compress`, which
+    appends the compression suffix to their names, e.g. `./some_scan_composite.anthro.csv.gz`.
+
+    If `output_format` is `OutputFormat.NPZ`, the anthro & landmark components are instead written
+    as arrays to a single `.npz` file, e.g. `./some_scan_composite.npz`; see `arrays.ScanArrays`
+    for a description of its contents.
+
+    Comments (lines containing `*`) and header lines (lines beginning with `#`) are discarded
+
+    If `in_file` is a zip or tar archive, the single archive member whose file name matches the
+    `member` glob pattern is split instead, without extracting it to disk; see
+    `archive_split_pipeline` for details, including writing to an `output_archive`.
+
+    If a parse `cache` is provided, the parsed composite file is taken from the cache if present,
+    otherwise it is added to the cache; see `cache.ParseCache` for details.
+
+    If a `profiler` is provided, the time spent in each stage of the split is recorded to it.
+
+    NOTE: Any existing anthro & landmark files will be overwritten
+    """
+    if archives.is_archive(in_file):
+        _split_single_member(
+            in_file, member, output_format, output_archive, profiler, compress, cache
+        )
+        return
+    elif output_archive is not None:
+        raise click.ClickException("An output archive may only be used with an archive input.")
+
+    worker = _split_worker(output_format, profiler is not None, compress, cache)
+
+    with _report_scan(compression.strip_suffix(in_file).stem, profiler):
+        result = worker(in_file)
+        if profiler is not None:
+            profiler.add_file(result[1])
+
+
+def _split_single_member(
+    archive: Path,
+    member: str = "*_composite.txt",
+    output_format: OutputFormat = OutputFormat.CSV,
+    output_archive: t.Optional[Path] = None,
+    profiler: t.Optional[profiling.Profiler] = None,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> None:
+    """Split the single member of the provided archive matching the `member` glob pattern."""
+    _check_output_format(output_format, compress)
+    _check_output_archive(archive, output_archive)
+
+    with profiling.stage(profiler, "discovery"):
+        member_names = archives.list_members(archive, [member])
+    if len(member_names) != 1:
+        raise click.ClickException(
+            f"Expected a single member of '{archive.name}' matching '{member}', found {len(member_names)}."  # noqa: E501
+        )
+
+    with _report_scan(PurePosixPath(member_names[0]).stem, profiler):
+        with archives.open_writer(output_archive) as writer:
+            for archive_member in archives.iter_members(archive, [member]):
+                _split_member(
+                    archive, archive_member, output_format, writer, profiler, compress, cache
+                )
+
+
+def _find_files(
+    listing: discovery.FileListing, pattern: str, exclude: t.Iterable[str] = ()
+) -> t.Iterator[Path]:
+    """
+    Find the files in the listing matching `pattern` & none of the `exclude` glob patterns.
+
+    Patterns also match compressed variants of the files they match, e.g. `*_composite.txt` also
+    matches `*_composite.txt.gz`; see `compression.with_suffixes` for details.
+    """
+    include = compression.with_suffixes([pattern])
+    return listing.iter_files(include, compression.with_suffixes(exclude))
+
+
+def _select_repeats(
+    files: t.Iterable[Path], policy: RepeatPolicy, location_fill: str = ""
+) -> t.Iterable[Path]:
+    """
+    Drop superseded repeat scans from the provided files, see `repeats.select_repeats`.
+
+    If every scan is kept, the provided files are returned as-is so discovery remains lazy.
+    """
+    if policy == RepeatPolicy.ALL:
+        return files
+
+    found_files = list(files)
+    selected_files = repeats.select_repeats(found_files, policy, location_fill)
+    rprint(f"Skipping {len(found_files) - len(selected_files)} superseded repeat scans.")
+    return selected_files
+
+
+def _iter_split(
+    composite_files: t.Iterable[Path],
+    jobs: int,
+    worker: t.Callable[[Path], T],
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> t.Iterator[tuple[Path, T]]:
+    """
+    Process the provided composite files with `worker`, yielding each file & its result when done.
+
+    Files may optionally be processed in parallel across `jobs` worker processes; if `jobs` is less
+    than 1, one worker is used per CPU. Files are yielded in the order they were provided regardless
+    of the number of workers. If processed serially, files are consumed lazily, so processing can
+    begin while files are still being discovered.
+
+    Progress is reported to the console as files are completed; see `console.ProgressReporter` for
+    details.
+
+    If a `profiler` is provided, `worker` is assumed to also return a profile of each file, which is
+    recorded to the profiler; only the worker's result is yielded.
+    """
+
+    def _unpack(result: t.Union[T, tuple[T, profiling.FileProfile]]) -> T:
+        if profiler is None:
+            return t.cast(T, result)
+
+        result, file_profile = t.cast(tuple[T, profiling.FileProfile], result)
+        profiler.add_file(file_profile)
+        return result
+
+    if jobs != 1:
+        composite_files = list(composite_files)
+
+    total = len(composite_files) if isinstance(composite_files, t.Sized) else None
+    with console.ProgressReporter(total) as progress:
+        if jobs == 1:
+            for composite_file in composite_files:
+                result = _unpack(worker(composite_file))
+                with profiling.stage(profiler, "console"):
+                    progress.advance(composite_file)
+                yield composite_file, result
+
+            return
+
+        # Only pay for the process pool machinery if we're actually using it
+        from concurrent.futures import ProcessPoolExecutor
+
+        max_workers = jobs if jobs > 1 else None
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Results are yielded in submission order, so we can report them as they would have been
+            # reported serially; any worker exception is re-raised when its result is reached
+            results = executor.map(worker, composite_files)
+            try:
+                for composite_file in composite_files:
+                    result = _unpack(next(results))
+                    with profiling.stage(profiler, "console"):
+                        progress.advance(composite_file)
+                    yield composite_file, result
+            except BaseException:
+                # Don't keep splitting the rest of the queue if something has gone wrong
+                executor.shutdown(cancel_futures=True)
+                raise
+
+
+def _check_long_format(
+    output_format: OutputFormat, compress: Compression, incremental: bool
+) -> None:
+    """Raise a `click.ClickException` if long-format output is combined with unsupported options."""
+    if output_format != OutputFormat.CSV or compress != Compression.NONE:
+        raise click.ClickException("Long-format output is only supported for uncompressed CSV.")
+
+    if incremental:
+        raise click.ClickException("Long-format output does not support incremental splitting.")
+
+
+def _write_long_format(
+    in_dir: Path,
+    composite_files: t.Iterable[Path],
+    jobs: int,
+    worker: t.Callable[[Path], _LongFormatScan],
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> int:
+    """
+    Append each of the provided composite files to the long-format store in `in_dir`.
+
+    Files are parsed by `worker`, optionally in parallel across `jobs` worker processes, & their
+    blocks are appended to the store in the order the files were provided; see `_iter_split` for
+    details. Scans are indexed by the POSIX path of their composite file, relative to `in_dir`.
+
+    The number of files written to the store is returned.
+    """
+    n = 0
+    with store.LongFormatWriter(in_dir / store.STORE_FILENAME) as writer:
+        for composite_file, scan in _iter_split(composite_files, jobs, worker, profiler):
+            with profiling.stage(profiler, "write"):
+                key = composite_file.relative_to(in_dir).as_posix()
+                writer.add(key, scan.block, scan.subject, scan.location, scan.repeat)
+            n += 1
+
+    return n
+
+
+def _staged_split(
+    composite_files: t.Iterable[Path],
+    stage_limits: "StageLimits",
+    on_split: t.Callable[[Path, tuple[Path, ...]], None],
+    output_format: OutputFormat = OutputFormat.CSV,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> int:
+    """
+    Split the provided composite files using overlapping read, parse & write stages.
+
+    See `staging.run_staged` for a description of the stages & their `stage_limits`. Files are
+    split as described by `file_split_pipeline`, & `on_split` is called with each file & its outputs
+    as they are written, which may not be in the order the files were provided. Progress is reported
+    to the console as files are split.
+
+    The number of files split is returned.
+    """
+    from src import staging  # Only pay for asyncio if we're using it
+
+    total = len(composite_files) if isinstance(composite_files, t.Sized) else None
+    with console.ProgressReporter(total) as progress:
+
+        def _on_done(composite_file: Path, outputs: tuple[Path, ...]) -> None:
+            on_split(composite_file, outputs)
+            with profiling.stage(profiler, "console"):
+                progress.advance(composite_file)
+
+        return staging.run_staged(
+            composite_files,
+            parse=partial(_parse_staged, output_format=output_format, cache=cache),
+            write=partial(_write_staged, output_format=output_format, compress=compress),
+            on_done=_on_done,
+            limits=stage_limits,
+            profiler=profiler,
+        )
+
+
+def batch_split_pipeline(
+    in_dir: Path,
+    pattern: str = "*_composite.txt",
+    recurse: bool = False,
+    jobs: int = 1,
+    incremental: bool = False,
+    output_format: OutputFormat = OutputFormat.CSV,
+    profiler: t.Optional[profiling.Profiler] = None,
+    exclude: t.Iterable[str] = (),
+    prune: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    listing: t.Optional[discovery.FileListing] = None,
+    compress: Compression = Compression.NONE,
+    long_format: bool = False,
+    cache: t.Optional["ParseCache"] = None,
+    stage_limits: t.Optional["StageLimits"] = None,
+    shard: t.Optional[sharding.Shard] = None,
+    repeats: RepeatPolicy = RepeatPolicy.ALL,
+) -> None:
+    """
+    Batch process all files in the specified directory that match the provided glob pattern.
+
+    Files are split into the provided `output_format`, optionally compressed using `compress`; see
+    `file_split_pipeline` for details.
+
+    Files are discovered using `discovery.FileListing`; file names must match `pattern` & none of
+    the `exclude` glob patterns, see `_find_files` for how compressed files are matched. Recursion
+    can optionally be specified by `recurse`, and child directories whose name matches any of the
+    `prune` glob patterns are skipped. Pattern matching may optionally be made case-insensitive by
+    `ignore_case`. A `listing` may be provided to reuse a listing shared with other stages of the
+    run, in which case `recurse`, `prune`, and `ignore_case` are taken from the listing. The split
+    outputs are registered with the listing, so a later aggregation stage doesn't need to rescan the
+    directory tree.
+
+    Files may optionally be split in parallel across `jobs` worker processes; if `jobs` is less
+    than 1, one worker is used per CPU. Progress is reported to the console as files are split; see
+    `console.ProgressReporter` for details.
+
+    If `incremental` is `True`, a manifest of split files is maintained in `in_dir` & only new or
+    modified files are split; see `manifest.is_unchanged` for how unchanged files are identified.
+
+    If `long_format` is `True`, rather than splitting each file into its own outputs, all scans are
+    appended to a single long-format CSV store in `in_dir`, along with an offset index so a single
+    scan can be read back without reading the whole store; see `store.LongFormatWriter` for
+    details. Long-format output is uncompressed CSV & is always rebuilt from scratch, so it can't be
+    combined with `output_format`, `compress`, or `incremental`.
+
+    If a parse `cache` is provided, composite files are only parsed if they aren't already in the
+    cache; see `cache.ParseCache` for details.
+
+    If `stage_limits` are provided, files are instead split by a staged pipeline, where reading,
+    parsing & writing of different files overlap, with the number of files in each stage bounded
+    by its limit; `jobs` is ignored in favor of the parse stage limit. This keeps high-latency
+    storage busy; see `staging.run_staged` for details. Staged splitting doesn't support
+    `long_format` output.
+
+    If a `shard` is provided, only the files assigned to the shard are split, so a cohort may be
+    split across several machines sharing `in_dir`; see `sharding.in_shard` for how files are
+    assigned. Sharded splitting can't be combined with `incremental` or `long_format`, which each
+    maintain a single file in `in_dir`.
+
+    Repeat scans of a subject are all split unless `repeats` is `RepeatPolicy.LATEST` or
+    `RepeatPolicy.FIRST`, in which case superseded scans are skipped before any are split, using
+    only their file names; see `repeats.build_repeat_index` for how scans are ordered. Repeats are
+    selected across the whole of `in_dir` before sharding, so every shard makes the same selection.
+
+    If a `profiler` is provided, the time spent in each stage of the batch is recorded to it. File
+    discovery, including any incremental manifest checks, is completed before splitting begins so
+    it may be timed separately.
+    """
+    if listing is None:
+        listing = discovery.FileListing(in_dir, recurse, prune, ignore_case)
+
+    if shard is not None and (incremental or long_format):
+        raise click.ClickException(
+            "Sharded splitting cannot be combined with incremental splitting or long-format output."
+        )
+
+    if long_format:
+        if stage_limits is not None:
+            raise click.ClickException("Long-format output does not support staged splitting.")
+
+        _check_long_format(output_format, compress, incremental)
+        worker: t.Callable[[Path], t.Any] = partial(
+            _long_format_scan if profiler is None else _profiled_long_format_scan, cache=cache
+        )
+    else:
+        worker = _split_worker(output_format, profiler is not None, compress, cache)
+
+    with profiling.stage(profiler, "discovery"):
+        # Files are split as they're discovered, unless we need to do some work up front
+        composite_files: t.Iterable[Path] = sharding.filter_shard(
+            _select_repeats(_find_files(listing, pattern, exclude), repeats), in_dir, shard
+        )
+        if profiler is not None:
+            composite_files = list(composite_files)
+
+        if incremental:
+            split_manifest = manifest.load_manifest(in_dir)
+            found_files = list(composite_files)
+            composite_files = [
+                composite_file
+                for composite_file in found_files
+                if not manifest.is_unchanged(
+                    composite_file,
+                    in_dir,
+                    split_manifest,
+                    outputs=_output_paths(composite_file, output_format, compress),
+                )
+            ]
+            n_skipped = len(found_files) - len(composite_files)
+
+    if long_format:
+        n = _write_long_format(in_dir, composite_files, jobs, worker, profiler)
+        listing.add([in_dir / store.STORE_FILENAME])
+        rprint(f"Processed {n} files")
+        return
+
+    def _record_split(composite_file: Path, outputs: tuple[Path, ...]) -> None:
+        listing.add(outputs)
+        if incremental:
+            manifest.record(composite_file, in_dir, split_manifest, outputs)
+
+    n = 0
+    try:
+        if stage_limits is not None:
+            n = _staged_split(
+                composite_files,
+                stage_limits,
+                _record_split,
+                output_format,
+                compress,
+                cache,
+                profiler,
+            )
+        else:
+            for composite_file, _ in _iter_split(composite_files, jobs, worker, profiler):
+                n += 1
+                outputs = _output_paths(composite_file, output_format, compress)
+                _record_split(composite_file, outputs)
+    finally:
+        # Keep track of whatever we managed to split, even if something has gone wrong
+        if incremental:
+            manifest.save_manifest(in_dir, split_manifest)
+
+    if incremental:
+        rprint(f"Processed {n} files, skipped {n_skipped} unchanged files")
+    else:
+        rprint(f"Processed {n} files")
+
+
+def _split_member(
+    archive: Path,
+    member: archives.ArchiveMember,
+    output_format: OutputFormat = OutputFormat.CSV,
+    writer: t.Optional[archives.ArchiveWriter] = None,
+    profiler: t.Optional[profiling.Profiler] = None,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> None:
+    """
+    Split the provided composite archive member & write its outputs.
+
+    The member is streamed directly into the parser rather than being extracted to disk. Outputs are
+    named as in `file_split_pipeline` & are written alongside the member's path in the archive,
+    either under the archive's directory or, if a `writer` is provided, in its output archive. A
+    `click.ClickException` is raised if the member's path is absolute or contains `..`, since its
+    outputs would escape the archive's directory. CSV outputs may be optionally compressed using
+    `compress`. If a parse `cache` is provided, the
+    member is read into memory in full & hashed, & is only parsed if it isn't already in the cache.
+
+    If a `profiler` is provided, the time spent in each stage of the split is recorded to it; as in
+    `_profiled_split_file`, the member is read into memory in full so it may be timed separately.
+    """
+    member_path = PurePosixPath(member.name)
+    if member_path.is_absolute() or ".." in member_path.parts:
+        raise click.ClickException(
+            f"Archive member '{member.name}' of '{archive.name}' has an unsafe path, refusing to write its outputs."  # noqa: E501
+        )
+
+    file_profile = profiling.track_file(profiler, archive / member.name)
+    composite_src: t.Iterable[str] = member.src
+    if file_profile is not None:
+        with profiling.stage(profiler, "read", file_profile):
+            composite_src = list(member.src)
+
+        file_profile["bytes_read"] = member.size
+        file_profile["lines_parsed"] = len(composite_src)
+
+    output_paths = [
+        member_path.parent / output.name
+        for output in _output_paths(Path(member_path.name), output_format, compress)
+    ]
+    with profiling.stage(profiler, "parse", file_profile):
+        if cache is not None:
+            anthro, landmark = cache.split_composite_src(composite_src)
+        else:
+            anthro, landmark = parser.split_composite_file(composite_src)
+
+        if output_format == OutputFormat.NPZ:
+            from io import BytesIO
+
+            from src import arrays  # NumPy is an optional dependency
+
+            npz_buffer = BytesIO()
+            arrays.dump_scan(npz_buffer, arrays.rows_to_arrays(anthro, landmark))
+            contents = [npz_buffer.getvalue()]
+        else:
+            contents = [
+                compression.compress(_chunk_src(anthro, ANTHRO_HEADER).encode(), compress),
+                compression.compress(_chunk_src(landmark, LANDMARK_HEADER).encode(), compress),
+            ]
+
+    with profiling.stage(profiler, "write", file_profile):
+        for output_path, data in zip(output_paths, contents):
+            if writer is None:
+                out_filepath = archive.parent / output_path
+                out_filepath.parent.mkdir(parents=True, exist_ok=True)
+                out_filepath.write_bytes(data)
+            else:
+                writer.write(output_path.as_posix(), data)
+
+    if file_profile is not None:
+        file_profile["bytes_written"] = sum(len(data) for data in contents)
+
+
+def _check_output_archive(archive: Path, output_archive: t.Optional[Path]) -> None:
+    """Raise a `click.ClickException` if the output archive is unsupported or is the input."""
+    if output_archive is None:
+        return
+
+    if not archives.is_archive(output_archive):
+        raise click.ClickException(f"Unsupported output archive type: '{output_archive.name}'")
+
+    if output_archive.resolve() == archive.resolve():
+        raise click.ClickException("Output archive cannot overwrite the input archive.")
+
+
+def archive_split_pipeline(
+    archive: Path,
+    pattern: str = "*_composite.txt",
+    output_format: OutputFormat = OutputFormat.CSV,
+    output_archive: t.Optional[Path] = None,
+    profiler: t.Optional[profiling.Profiler] = None,
+    exclude: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    compress: Compression = Compression.NONE,
+    cache: t.Optional["ParseCache"] = None,
+) -> None:
+    """
+    Batch process all members of the provided zip or tar archive that match the glob pattern.
+
+    Members are streamed directly from the archive into the parser, without extracting them to
+    disk. As with `batch_split_pipeline`, member file names must match `pattern` & none of the
+    `exclude` glob patterns, optionally ignoring case. Archive members are split serially, in
+    archive order, & progress is reported to the console as they are split.
+
+    Members are split into the provided `output_format`, optionally compressed using `compress`,
+    with outputs named as in `file_split_pipeline`. Outputs keep the directory structure of the
+    input archive, so same-named members in different directories don't collide. By default they
+    are written under the archive's directory; if an `output_archive` is provided, they are instead
+    written to a single new zip or tar archive.
+
+    If a parse `cache` is provided, members are only parsed if they aren't already in the cache;
+    see `_split_member` for details.
+
+    If a `profiler` is provided, the time spent in each stage of the batch is recorded to it.
+
+    NOTE: Any existing outputs, including the output archive, will be overwritten
+    """
+    _check_output_format(output_format, compress)
+    _check_output_archive(archive, output_archive)
+
+    n = 0
+    with archives.open_writer(output_archive) as writer, console.ProgressReporter(None) as progress:
+        for member in archives.iter_members(archive, [pattern], exclude, ignore_case):
+            _split_member(archive, member, output_format, writer, profiler, compress, cache)
+            n += 1
+            with profiling.stage(profiler, "console"):
+                progress.advance(archive / member.name, n_bytes=member.size)
+
+    rprint(f"Processed {n} files")
+    if output_archive is not None:
+        rprint(f"Split files written to: '{output_archive}'")
+
+
+def _nonempty_line_count(src: str) -> int:
+    """Count the number of non-empty lines present in the provided source string."""
+    return sum(1 for line in src.splitlines() if line.strip())
+
+
+def _subject_ids(files: list[Path], location_fill: str) -> list[str]:
+    """Build the location-prefixed subject ID for each of the provided files."""
+    subject_ids = []
+    for file in files:
+        subj_id, location = parser.extract_subj_id(file.name, location_fill)
+        subject_ids.append(f"{location}{subj_id}")
+
+    return subject_ids
+
+
+def _build_aggregate_header(files: list[Path], header_prefix: str, location_fill: str) -> str:
+    """Generate the header line for the aggregate measurement CSV."""
+    return f"{header_prefix},{','.join(_subject_ids(files, location_fill))}"
+
+
+def _extract_measurement_values(data_file_src: str) -> list[str]:
+    """Extract the measurement values (second column, sans header) from the provided anthro file."""
+    data_lines = data_file_src.splitlines()[1:]  # skip header line
+    return [line.split(",")[1] for line in data_lines]
+
+
+class _MeasurementIndex:
+    """
+    Hash index of measurement name to row of the aggregate measurement CSV.
+
+    Anthro measurement files are aligned against the index as they are parsed, so measurements are
+    matched by name rather than position in a single pass over each file. Measurement names not yet
+    in the index are appended to it, so rows are ordered by first appearance.
+
+    Names repeated within a single file are indexed by their occurrence, i.e. the second occurrence
+    of a name in one file is aligned with the second occurrence of that name in the others.
+    """
+
+    def __init__(self, missing_value: str = "") -> None:
+        self.missing_value = missing_value
+        self.names: list[str] = []
+        self.n_files = 0
+        self._rows: dict[tuple[str, int], int] = {}
+        self._counts: list[int] = []  # Number of files containing each row
+
+    def align(self, data_file_src: str) -> list[str]:
+        """
+        Extract the measurement values from the provided anthro file, aligned to the index rows.
+
+        The returned column covers every row indexed so far, with `missing_value` for measurements
+        not in this file. Columns aligned earlier may therefore be shorter than later ones; any
+        missing trailing rows should also be filled with `missing_value`. A row without a value,
+        i.e. without a comma, is aligned with an empty value.
+        """
+        column = [self.missing_value] * len(self.names)
+        occurrences: dict[str, int] = {}
+        for line in data_file_src.splitlines()[1:]:  # skip header line
+            if not line:
+                continue
+
+            name, _, values = line.partition(",")
+            value = values.partition(",")[0]
+            occurrence = occurrences.get(name, 0)
+            occurrences[name] = occurrence + 1
+
+            row = self._rows.get((name, occurrence))
+            if row is None:
+                row = self._rows[(name, occurrence)] = len(self.names)
+                self.names.append(name)
+                self._counts.append(0)
+                column.append(self.missing_value)
+
+            self._counts[row] += 1
+            column[row] = value
+
+        self.n_files += 1
+        return column
+
+    def shared_rows(self) -> list[bool]:
+        """Flag the rows present in every file aligned so far."""
+        return [count == self.n_files for count in self._counts]
+
+
+def _iter_measurement_columns(
+    files: list[Path],
+    sample_src: t.Optional[str] = None,
+    profiler: t.Optional[profiling.Profiler] = None,
+    extract: t.Callable[[str], list[str]] = _extract_measurement_values,
+) -> t.Iterator[list[str]]:
+    """
+    Lazily extract the measurement values from each of the provided anthro measurement files.
+
+    If the source of the first file has already been read, it may be provided as `sample_src` so
+    the file is not read again.
+
+    Measurement values are extracted from each file's source using `extract`, e.g. to align them
+    against a `_MeasurementIndex`.
+
+    If a `profiler` is provided, the time spent reading & parsing each file is recorded to it.
+    """
+    for idx, file in enumerate(files):
+        file_profile = profiling.track_file(profiler, file)
+        with profiling.stage(profiler, "read", file_profile):
+            if idx == 0 and sample_src is not None:
+                src = sample_src
+            else:
+                src = compression.read_text(file)
+
+        with profiling.stage(profiler, "parse", file_profile):
+            column = extract(src)
+
+        if file_profile is not None:
+            file_profile["bytes_read"] = file.stat().st_size
+            file_profile["lines_parsed"] = len(column) + 1
+
+        yield column
+
+
+def _merge_measurements(files: list[Path], row_names: list[str]) -> list[str]:
+    """
+    Merge measurement values from the provided list of anthro measurement files.
+
+    Files are assumed to be of the format output by our scan splitting pipeline. Measurements are
+    merged into a list of strings, one measurement per row.
+
+    e.g.:
+        some,header
+        measurement a,11
+        measurement b,12
+
+        some,header
+        measurement a,21
+        measurement b,22
+
+    Becomes:
+        ["measurement a,11,21", "measurement b,12,22"]
+
+    Row names and order are assumed to be consistent across all input files, as well as the input
+    list of row names
+
+    NOTE: All measurements are held in memory; see `_dump_merged_measurements` for a bounded memory
+    alternative
+    """
+    # Iterate through all of the anthro measurement files & pull in the entire measurements column
+    # for each file & store into a list of lists
+    all_measurements = [_extract_measurement_values(compression.read_text(file)) for file in files]
+
+    # Since we have a list of columns, we can use zip to join them into a row for each column
+    # We can also add the row names (sans header) in with this step
+    joined_measurements = [",".join(line) for line in zip(row_names[1:], *all_measurements)]
+
+    return joined_measurements
+
+
+def _spill_rows(filepath: Path, rows: t.Iterable[str]) -> None:
+    """Write the provided row fragments to a spill file, one per line."""
+    with filepath.open("w") as f:
+        f.writelines(f"{row}\n" for row in rows)
+
+
+def _join_blocks(
+    blocks: t.Sequence[t.Iterator[str]], widths: list[int], fill_value: t.Optional[str] = None
+) -> t.Iterator[str]:
+    """
+    Join the row fragments of the provided blocks of columns, row by row.
+
+    If a `fill_value` is provided, rows missing from a block are padded with `fill_value` for each
+    of its `widths` columns, so every row of the longest block is joined; otherwise the joined rows
+    are truncated to the shortest block.
+    """
+    if fill_value is None:
+        return (",".join(row) for row in zip(*blocks))
+
+    fills = [",".join([fill_value] * width) for width in widths]
+    return (
+        ",".join(fill if fragment is None else fragment for fragment, fill in zip(row, fills))
+        for row in itertools.zip_longest(*blocks)
+    )
+
+
+def _merge_spills(
+    spills: list[tuple[Path, int]], spill_dir: Path, fill_value: t.Optional[str] = None
+) -> list[tuple[Path, int]]:
+    """
+    Merge the provided spill files & their widths until there are at most `MAX_OPEN_SPILLS`.
+
+    Each pass joins groups of up to `MAX_OPEN_SPILLS` adjacent spill files row by row into a single
+    wider spill file, so column order is preserved & at most `MAX_OPEN_SPILLS` files are open at
+    once. Merged spill files are removed.
+    """
+    n_passes = 0
+    while len(spills) > MAX_OPEN_SPILLS:
+        n_passes += 1
+        merged: list[tuple[Path, int]] = []
+        for group_idx in range(0, len(spills), MAX_OPEN_SPILLS):
+            group = spills[group_idx:][:MAX_OPEN_SPILLS]
+            merged_filepath = spill_dir / f"merged_{n_passes}_{len(merged)}.csv"
+            with ExitStack() as stack:
+                blocks = [
+                    (line.rstrip("\n") for line in stack.enter_context(filepath.open()))
+                    for filepath, _ in group
+                ]
+                widths = [width for _, width in group]
+                _spill_rows(merged_filepath, _join_blocks(blocks, widths, fill_value))
+
+            for filepath, _ in group:
+                filepath.unlink()
+
+            merged.append((merged_filepath, sum(width for _, width in group)))
+
+        spills = merged
+
+    return spills
+
+
+def _merge_column_blocks(
+    columns: t.Iterable[list[str]],
+    stack: ExitStack,
+    block_size: t.Optional[int] = None,
+    fill_value: t.Optional[str] = None,
+) -> list[t.Iterator[str]]:
+    """
+    Merge the provided measurement value columns into CSV row fragments, in blocks of columns.
+
+    Columns are consumed in blocks of at most `block_size` columns. If there is more than one block,
+    each full block is transposed into rows & spilled to a temporary file managed by the provided
+    `stack`, so only a single block of columns is held in memory at once. The final block is kept
+    in memory. An iterator of the row fragments is returned for each block, to be joined row by
+    row; all columns have been consumed by the time this returns. If more than `MAX_OPEN_SPILLS`
+    blocks are spilled, they are first merged into fewer, wider blocks; see `_merge_spills`.
+
+    If `block_size` is `None`, all columns are merged in a single block.
+
+    If a `fill_value` is provided, columns may differ in length: short columns are padded with
+    `fill_value` & each block's rows are padded indefinitely, so the caller must bound the number
+    of rows consumed.
+    """
+    columns = iter(columns)
+    spills: list[tuple[Path, int]] = []  # Spill filepath & number of columns of each block
+
+    def pad(rows: t.Iterator[str], width: int) -> t.Iterator[str]:
+        if fill_value is None:
+            return rows
+
+        return itertools.chain(rows, itertools.repeat(",".join([fill_value] * width)))
+
+    while True:
+        block = list(itertools.islice(columns, block_size))
+        if block_size is None or len(block) < block_size:
+            # Last block, we can keep this one in memory
+            break
+
+        # Peek ahead so we don't spill a full block if it turns out to be the last one
+        next_column = next(columns, None)
+        if next_column is None:
+            break
+
+        columns = itertools.chain([next_column], columns)
+
+        if not spills:
+            import tempfile  # Only needed when spilling, so don't pay for it at startup
+
+            spill_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+
+        spill_filepath = spill_dir / f"block_{len(spills)}.csv"
+        _spill_rows(spill_filepath, (",".join(row) for row in _transpose(block, fill_value)))
+        spills.append((spill_filepath, len(block)))
+
+    blocks = []
+    if spills:
+        for spill_filepath, width in _merge_spills(spills, spill_dir, fill_value):
+            spill_f = stack.enter_context(spill_filepath.open())
+            blocks.append(pad((line.rstrip("\n") for line in spill_f), width))
 
-def _dump_chunk(filepath: Path, data: list[str], header: t.Optional[list[str]] = None) -> None:
-    """
-    Write the input header & data line(s) to the provided output filepath.
+    if block or fill_value is None:
+        blocks.append(pad((",".join(row) for row in _transpose(block, fill_value)), len(block)))
 
-    NOTE: Any existing file will be overwritten
-    """
-    with filepath.open("w") as f:
-        if header:
-            # Headers need a trailing newline since they'll be followed by our data
-            f.write("".join(f"{line}\n" for line in header))
+    return blocks
+
+
+def _transpose(
+    block: list[list[str]], fill_value: t.Optional[str] = None
+) -> t.Iterator[tuple[str, ...]]:
+    """Transpose a block of columns into rows, padding short columns with `fill_value` if given."""
+    if fill_value is None:
+        return zip(*block)
 
-        f.write("\n".join(data))
+    return itertools.zip_longest(*block, fillvalue=fill_value)
 
 
-def file_split_pipeline(in_file: Path) -> None:
+def _write_rows(f: t.TextIO, header: str, rows: t.Iterable[str]) -> None:
     """
-    Split the provided composite file into CSVs of its anthro & landmark components.
+    Write the provided header & data rows to the provided open file, matching `_dump_chunk`.
 
-    Split files are written to the same directory as the input file:
-        * Anthro components append ".anthro" to the name of the file
-        * Landmark components append ".lmk" to the name of the file
+    Rows are written as they are produced rather than being joined up front. As with `_dump_chunk`,
+    the header is always followed by a newline, even if there are no rows.
+    """
+    f.write(f"{header}\n")
+    for idx, row in enumerate(rows):
+        f.write(f"\n{row}" if idx else row)
 
-    e.g. `./some_scan_composite.txt` becomes:
-        `./some_scan_composite.anthro.csv` and `./some_scan_composite.lmk.csv`
 
-    Comments (lines containing `*`) and header lines (lines beginning with `#`) are discarded
+def _dump_merged_measurements(
+    filepath: Path,
+    header: str,
+    row_names: list[str],
+    columns: t.Iterable[list[str]],
+    block_size: t.Optional[int] = None,
+) -> None:
+    """
+    Merge the provided measurement value columns & write them to the provided output filepath.
 
-    NOTE: Any existing anthro & landmark files will be overwritten
+    Output is identical to dumping the output of `_merge_measurements` with `_dump_chunk`, but
+    columns are consumed lazily in blocks of at most `block_size` columns; see
+    `_merge_column_blocks` for details. This bounds the memory required to a single block of
+    columns, regardless of the number of columns being merged.
+
+    If `block_size` is `None`, all columns are merged in memory.
+
+    NOTE: Any existing file will be overwritten
     """
-    base_stem = in_file.stem
-    anthro_filepath = in_file.with_name(f"{base_stem}.anthro.csv")
-    landmark_filepath = in_file.with_name(f"{base_stem}.lmk.csv")
+    with ExitStack() as stack:
+        blocks = _merge_column_blocks(columns, stack, block_size)
+        with filepath.open("w") as f:
+            _write_rows(f, header, (",".join(row) for row in zip(row_names[1:], *blocks)))
 
-    rprint(f"Processing {base_stem!r} ... ", end="")
 
-    composite_src = in_file.read_text().splitlines()
-    anthro, landmark = parser.split_composite_file(composite_src)
+def _dump_aligned_measurements(
+    filepath: Path,
+    header: str,
+    index: _MeasurementIndex,
+    columns: t.Iterable[list[str]],
+    block_size: t.Optional[int] = None,
+    intersection: bool = False,
+) -> None:
+    """
+    Merge the provided name-aligned measurement value columns & write them to the provided filepath.
+
+    Columns are expected to have been aligned against the provided `index` & are merged as in
+    `_dump_merged_measurements`, with rows missing from a column filled with the index's missing
+    value. Rows are named & ordered by the index. If `intersection` is `True`, only rows present in
+    every column are written.
 
-    _dump_chunk(anthro_filepath, anthro, ANTHRO_HEADER)
-    _dump_chunk(landmark_filepath, landmark, LANDMARK_HEADER)
+    NOTE: Any existing file will be overwritten
+    """
+    with ExitStack() as stack:
+        # All columns are consumed here, so the index is complete once the blocks are merged
+        blocks = _merge_column_blocks(columns, stack, block_size, fill_value=index.missing_value)
+        rows: t.Iterator[tuple[str, ...]] = zip(index.names, *blocks)
+        if intersection:
+            rows = itertools.compress(rows, index.shared_rows())
 
-    rprint("[green]Done!")
+        with filepath.open("w") as f:
+            _write_rows(f, header, (",".join(row) for row in rows))
 
 
-def batch_split_pipeline(
-    in_dir: Path, pattern: str = "*_composite.txt", recurse: bool = False
+def _update_merged_measurements(
+    filepath: Path,
+    header: str,
+    column_order: list[int],
+    n_existing: int,
+    new_rows: t.Iterable[tuple[str, ...]],
 ) -> None:
     """
-    Batch process all files in the specified directory that match the provided glob pattern.
+    Update an existing merged measurements file in place with the provided rows of new values.
 
-    Recursion can optionally be specified by `recurse`.
+    Existing rows are streamed from the merged measurements file & joined with the next row of new
+    values, given as comma-joined fragments of one or more new columns. The combined values are then
+    reordered using `column_order`, which indexes into the `n_existing` existing columns followed by
+    the new columns; existing columns not present in `column_order` are dropped. If every existing
+    column is kept in place, the new values are appended to each existing row without splitting it.
 
-    NOTE: If `recurse` is `True`, do not include `**` in `pattern`, this is not guarded against.
+    A `click.ClickException` is raised if the existing file & the new values differ in their number
+    of rows, rather than truncating either. The updated file is written alongside the existing file
+    & only swapped into place once it is complete.
     """
-    if recurse:
-        pattern = f"**/{pattern}"
+    in_place = column_order[:n_existing] == list(range(n_existing))
 
-    n = 0
-    for composite_file in in_dir.glob(pattern):
-        file_split_pipeline(composite_file)
-        n += 1
+    def updated_rows(existing_f: t.TextIO) -> t.Iterator[str]:
+        next(existing_f)  # Discard the existing header
+        for line, fragments in itertools.zip_longest(existing_f, new_rows):
+            if line is None or fragments is None:
+                raise click.ClickException(
+                    f"Number of measurements in '{filepath}' doesn't match the new anthro files, please run a full aggregation."  # noqa: E501
+                )
 
-    rprint(f"Processed {n} files")
+            line = line.rstrip("\n")
+            if in_place:
+                yield ",".join((line, *fragments))
+                continue
 
+            row_name, *values = line.split(",")
+            if fragments:
+                values.extend(",".join(fragments).split(","))
+            yield f"{row_name},{','.join(values[idx] for idx in column_order)}"
 
-def _nonempty_line_count(src: str) -> int:
-    """Count the number of non-empty lines present in the provided source string."""
-    return sum(1 for line in src.splitlines() if line.strip())
+    with _replaced_on_success(filepath) as (tmp_filepath,):
+        with filepath.open() as existing_f, tmp_filepath.open("w") as f:
+            _write_rows(f, header, updated_rows(existing_f))
 
 
-def _has_same_n_rows(data_file: Path, new_row_names: Path) -> bool:
-    """Check that the two files provided have the same number of non-empty lines."""
-    return _nonempty_line_count(data_file.read_text()) == _nonempty_line_count(
-        new_row_names.read_text()
-    )
+def _checked_columns(
+    columns: t.Iterable[list[str]], files: list[Path], n_rows: int
+) -> t.Iterator[list[str]]:
+    """Pass through the provided measurement columns, checking each has the expected length."""
+    for file, column in zip(files, columns):
+        if len(column) != n_rows:
+            raise click.ClickException(
+                f"Expected {n_rows} measurements in '{file}' but found {len(column)}, please run a full aggregation."  # noqa: E501
+            )
 
+        yield column
 
-def _build_aggregate_header(files: list[Path], header_prefix: str, location_fill: str) -> str:
-    """Generate the header line for the aggregate measurement CSV."""
-    col_names = []
-    for file in files:
-        subj_id, location = parser.extract_subj_id(file.name, location_fill)
-        col_names.append(f"{location}{subj_id}")
 
-    return f"{header_prefix},{','.join(col_names)}"
+def _indexed_row_names(
+    out_filepath: Path,
+    anthro_files: list[Path],
+    aggregate_index: manifest.AggregateIndex,
+    stats: dict[Path, manifest.FileStat],
+    new_row_names: t.Optional[Path] = None,
+) -> t.Optional[list[str]]:
+    """
+    Reuse the measurement names recorded in the aggregate index, without reading any anthro files.
 
+    Measurement names come from the first anthro file, so they are only reused if it is unchanged &
+    was also the first column of the index. Replacement names must also match the recorded names.
+    Otherwise, `None` is returned & the measurement names need to be read again.
+    """
+    first_key = next(iter(aggregate_index["columns"]), None)
+    if first_key != anthro_files[0].relative_to(out_filepath.parent).as_posix():
+        return None
 
-def _merge_measurements(files: list[Path], row_names: list[str]) -> list[str]:
+    if not manifest.is_aggregated(
+        anthro_files[0], out_filepath, aggregate_index, stats[anthro_files[0]]
+    ):
+        return None
+
+    row_names = aggregate_index["row_names"]
+    if new_row_names is not None:
+        if parser.extract_measurement_names(new_row_names.read_text()) != row_names:
+            return None
+
+    return row_names
+
+
+def _incremental_aggregation(
+    out_filepath: Path,
+    anthro_files: list[Path],
+    aggregate_index: manifest.AggregateIndex,
+    row_names: list[str],
+    location_fill: str,
+    stats: dict[Path, manifest.FileStat],
+    memory_budget: t.Optional[float] = None,
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> None:
     """
-    Merge measurement values from the provided list of anthro measurement files.
+    Merge only new or modified anthro measurement files into an existing consolidated file.
 
-    Files are assumed to be of the format output by our scan splitting pipeline. Measurements are
-    merged into a list of strings, one measurement per row.
+    Anthro files are identified as new or modified using their `stats`, so unchanged files are never
+    read. The new columns are merged in blocks within the `memory_budget`, as in
+    `_dump_merged_measurements`, & the existing consolidated file is updated with a single streaming
+    pass. Columns for anthro files that are no longer present are dropped, so the result matches a
+    full rebuild of the consolidated file. The sidecar index is then updated.
 
-    e.g.:
-        some,header
-        measurement a,11
-        measurement b,12
+    A `click.ClickException` is raised if a new anthro file doesn't contain the same number of
+    measurements as the consolidated file.
 
-        some,header
-        measurement a,21
-        measurement b,22
+    If a `profiler` is provided, the time spent in each stage of the update is recorded to it.
+    """
+    existing_keys = list(aggregate_index["columns"])
+    existing_idx = {key: idx for idx, key in enumerate(existing_keys)}
 
-    Becomes:
-        ["measurement a,11,21", "measurement b,12,22"]
+    new_files: list[Path] = []
+    column_order = []
+    for file in anthro_files:
+        key = file.relative_to(out_filepath.parent).as_posix()
+        if manifest.is_aggregated(file, out_filepath, aggregate_index, stats[file]):
+            column_order.append(existing_idx[key])
+        else:
+            column_order.append(len(existing_keys) + len(new_files))
+            new_files.append(file)
 
-    Row names and order are assumed to be consistent across all input files, as well as the input
-    list of row names
+    n_dropped = len(existing_keys) - (len(anthro_files) - len(new_files))
+    if not new_files and not n_dropped:
+        rprint("Consolidated measurements file is already up to date.")
+        return
+
+    rprint(f"Merging {len(new_files)} new or modified anthro measurement files.")
+    aggregate_header = _build_aggregate_header(anthro_files, row_names[0], location_fill)
+    n_rows = len(row_names) - 1
+    columns = _iter_measurement_columns(new_files, profiler=profiler)
+    block_size = _budget_block_size(memory_budget, len(row_names))
+
+    # New columns are read lazily while writing, the profiler excludes this from the write stage
+    with profiling.stage(profiler, "write"), ExitStack() as stack:
+        new_rows: t.Iterable[tuple[str, ...]] = itertools.repeat((), n_rows)
+        if new_files:
+            checked = _checked_columns(columns, new_files, n_rows)
+            new_rows = zip(*_merge_column_blocks(checked, stack, block_size))
+
+        _update_merged_measurements(
+            out_filepath, aggregate_header, column_order, len(existing_keys), new_rows
+        )
+
+    manifest.save_aggregate_index(out_filepath, anthro_files, location_fill, row_names, stats)
+    rprint(f"Consolidated measurements file updated: '{out_filepath}'")
+
+
+def _budget_block_size(memory_budget: t.Optional[float], n_rows: int) -> t.Optional[int]:
+    """Calculate how many measurement columns of `n_rows` rows fit within the memory budget."""
+    if memory_budget is None:
+        return None
+
+    column_size = max(n_rows, 1) * BYTES_PER_MEASUREMENT
+    return max(int(memory_budget * 1e6 // column_size), 1)
+
+
+def _name_aligned_aggregation(
+    out_filepath: Path,
+    anthro_files: list[Path],
+    sample_src: str,
+    location_fill: str,
+    memory_budget: t.Optional[float] = None,
+    intersection: bool = False,
+    missing_value: str = "",
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> None:
     """
-    # Iterate through all of the anthro measurement files & pull in the entire measurements column
-    # for each file & store into a list of lists
-    all_measurements = []
-    for file in files:
-        data_lines = file.read_text().splitlines()[1:]  # skip header line
-        values = [line.split(",")[1] for line in data_lines]
-        all_measurements.append(values)
+    Aggregate the provided anthro measurement files, aligning their measurements by name.
 
-    # Since we have a list of columns, we can use zip to join them into a row for each column
-    # We can also add the row names (sans header) in with this step
-    joined_measurements = [",".join(line) for line in zip(row_names[1:], *all_measurements)]
+    Each file is read & parsed exactly once, aligning it against a shared `_MeasurementIndex` as it
+    is parsed. Blocks are sized for the measurement names in the sample file, since the final number
+    of rows isn't known until every file has been parsed.
+    """
+    header_prefix = parser.extract_measurement_names(sample_src)[0]
+    aggregate_header = _build_aggregate_header(anthro_files, header_prefix, location_fill)
+    block_size = _budget_block_size(memory_budget, _nonempty_line_count(sample_src))
 
-    return joined_measurements
+    index = _MeasurementIndex(missing_value)
+    columns = _iter_measurement_columns(anthro_files, sample_src, profiler, extract=index.align)
+    with profiling.stage(profiler, "write"):
+        _dump_aligned_measurements(
+            out_filepath, aggregate_header, index, columns, block_size, intersection
+        )
+
+    rprint(f"Consolidated measurements file written to: '{out_filepath}'")
 
 
 def anthro_measure_aggregation_pipeline(
@@ -140,45 +1716,689 @@ def anthro_measure_aggregation_pipeline(
     location_fill: str = "",
     pattern: str = "*_composite.anthro.csv",
     recurse: bool = False,
+    memory_budget: t.Optional[float] = None,
+    incremental: bool = False,
+    profiler: t.Optional[profiling.Profiler] = None,
+    exclude: t.Iterable[str] = (),
+    prune: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    listing: t.Optional[discovery.FileListing] = None,
+    align: RowAlignment = RowAlignment.POSITION,
+    missing_value: str = "",
+    shard: t.Optional[sharding.Shard] = None,
+    repeats: RepeatPolicy = RepeatPolicy.ALL,
 ) -> None:
-    """Aggregate a directory of split anthro measurement files into a single CSV."""
-    if recurse:
-        pattern = f"**/{pattern}"
+    """
+    Aggregate a directory of split anthro measurement files into a single CSV.
+
+    Measurement columns are ordered by the path of their anthro measurement file.
+
+    Anthro measurement files are discovered using `discovery.FileListing`, optionally reusing a
+    shared `listing`; see `batch_split_pipeline` for a description of the discovery options.
+
+    Each anthro measurement file is read exactly once. An optional approximate `memory_budget`, in
+    MB, may be provided to bound the amount of measurement data held in memory at one time; see
+    `_dump_merged_measurements` for details.
+
+    If `incremental` is `True`, the anthro measurement files merged into the consolidated file are
+    tracked in a sidecar index & subsequent runs only read new or modified anthro measurement
+    files, identified by their size & modification time; see `_incremental_aggregation`. If the
+    index is missing or out of date, the consolidated file is fully rebuilt.
+
+    By default, all anthro measurement files are assumed to contain the same measurements in the
+    same order. If `align` is `RowAlignment.UNION` or `RowAlignment.INTERSECTION`, measurements are
+    instead aligned by name using a `_MeasurementIndex`, keeping either every measurement or only
+    those present in every file; measurements missing from a file are filled with `missing_value`.
+    Name alignment cannot be combined with `new_row_names` or `incremental`.
+
+    If a `shard` is provided, only the anthro measurement files assigned to the shard are
+    aggregated, into a partial consolidated file named for the shard, e.g.
+    `consolidated_anthro.shard-1-of-4.CSV`, along with its sidecar index. Once every shard has been
+    aggregated, the partial files may be combined using `merge_aggregates_pipeline`; see
+    `sharding.in_shard` for how files are assigned. A partial file is written even if no files are
+    assigned to the shard, so a missing shard can be detected. Sharded aggregation requires
+    position alignment, since name-aligned rows can't be reconstructed from the partial files.
+
+    Superseded repeat scans may be skipped using `repeats`, as in `batch_split_pipeline`; locations
+    missing from file names are filled with `location_fill` when matching repeats.
+
+    If a `profiler` is provided, the time spent in each stage of the aggregation is recorded to it.
+    """
+    if align != RowAlignment.POSITION and (new_row_names or incremental):
+        raise click.ClickException(
+            "Name-keyed row alignment cannot be combined with replacement names or incremental aggregation."  # noqa: E501
+        )
+
+    if align != RowAlignment.POSITION and shard is not None:
+        raise click.ClickException("Name-keyed row alignment cannot be combined with sharding.")
+
+    out_filepath = anthro_dir / "consolidated_anthro.CSV"
+    if shard is not None:
+        out_filepath = sharding.partial_filepath(out_filepath, shard)
+
+    if listing is None:
+        listing = discovery.FileListing(anthro_dir, recurse, prune, ignore_case)
 
     # Listify here so we can run some short-circuit checks on a sample file before launching into
     # the rest of the pipeline
-    anthro_files = list(anthro_dir.glob(pattern))
+    with profiling.stage(profiler, "discovery"):
+        anthro_files = list(
+            sharding.filter_shard(
+                _select_repeats(_find_files(listing, pattern, exclude), repeats, location_fill),
+                anthro_dir,
+                shard,
+            )
+        )
+        # Sorted so column order is consistent between runs & shards, which lets incremental
+        # updates & merged partials match a full rebuild
+        anthro_files.sort()
+
     if not anthro_files:
         rprint(f"No files found in '{anthro_dir}' matching '{pattern}'")
+        if shard is not None:
+            # Record that the shard is empty, rather than leaving the merge to guess
+            out_filepath.write_text("")
+            manifest.save_aggregate_index(out_filepath, [], location_fill, [])
+            rprint(f"Empty partial measurements file written to: '{out_filepath}'")
+
         return
     else:
         rprint(f"Found {len(anthro_files)} anthro measurement files to aggregate.")
 
+    aggregate_index = manifest.load_aggregate_index(out_filepath) if incremental else None
+    if aggregate_index is not None and aggregate_index["location_fill"] != location_fill:
+        aggregate_index = None
+
+    # Each anthro file is only stat-ed once to check it against the index & to update the index
+    stats: dict[Path, manifest.FileStat] = {}
+    row_names = None
+    if aggregate_index is not None:
+        stats = {file: manifest.file_stat(file) for file in anthro_files}
+        row_names = _indexed_row_names(
+            out_filepath, anthro_files, aggregate_index, stats, new_row_names
+        )
+
     # Get measurement (row) names, either from the first measurement file or from the specified
-    # replacement file
+    # replacement file, unless they can be reused from the index
     # All measurement files are assumed to contain the same number & order of measurements
-    if new_row_names:
-        # Do a basic check to see if the replacement file has the same number of rows
-        # Both files are assumed to contain one header line
-        if not _has_same_n_rows(anthro_files[0], new_row_names):
-            rprint(
-                f"Length mismatch between anthro files & replacement measurement names, please check your file: '{new_row_names}'"  # noqa: E501
+    sample_src = None
+    if row_names is None:
+        with profiling.stage(profiler, "read", profiling.track_file(profiler, anthro_files[0])):
+            sample_src = compression.read_text(anthro_files[0])
+
+        if align != RowAlignment.POSITION:
+            rprint(f"Aligning measurements by name ({align.value}).")
+            _name_aligned_aggregation(
+                out_filepath,
+                anthro_files,
+                sample_src,
+                location_fill,
+                memory_budget,
+                intersection=(align == RowAlignment.INTERSECTION),
+                missing_value=missing_value,
+                profiler=profiler,
             )
             return
+
+        if new_row_names:
+            # Do a basic check to see if the replacement file has the same number of rows
+            # Both files are assumed to contain one header line
+            new_row_names_src = new_row_names.read_text()
+            if _nonempty_line_count(sample_src) != _nonempty_line_count(new_row_names_src):
+                rprint(
+                    f"Length mismatch between anthro files & replacement measurement names, please check your file: '{new_row_names}'"  # noqa: E501
+                )
+                return
+
+            row_names = parser.extract_measurement_names(new_row_names_src)
         else:
-            rprint("Using replacement measurement names.")
-            row_names = parser.extract_measurement_names(new_row_names.read_text())
+            row_names = parser.extract_measurement_names(sample_src)
+
+    if new_row_names:
+        rprint("Using replacement measurement names.")
     else:
         rprint(f"Using measurement names from: '{anthro_files[0].name}'")
-        row_names = parser.extract_measurement_names(anthro_files[0].read_text())
+
+    if aggregate_index is not None and aggregate_index["row_names"] == row_names:
+        _incremental_aggregation(
+            out_filepath,
+            anthro_files,
+            aggregate_index,
+            row_names,
+            location_fill,
+            stats,
+            memory_budget,
+            profiler,
+        )
+        return
 
     # Build the aggregate header line, which appends all of the subject IDs to the header of the row
     # names
     aggregate_header = _build_aggregate_header(
         anthro_files, header_prefix=row_names[0], location_fill=location_fill
     )
-    joined_measurements = _merge_measurements(anthro_files, row_names)
 
+    block_size = _budget_block_size(memory_budget, len(row_names))
+
+    # We've already read in our sample file, so we can reuse it rather than reading it again
+    columns = _iter_measurement_columns(anthro_files, sample_src, profiler)
+
+    # Columns are read lazily while writing, the profiler excludes this from the write stage
+    with profiling.stage(profiler, "write"):
+        _dump_merged_measurements(out_filepath, aggregate_header, row_names, columns, block_size)
+
+    # Partial files are always indexed, since merging them relies on knowing their columns
+    if incremental or shard is not None:
+        manifest.save_aggregate_index(
+            out_filepath, anthro_files, location_fill, row_names, stats or None
+        )
+
+    rprint(f"Consolidated measurements file written to: '{out_filepath}'")
+
+
+def _load_partials(out_filepath: Path) -> list[tuple[Path, manifest.AggregateIndex]]:
+    """
+    Find the partial files written by each shard in place of `out_filepath`, along with their index.
+
+    Partials are returned in shard order. A `click.ClickException` is raised unless exactly one
+    partial file is found for each shard of a single shard count, each with an up to date index,
+    all aggregated using the same location fill.
+    """
+    partials = sharding.find_partials(out_filepath)
+    if not partials:
+        raise click.ClickException(f"No partial measurements files found for '{out_filepath}'")
+
+    shard_totals = sorted({shard.total for shard in partials})
+    if len(shard_totals) > 1:
+        raise click.ClickException(
+            f"Found partial measurements files for different shard counts ({shard_totals}), please remove any stale partial files."  # noqa: E501
+        )
+
+    shards = [sharding.Shard(number, shard_totals[0]) for number in range(1, shard_totals[0] + 1)]
+    missing = [str(shard) for shard in shards if shard not in partials]
+    if missing:
+        raise click.ClickException(
+            f"Missing partial measurements files for shard(s): {', '.join(missing)}"
+        )
+
+    loaded = []
+    for shard in shards:
+        aggregate_index = manifest.load_aggregate_index(partials[shard])
+        if aggregate_index is None:
+            raise click.ClickException(
+                f"Index of '{partials[shard]}' is missing or out of date, please re-run the aggregation for shard {shard}."  # noqa: E501
+            )
+
+        loaded.append((partials[shard], aggregate_index))
+
+    if len({aggregate_index["location_fill"] for _, aggregate_index in loaded}) > 1:
+        raise click.ClickException(
+            "Partial measurements files were aggregated using different location fills."
+        )
+
+    return loaded
+
+
+def _check_partial_labels(labels: list[str], row_idx: int) -> None:
+    """Raise a `click.ClickException` unless the row of each partial file has the same label."""
+    if len(set(labels)) > 1:
+        raise click.ClickException(
+            f"Partial measurements files have different measurement names in row {row_idx} ({', '.join(sorted(set(labels)))}), please check the anthro files or use replacement measurement names."  # noqa: E501
+        )
+
+
+def merge_aggregates_pipeline(
+    anthro_dir: Path, profiler: t.Optional[profiling.Profiler] = None
+) -> None:
+    """
+    Merge the partial consolidated measurements files of a sharded aggregation into a single CSV.
+
+    A partial file, e.g. `consolidated_anthro.shard-1-of-4.CSV`, is expected to have been written
+    to `anthro_dir` for every shard by `anthro_measure_aggregation_pipeline`, along with its sidecar
+    index; see `_load_partials` for how the partial files are validated.
+
+    Columns are ordered by the path of their anthro measurement file, as recorded in the partial
+    indexes, so the merged `consolidated_anthro.CSV` is identical to aggregating all of the files
+    at once. Partial files are streamed in lockstep, so only a single row of each is held in
+    memory at once. A `click.ClickException` is raised if the partial files don't contain the same
+    number of measurements with the same names, in which case no merged file is written.
+
+    If a `profiler` is provided, the time spent in each stage of the merge is recorded to it.
+
+    NOTE: Any existing consolidated measurements file will be overwritten
+    """
     out_filepath = anthro_dir / "consolidated_anthro.CSV"
-    _dump_chunk(out_filepath, joined_measurements, [aggregate_header])
+    with profiling.stage(profiler, "discovery"):
+        # Empty shards don't contribute any columns or rows
+        partials = [
+            (partial, aggregate_index)
+            for partial, aggregate_index in _load_partials(out_filepath)
+            if aggregate_index["columns"]
+        ]
+    if not partials:
+        rprint(f"No anthro measurement files were aggregated by any shard in '{anthro_dir}'")
+        return
+    else:
+        rprint(f"Merging {len(partials)} partial measurements files.")
+
+    # Columns are numbered across all partial files, in the order they appear in each
+    column_filepaths: list[Path] = []
+    for _, aggregate_index in partials:
+        column_filepaths.extend(anthro_dir / key for key in aggregate_index["columns"])
+
+    # Sort by path, to match the column order of an unsharded aggregation
+    column_order = sorted(range(len(column_filepaths)), key=column_filepaths.__getitem__)
+
+    def merged_rows(partial_files: t.Sequence[t.TextIO]) -> t.Iterator[str]:
+        for row_idx, lines in enumerate(itertools.zip_longest(*partial_files), start=1):
+            if None in lines:
+                raise click.ClickException(
+                    "Partial measurements files contain different numbers of measurements, please check the anthro files or re-run the aggregation."  # noqa: E501
+                )
+
+            rows = [line.rstrip("\n").split(",") for line in lines]
+            _check_partial_labels([row[0] for row in rows], row_idx)
+            values = [value for row in rows for value in row[1:]]
+            yield f"{rows[0][0]},{','.join(values[i] for i in column_order)}"
+
+    with profiling.stage(profiler, "write"), ExitStack() as stack:
+        partial_files = [stack.enter_context(partial.open()) for partial, _ in partials]
+        headers = [next(partial_f).rstrip("\n").split(",") for partial_f in partial_files]
+        subject_ids = [subject_id for header in headers for subject_id in header[1:]]
+        if len(subject_ids) != len(column_filepaths):
+            raise click.ClickException(
+                "Partial measurements file headers don't match their indexes, please re-run the aggregation."  # noqa: E501
+            )
+
+        _check_partial_labels([header[0] for header in headers], 0)
+        header = ",".join([headers[0][0], *(subject_ids[i] for i in column_order)])
+        with _replaced_on_success(out_filepath) as (tmp_filepath,):
+            with tmp_filepath.open("w") as f:
+                _write_rows(f, header, merged_rows(partial_files))
+
+    rprint(f"Consolidated measurements file written to: '{out_filepath}'")
+
+
+def landmark_aggregation_pipeline(
+    landmark_dir: Path,
+    location_fill: str = "",
+    pattern: str = "*_composite.lmk.csv",
+    recurse: bool = False,
+    profiler: t.Optional[profiling.Profiler] = None,
+    exclude: t.Iterable[str] = (),
+    prune: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    listing: t.Optional[discovery.FileListing] = None,
+) -> None:
+    """
+    Aggregate a directory of split landmark files into a single memory-mapped array.
+
+    Landmark coordinates are written to a subjects x landmarks x 3 float64 array in
+    `consolidated_landmarks.npy`, along with a sidecar `consolidated_landmarks.npy.index.json`
+    index of the subject IDs & landmark names for each axis; see `arrays.load_landmark_stack` for
+    loading the aggregated landmarks.
+
+    Subjects are ordered by the path of their landmark file. Landmark names are taken from the
+    first landmark file; landmarks missing from a subject are filled with `NaN` & landmarks not
+    present in the first file are dropped.
+
+    The array is written one subject at a time, so only a single subject's landmarks are held in
+    memory regardless of the number of subjects.
+
+    Landmark files are discovered using `discovery.FileListing`, optionally reusing a shared
+    `listing`; see `batch_split_pipeline` for a description of the discovery options.
+
+    If a `profiler` is provided, the time spent in each stage of the aggregation is recorded to it.
+    """
+    _check_numpy()
+    from src import arrays  # NumPy is an optional dependency
+
+    if listing is None:
+        listing = discovery.FileListing(landmark_dir, recurse, prune, ignore_case)
+
+    with profiling.stage(profiler, "discovery"):
+        landmark_files = sorted(_find_files(listing, pattern, exclude))
+
+    if not landmark_files:
+        rprint(f"No files found in '{landmark_dir}' matching '{pattern}'")
+        return
+    else:
+        rprint(f"Found {len(landmark_files)} landmark files to aggregate.")
+
+    # Get landmark names from the first landmark file, which we can reuse rather than parsing again
+    sample_profile = profiling.track_file(profiler, landmark_files[0])
+    with profiling.stage(profiler, "read", sample_profile):
+        sample_src = compression.read_text(landmark_files[0])
+
+    with profiling.stage(profiler, "parse", sample_profile):
+        landmark_names, sample_coords = arrays.parse_landmark_csv(sample_src)
+
+    rprint(f"Using landmark names from: '{landmark_files[0].name}'")
+
+    out_filepath = landmark_dir / "consolidated_landmarks.npy"
+    with profiling.stage(profiler, "write"):
+        stack = arrays.open_landmark_stack(out_filepath, len(landmark_files), len(landmark_names))
+
+    with console.ProgressReporter(len(landmark_files)) as progress:
+        for idx, file in enumerate(landmark_files):
+            file_profile = profiling.track_file(profiler, file)
+            if idx == 0:
+                names, coords = landmark_names, sample_coords
+            else:
+                with profiling.stage(profiler, "read", file_profile):
+                    landmark_src = compression.read_text(file)
+
+                with profiling.stage(profiler, "parse", file_profile):
+                    names, coords = arrays.parse_landmark_csv(landmark_src)
+
+            with profiling.stage(profiler, "write", file_profile):
+                stack[idx] = arrays.align_landmarks(names, coords, landmark_names)
+
+            if file_profile is not None:
+                file_profile["bytes_read"] = file.stat().st_size
+                file_profile["lines_parsed"] = len(names) + 1
+
+            with profiling.stage(profiler, "console"):
+                progress.advance(file)
+
+    with profiling.stage(profiler, "write"):
+        stack.flush()
+        del stack  # Release the memory map before writing the index
+
+        subjects = _subject_ids(landmark_files, location_fill)
+        arrays.dump_landmark_index(out_filepath, subjects, landmark_names, landmark_files)
+
+    rprint(f"Consolidated landmarks file written to: '{out_filepath}'")
+
+
+def fused_split_aggregation_pipeline(
+    in_dir: Path,
+    pattern: str = "*_composite.txt",
+    recurse: bool = False,
+    jobs: int = 1,
+    location_fill: str = "",
+    write_splits: bool = True,
+    profiler: t.Optional[profiling.Profiler] = None,
+    exclude: t.Iterable[str] = (),
+    prune: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    cache: t.Optional["ParseCache"] = None,
+    memory_budget: t.Optional[float] = None,
+) -> None:
+    """
+    Split all matching composite files & aggregate their anthro measurements in a single pass.
+
+    This is equivalent to running `batch_split_pipeline` followed by
+    `anthro_measure_aggregation_pipeline` with their default values, except that anthro
+    measurements are merged as each composite file is parsed rather than re-read from the split
+    anthro CSVs. Only anthro measurements from the composite files found by this run are
+    aggregated. An optional approximate `memory_budget`, in MB, may be provided to bound the amount
+    of measurement data held in memory at one time, as in `anthro_measure_aggregation_pipeline`.
+
+    Writing of the split anthro & landmark CSVs may optionally be disabled by `write_splits`.
+
+    See `batch_split_pipeline` for a description of the file discovery options & the optional
+    parse `cache`.
+
+    If a `profiler` is provided, the time spent in each stage of the pipeline is recorded to it.
+    """
+    listing = discovery.FileListing(in_dir, recurse, prune, ignore_case)
+
+    # Columns are ordered by the path of their anthro file, as in the aggregation pipeline
+    with profiling.stage(profiler, "discovery"):
+        composite_files = sorted(
+            _find_files(listing, pattern, exclude), key=lambda file: _split_output_paths(file)[0]
+        )
+
+    if not composite_files:
+        rprint(f"No files found in '{in_dir}' matching '{pattern}'")
+        return
+
+    worker: t.Callable[[Path], list[str]]
+    if profiler is not None:
+        # The profile returned alongside the anthro rows is unpacked by `_iter_split`
+        worker = t.cast(
+            t.Callable[[Path], list[str]],
+            partial(
+                _profiled_split_file,
+                collect_anthro=True,
+                write_splits=write_splits,
+                cache=cache,
+            ),
+        )
+    elif write_splits:
+        worker = partial(_split_file, collect_anthro=True, cache=cache)
+    else:
+        worker = partial(_read_anthro, cache=cache)
+
+    # Measurement names are taken from the first scan, which also sizes the blocks of columns
+    split_anthro = (anthro for _, anthro in _iter_split(composite_files, jobs, worker, profiler))
+    first_anthro = next(split_anthro)
+    row_names = parser.extract_measurement_names("\n".join([*ANTHRO_HEADER, *first_anthro]))
+    columns = (
+        [row.split(",")[1] for row in anthro]
+        for anthro in itertools.chain([first_anthro], split_anthro)
+    )
+
+    anthro_files = [_split_output_paths(file)[0] for file in composite_files]
+    aggregate_header = _build_aggregate_header(
+        anthro_files, header_prefix=row_names[0], location_fill=location_fill
+    )
+
+    out_filepath = in_dir / "consolidated_anthro.CSV"
+    with ExitStack() as stack:
+        # Scans are split as their columns are consumed, so the split isn't timed as a write
+        block_size = _budget_block_size(memory_budget, len(row_names))
+        blocks = _merge_column_blocks(columns, stack, block_size)
+        rprint(f"Processed {len(composite_files)} files")
+
+        with profiling.stage(profiler, "write"), out_filepath.open("w") as f:
+            _write_rows(f, aggregate_header, (",".join(row) for row in zip(row_names[1:], *blocks)))
+
+    rprint(f"Consolidated measurements file written to: '{out_filepath}'")
+
+
+def watch_pipeline(
+    scan_dir: Path,
+    pattern: str = "*_composite.txt",
+    recurse: bool = False,
+    exclude: t.Iterable[str] = (),
+    prune: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    output_format: OutputFormat = OutputFormat.CSV,
+    compress: Compression = Compression.NONE,
+    aggregate: bool = True,
+    location_fill: str = "",
+    poll_interval: float = 2.0,
+    settle_time: float = 2.0,
+    max_polls: t.Optional[int] = None,
+    cache: t.Optional["ParseCache"] = None,
+) -> None:
+    """
+    Watch the specified directory, splitting new composite files as they are written.
+
+    The directory is polled every `poll_interval` seconds for files matching `pattern`; see
+    `batch_split_pipeline` for a description of the discovery options. A file is split once it is
+    fully written, i.e. its size & modification time are unchanged for `settle_time` seconds; see
+    `discovery.SettledFiles` for details. Files are split into the provided `output_format`,
+    optionally compressed using `compress`.
+
+    As with incremental batch processing, split files are tracked in a manifest in `scan_dir`, so
+    only new or modified files are split, including when the watch is restarted. A file that fails
+    to split is reported, its partial outputs are removed, & it is skipped until it is modified.
+
+    If `aggregate` is `True`, the consolidated anthro measurements file is incrementally updated
+    after each poll that splits new files; see `anthro_measure_aggregation_pipeline` for details.
+    Aggregation is only available for CSV output. As with split failures, an aggregation failure is
+    reported & watching continues, so the scans can be corrected while the watch is running.
+
+    If a parse `cache` is provided, composite files are only parsed if they aren't already in the
+    cache; see `cache.ParseCache` for details.
+
+    Watching continues until interrupted, or until `max_polls` polls have completed.
+    """
+    worker = _split_worker(output_format, compress=compress, cache=cache)
+    settled_files = discovery.SettledFiles(settle_time)
+    split_manifest = manifest.load_manifest(scan_dir)
+    aggregate = aggregate and output_format == OutputFormat.CSV
+
+    rprint(f"Watching '{scan_dir}' for scans matching '{pattern}', press Ctrl+C to stop.")
+    n_polls = 0
+    try:
+        while max_polls is None or n_polls < max_polls:
+            if n_polls:
+                time.sleep(poll_interval)
+            n_polls += 1
+
+            listing = discovery.FileListing(scan_dir, recurse, prune, ignore_case)
+            n_split = 0
+            for composite_file in settled_files.update(_find_files(listing, pattern, exclude)):
+                outputs = _output_paths(composite_file, output_format, compress)
+                if manifest.is_unchanged(composite_file, scan_dir, split_manifest, outputs):
+                    continue
+
+                try:
+                    worker(composite_file)
+                except (OSError, ValueError) as e:
+                    # Don't leave partially written outputs around to be picked up by aggregation
+                    for output in outputs:
+                        output.unlink(missing_ok=True)
+
+                    rprint(f"[red]Failed to split '{composite_file.name}': {e}")
+                    continue
+
+                rprint(f"Split '{composite_file.name}'")
+                n_split += 1
+                listing.add(outputs)
+                manifest.record(composite_file, scan_dir, split_manifest, outputs)
+
+            if not n_split:
+                continue
+
+            manifest.save_manifest(scan_dir, split_manifest)
+            if aggregate:
+                try:
+                    anthro_measure_aggregation_pipeline(
+                        scan_dir,
+                        location_fill=location_fill,
+                        recurse=recurse,
+                        incremental=True,
+                        listing=listing,
+                    )
+                except click.ClickException as e:
+                    rprint(f"[red]Failed to aggregate '{scan_dir}': {e.format_message()}")
+    except KeyboardInterrupt:
+        rprint("Stopped watching.")
+    finally:
+        manifest.save_manifest(scan_dir, split_manifest)
+
+
+def _dump_database_measurements(
+    connection: "sqlite3.Connection",
+    out_filepath: Path,
+    location_fill: str = "",
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> None:
+    """
+    Write the consolidated anthro measurements CSV from the scans ingested into the database.
+
+    Output matches `anthro_measure_aggregation_pipeline` for the same scans: all scans are assumed
+    to contain the same measurements in the same order, & measurement names are taken from the
+    first scan. Measurement values are streamed from the database rather than re-reading any files.
+    """
+    from src import database
+
+    row_names = database.measurement_names(connection)
+    if not row_names:
+        rprint("No measurements found in the database, skipping consolidation.")
+        return
+
+    header_prefix = ANTHRO_HEADER[0].partition(",")[0]
+    subject_ids = database.subject_ids(connection, location_fill)
+    aggregate_header = f"{header_prefix},{','.join(subject_ids)}"
+    columns = database.iter_measurement_columns(connection)
+    with profiling.stage(profiler, "write"):
+        _dump_merged_measurements(
+            out_filepath, aggregate_header, [header_prefix, *row_names], columns
+        )
+
     rprint(f"Consolidated measurements file written to: '{out_filepath}'")
+
+
+def ingest_pipeline(
+    scan_dir: Path,
+    database_path: t.Optional[Path] = None,
+    pattern: str = "*_composite.txt",
+    recurse: bool = False,
+    jobs: int = 1,
+    exclude: t.Iterable[str] = (),
+    prune: t.Iterable[str] = (),
+    ignore_case: bool = False,
+    consolidate: bool = False,
+    location_fill: str = "",
+    profiler: t.Optional[profiling.Profiler] = None,
+    cache: t.Optional["ParseCache"] = None,
+) -> None:
+    """
+    Parse all composite files in the specified directory into a local SQLite database.
+
+    The database is written to `database_path`, or `scan_dir` if not provided; see `database.SCHEMA`
+    for the tables & indexes. Files are discovered as in `batch_split_pipeline` & may optionally be
+    parsed in parallel across `jobs` worker processes. Parsed scans are inserted in batches of
+    `database.INGEST_BATCH_SIZE` scans, each batch in a single transaction.
+
+    Scans are identified by their path relative to `scan_dir` & the SHA-256 hash of their contents:
+    scans whose contents are unchanged since they were last ingested are skipped, while new or
+    modified scans are inserted, replacing any previous version of the scan. If a parse `cache` is
+    provided, new or modified scans are only parsed if they aren't already in the cache.
+
+    If `consolidate` is `True`, the consolidated anthro measurements CSV is then written to
+    `scan_dir` from the database; see `_dump_database_measurements` for details.
+
+    If a `profiler` is provided, the time spent in each stage of the ingest is recorded to it.
+    Content hashing is included in the discovery stage.
+    """
+    from src import database  # Only needed for ingest, so don't pay for it at startup
+
+    if database_path is None:
+        database_path = scan_dir / database.DATABASE_FILENAME
+
+    listing = discovery.FileListing(scan_dir, recurse, prune, ignore_case)
+    worker: t.Callable[[Path], t.Any] = partial(
+        _parse_scan if profiler is None else _profiled_parse_scan, cache=cache
+    )
+    connection = database.connect(database_path)
+    try:
+        with profiling.stage(profiler, "discovery"):
+            ingested = database.scan_hashes(connection)
+            n_found = 0
+            changed: dict[Path, tuple[str, str]] = {}  # Composite file -> path key & content hash
+            for composite_file in _find_files(listing, pattern, exclude):
+                n_found += 1
+                key = composite_file.relative_to(scan_dir).as_posix()
+                sha256 = manifest.file_hash(composite_file)
+                if ingested.get(key) != sha256:
+                    changed[composite_file] = (key, sha256)
+
+        scans = (
+            database.ScanRecord(*changed[composite_file], *parsed)
+            for composite_file, parsed in _iter_split(list(changed), jobs, worker, profiler)
+        )
+        n = 0
+        while True:
+            batch = list(itertools.islice(scans, database.INGEST_BATCH_SIZE))
+            if not batch:
+                break
+
+            with profiling.stage(profiler, "write"):
+                n += database.upsert_scans(connection, batch)
+
+        rprint(f"Ingested {n} files, skipped {n_found - n} unchanged files")
+        rprint(f"Scan database written to: '{database_path}'")
+
+        if consolidate:
+            _dump_database_measurements(
+                connection, scan_dir / "consolidated_anthro.CSV", location_fill, profiler
+            )
+    finally:
+        connection.close()
@@ -0,0 +1,222 @@
+import json
+import typing as t
+from pathlib import Path
+
+
+MANIFEST_FILENAME = ".scansplitter_manifest.json"
+MANIFEST_VERSION = 1
+
+AGGREGATE_INDEX_SUFFIX = ".index.json"
+AGGREGATE_INDEX_VERSION = 1
+
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+class ManifestEntry(t.TypedDict):  # noqa: D101
+    size: int
+    mtime_ns: int
+    sha256: str
+    outputs: list[str]
+
+
+Manifest = dict[str, ManifestEntry]
+
+
+class FileStat(t.TypedDict):  # noqa: D101
+    size: int
+    mtime_ns: int
+
+
+class AggregateIndex(t.TypedDict):  # noqa: D101
+    version: int
+    location_fill: str
+    row_names: list[str]
+    consolidated: FileStat
+    columns: dict[str, FileStat]
+
+
+def file_hash(filepath: Path) -> str:
+    """Calculate the SHA-256 hex digest of the provided file's contents."""
+    import hashlib  # Only needed for incremental runs, so don't pay for it at startup
+
+    hasher = hashlib.sha256()
+    with filepath.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def _manifest_key(filepath: Path, manifest_dir: Path) -> str:
+    """Build the manifest key for the provided file, its POSIX path relative to the manifest."""
+    return filepath.relative_to(manifest_dir).as_posix()
+
+
+def file_stat(filepath: Path) -> FileStat:
+    """Pull the size & modification time of the provided file."""
+    stat = filepath.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_manifest(manifest_dir: Path) -> Manifest:
+    """
+    Load the split manifest from the provided directory.
+
+    If no manifest is present, or if it is unreadable or from a different manifest version, an
+    empty manifest is returned so all files are considered to be new.
+    """
+    manifest_filepath = manifest_dir / MANIFEST_FILENAME
+    try:
+        manifest_src = json.loads(manifest_filepath.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    if manifest_src.get("version") != MANIFEST_VERSION:
+        return {}
+
+    files: Manifest = manifest_src["files"]
+    return files
+
+
+def save_manifest(manifest_dir: Path, split_manifest: Manifest) -> None:
+    """
+    Write the split manifest to the provided directory.
+
+    NOTE: Any existing manifest will be overwritten
+    """
+    manifest_filepath = manifest_dir / MANIFEST_FILENAME
+    manifest_filepath.write_text(
+        json.dumps({"version": MANIFEST_VERSION, "files": split_manifest}, indent=2)
+    )
+
+
+def is_unchanged(
+    in_file: Path,
+    manifest_dir: Path,
+    split_manifest: Manifest,
+    outputs: t.Optional[t.Iterable[Path]] = None,
+) -> bool:
+    """
+    Check whether the provided input file is unchanged since it was last recorded in the manifest.
+
+    If `outputs` are provided, they must match the outputs recorded in the manifest, e.g. so a
+    change in output format is not considered to be unchanged.
+
+    A file is considered unchanged if all of its recorded outputs are still present and either:
+        * Its size & modification time match the manifest, or
+        * Its size & content hash match the manifest
+
+    The content hash is only calculated if the file's modification time has changed; if the
+    contents are found to be unchanged then the manifest's modification time is refreshed so the
+    file does not need to be hashed on the next run.
+    """
+    entry = split_manifest.get(_manifest_key(in_file, manifest_dir))
+    if entry is None:
+        return False
+
+    if outputs is not None:
+        if entry["outputs"] != [_manifest_key(output, manifest_dir) for output in outputs]:
+            return False
+
+    if not all((manifest_dir / output).exists() for output in entry["outputs"]):
+        return False
+
+    stat = in_file.stat()
+    if stat.st_size != entry["size"]:
+        return False
+
+    if stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+
+    if file_hash(in_file) == entry["sha256"]:
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    return False
+
+
+def record(
+    in_file: Path, manifest_dir: Path, split_manifest: Manifest, outputs: t.Iterable[Path]
+) -> None:
+    """Record the provided input file & the outputs it produced into the split manifest."""
+    split_manifest[_manifest_key(in_file, manifest_dir)] = {
+        **file_stat(in_file),
+        "sha256": file_hash(in_file),
+        "outputs": [_manifest_key(output, manifest_dir) for output in outputs],
+    }
+
+
+def _aggregate_index_path(consolidated_filepath: Path) -> Path:
+    """Build the sidecar index filepath for the provided consolidated measurements file."""
+    return consolidated_filepath.with_name(f"{consolidated_filepath.name}{AGGREGATE_INDEX_SUFFIX}")
+
+
+def load_aggregate_index(consolidated_filepath: Path) -> t.Optional[AggregateIndex]:
+    """
+    Load the sidecar index for the provided consolidated measurements file.
+
+    If no index is present, if it is unreadable or from a different index version, or if the
+    consolidated file has been modified since the index was written, `None` is returned.
+    """
+    try:
+        aggregate_index: AggregateIndex = json.loads(
+            _aggregate_index_path(consolidated_filepath).read_text()
+        )
+        consolidated_stat = file_stat(consolidated_filepath)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if aggregate_index.get("version") != AGGREGATE_INDEX_VERSION:
+        return None
+
+    if aggregate_index["consolidated"] != consolidated_stat:
+        return None
+
+    return aggregate_index
+
+
+def save_aggregate_index(
+    consolidated_filepath: Path,
+    anthro_files: t.Iterable[Path],
+    location_fill: str,
+    row_names: list[str],
+    stats: t.Optional[t.Mapping[Path, FileStat]] = None,
+) -> None:
+    """
+    Write the sidecar index for the provided consolidated measurements file.
+
+    The index records the anthro files aggregated into the consolidated file, keyed by their POSIX
+    path relative to the consolidated file & in column order, along with their size & modification
+    time so modified files can be identified. If the anthro files have already been stat-ed, their
+    `stats` may be provided so they are not stat-ed again.
+
+    NOTE: Any existing index will be overwritten
+    """
+    manifest_dir = consolidated_filepath.parent
+    aggregate_index: AggregateIndex = {
+        "version": AGGREGATE_INDEX_VERSION,
+        "location_fill": location_fill,
+        "row_names": row_names,
+        "consolidated": file_stat(consolidated_filepath),
+        "columns": {
+            _manifest_key(file, manifest_dir): stats[file] if stats is not None else file_stat(file)
+            for file in anthro_files
+        },
+    }
+    _aggregate_index_path(consolidated_filepath).write_text(json.dumps(aggregate_index, indent=2))
+
+
+def is_aggregated(
+    anthro_file: Path,
+    consolidated_filepath: Path,
+    aggregate_index: AggregateIndex,
+    stat: t.Optional[FileStat] = None,
+) -> bool:
+    """
+    Check whether the provided anthro file is unchanged since it was last aggregated.
+
+    If the anthro file has already been stat-ed, its `stat` may be provided so it is not stat-ed
+    again.
+    """
+    key = _manifest_key(anthro_file, consolidated_filepath.parent)
+    return aggregate_index["columns"].get(key) == (stat or file_stat(anthro_file))
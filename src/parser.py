@@ -1,4 +1,7 @@
+import io
+import mmap
 import re
+import typing as t
 
 import click
 
@@ -12,6 +15,25 @@ SUBJ_RE = r"^([a-zA-Z]*)(\d+)"
 # Match repeat scans, denoted by either a hyphen or parentheses following the subject ID
 REPEAT_RE = r"-\d+$|\s\(\d+\)$"
 
+# Match the scan timestamp following the subject ID, e.g. `2021-04-20_18-00-00`
+TIMESTAMP_RE = r"\s(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})"
+
+# Composite file sections, in order of appearance; core & custom measurements are both considered
+# anthro measurements
+ANTHRO = "anthro"
+LANDMARK = "landmark"
+COMPOSITE_SECTIONS = (ANTHRO, ANTHRO, LANDMARK)
+
+# Bump whenever the parsed output of a composite file changes, so stale cached parses are ignored
+PARSER_VERSION = 1
+
+DIGITS = "0123456789"
+FLOAT_LEAD_CHARS = frozenset(f"{DIGITS}+-.")
+
+# Byte equivalents of the above, for parsing composite files without decoding them
+DIGIT_BYTES = DIGITS.encode()
+FLOAT_LEAD_BYTES = frozenset(b"0123456789+-.")
+
 
 def _clean_line(line: str) -> str:
     """
@@ -61,54 +83,225 @@ def _line2csv(line: str) -> str:
     return new_line
 
 
-def split_composite_file(composite_src: list[str]) -> tuple[list[str], list[str]]:
+def _float_prefix_len(token: str) -> int:
     """
-    Split composite data file into its components.
+    Return the length of the float leading off the provided token, or `0` if there isn't one.
+
+    This is a regex-free equivalent of matching `FLOAT_PATTERN` (sans its leading whitespace) at the
+    start of the token.
+    """
+    body = token[1:] if token[0] in "+-" else token
+    int_part, dot, frac = body.partition(".")
+    if not dot or (int_part and not int_part.isdecimal()):
+        return 0
+
+    # Most of the time the entire token is a float, so we can short-circuit the digit counting
+    if frac.isdecimal():
+        return len(token)
+
+    # Need at least one digit following the decimal point
+    n_frac_digits = len(frac) - len(frac.lstrip(DIGITS))
+    if not n_frac_digits:
+        return 0
+
+    return len(token) - len(frac) + n_frac_digits
+
+
+def _tokenize_line(line: str) -> t.Optional[str]:
+    """
+    Convert the provided raw scan data row into a CSV row, or `None` if the row is a comment.
+
+    This fuses `_clean_line` & `_line2csv` into a single scan of the row's tokens, without the use
+    of regular expressions. Output is identical to `_line2csv(_clean_line(line))` for rows whose
+    only whitespace characters are spaces & tabs.
+    """
+    # Comments are checked for after colon removal to match the line cleaner, since it does not
+    # short-circuit on rows that only begin with an asterix after their colons are removed
+    line = line.removeprefix("1").removeprefix("0").strip().replace(":", "")
+    if line.startswith("*"):
+        return None
+
+    # Walk the row's tokens until we find the first one that leads off with a float, this marks the
+    # boundary between the measurement name & the measurement values
+    # A token at the very start of the row can't be a value since it has no preceeding whitespace
+    for idx, token in enumerate(line.split()):
+        # Check the leading character first to cheaply skip over the words of the measurement name
+        if token[0] not in FLOAT_LEAD_CHARS or not (n_float := _float_prefix_len(token)):
+            continue
+
+        # Splitting off the preceeding tokens leaves the remainder of the row, starting at our token
+        remainder = line.split(maxsplit=idx)[idx] if idx else line.lstrip()
+        start = len(line) - len(remainder)
+        if not start:
+            continue
+
+        # Only the whitespace character immediately preceeding the value is discarded from the
+        # measurement name
+        measurement_name = line[: start - 1].replace("\t", " ")
+        measurements = remainder[n_float:].split()
+        return ",".join((measurement_name, token[:n_float], *measurements))
+
+    # No values found, so the entire row is considered to be the measurement name
+    measurement_name = line.replace("\t", " ")
+    return f"{measurement_name},"
+
+
+def _float_prefix_len_bytes(token: bytes) -> int:
+    """Return the length of the float leading off the provided token, see `_float_prefix_len`."""
+    body = token[1:] if token[:1] in (b"+", b"-") else token
+    int_part, dot, frac = body.partition(b".")
+    if not dot or (int_part and not int_part.isdigit()):
+        return 0
+
+    if frac.isdigit():
+        return len(token)
+
+    n_frac_digits = len(frac) - len(frac.lstrip(DIGIT_BYTES))
+    if not n_frac_digits:
+        return 0
+
+    return len(token) - len(frac) + n_frac_digits
+
+
+def _tokenize_line_bytes(line: bytes) -> t.Optional[bytes]:
+    """
+    Convert the provided raw scan data row into a CSV row, or `None` if the row is a comment.
+
+    This is the `bytes` equivalent of `_tokenize_line`, with identical output for ASCII-compatible
+    rows whose only whitespace characters are spaces & tabs; see `_tokenize_line` for details.
+    """
+    line = line.removeprefix(b"1").removeprefix(b"0").strip().replace(b":", b"")
+    if line.startswith(b"*"):
+        return None
+
+    for idx, token in enumerate(line.split()):
+        if token[0] not in FLOAT_LEAD_BYTES or not (n_float := _float_prefix_len_bytes(token)):
+            continue
+
+        remainder = line.split(maxsplit=idx)[idx] if idx else line.lstrip()
+        start = len(line) - len(remainder)
+        if not start:
+            continue
+
+        measurement_name = line[: start - 1].replace(b"\t", b" ")
+        measurements = remainder[n_float:].split()
+        return b",".join((measurement_name, token[:n_float], *measurements))
+
+    measurement_name = line.replace(b"\t", b" ")
+    return measurement_name + b","
+
+
+def _iter_chunk_lines(
+    composite_src: t.Iterable[t.AnyStr], header_prefix: t.AnyStr
+) -> t.Iterator[tuple[str, t.AnyStr]]:
+    """
+    Pair each non-header line of the provided composite data file lines with its section.
+
+    See `iter_composite_file` for a description of the sections & the validation of their count.
+    """
+    n_chunks = 0
+    in_header = True  # File is assumed to start with a header
+    for line in composite_src:
+        if line.startswith(header_prefix):
+            in_header = True
+            continue
+
+        if in_header:
+            in_header = False
+            n_chunks += 1
+            if n_chunks > len(COMPOSITE_SECTIONS):
+                raise ValueError(
+                    f"Expected {len(COMPOSITE_SECTIONS)} data chunks, found at least {n_chunks}"
+                )
+
+            section = COMPOSITE_SECTIONS[n_chunks - 1]
+
+        yield section, line
+
+    if n_chunks != len(COMPOSITE_SECTIONS):
+        raise ValueError(f"Expected {len(COMPOSITE_SECTIONS)} data chunks, found {n_chunks}")
+
+
+def iter_composite_file(composite_src: t.Iterable[str]) -> t.Iterator[tuple[str, str]]:
+    """
+    Lazily split composite data file lines into `(section, csv_row)` pairs.
 
     A composite data file is assumed to contain 3 chunks of data:
         1. Core measurements
         2. Custom measurements
         3. Landmark coordinates
 
-    Core and custom measurements are joined into a single list of anthro measurements.
+    Rows from the core and custom measurement chunks are both yielded as `ANTHRO` rows, rows from
+    the landmark chunk are yielded as `LANDMARK` rows.
 
     Each section is assumed to contain one or more header lines, which start with `#`. All header
     lines are discarded.
 
     Data rows containing one or more `*` are assumed to be comments and are discarded.
+
+    Lines are consumed one at a time, so an open file handle may be provided directly; any trailing
+    newline is removed by the line tokenizer.
+
+    A `ValueError` is raised if the source does not contain exactly 3 chunks of data. Since rows
+    are yielded as they are parsed, this may occur after some rows have already been yielded.
     """
-    out_chunks = []
-    in_header = True  # File is assumed to start with a header
-    for line in composite_src:
-        if in_header:
-            if line.startswith("#"):
-                continue
-            else:
-                in_header = False
-                chunk: list[str] = []
-
-        if line.startswith("#"):
-            out_chunks.append(chunk)
-            in_header = True
+    for section, line in _iter_chunk_lines(composite_src, "#"):
+        row = _tokenize_line(line)
+        if row is None:
+            # Discard comments
             continue
 
-        # Clean the line before checking for a comment (starts with *) since they'll still have a
-        # validitiy prefix
-        # Comment lines short-circuit the line cleaner so they'll start with * when returned
-        line = _clean_line(line)
-        if line.startswith("*"):
-            # Discard comments
+        yield section, row
+
+
+def _iter_byte_lines(data: t.Union[bytes, mmap.mmap]) -> t.Iterator[bytes]:
+    """
+    Lazily split the provided raw file contents into lines, including their trailing newline.
+
+    Lines are read one at a time using `readline`, so only one line is copied out of a memory-mapped
+    file at a time.
+    """
+    if isinstance(data, mmap.mmap):
+        data.seek(0)
+        return iter(data.readline, b"")
+
+    return iter(io.BytesIO(data))
+
+
+def iter_composite_bytes(data: t.Union[bytes, mmap.mmap]) -> t.Iterator[tuple[str, bytes]]:
+    """
+    Lazily split raw composite data file contents into `(section, csv_row)` pairs.
+
+    This is the `bytes` equivalent of `iter_composite_file`, intended for use with a memory-mapped
+    composite file: the contents are never decoded, and only one line at a time is copied out of
+    `data`, so large multi-scan exports are parsed without materializing their text. Any trailing
+    newline is removed by the line tokenizer.
+
+    Output is identical to `iter_composite_file` once encoded, provided the file uses an
+    ASCII-compatible encoding, its rows only contain spaces & tabs as whitespace, and its lines are
+    terminated by either LF or CRLF newlines.
+    """
+    for section, line in _iter_chunk_lines(_iter_byte_lines(data), b"#"):
+        row = _tokenize_line_bytes(line)
+        if row is None:
             continue
 
-        chunk.append(_line2csv(line))
-    else:
-        # Append the last chunk when we finish reading the file
-        out_chunks.append(chunk)
+        yield section, row
+
+
+def split_composite_file(composite_src: t.Iterable[str]) -> tuple[list[str], list[str]]:
+    """
+    Split composite data file into its components.
+
+    Core and custom measurements are joined into a single list of anthro measurements.
 
-    core, custom, landmark = out_chunks
-    anthro = [*core, *custom]
+    See `iter_composite_file` for a description of the composite file parsing.
+    """
+    out_chunks: dict[str, list[str]] = {ANTHRO: [], LANDMARK: []}
+    for section, row in iter_composite_file(composite_src):
+        out_chunks[section].append(row)
 
-    return anthro, landmark
+    return out_chunks[ANTHRO], out_chunks[LANDMARK]
 
 
 def extract_subj_id(filename: str, default_location: str = "") -> tuple[str, str]:
@@ -147,6 +340,36 @@ def extract_subj_id(filename: str, default_location: str = "") -> tuple[str, str
     return subj_id, location
 
 
+def split_repeat(subj_id: str) -> tuple[str, str]:
+    """
+    Split the repeat scan number, if any, from the provided subject ID.
+
+    e.g. `102-2` & `102 (2)` both become `("102", "2")`, while `102` becomes `("102", "")`.
+
+    Subject IDs are assumed to be of the form returned by `extract_subj_id`.
+    """
+    repeat_match = re.search(REPEAT_RE, subj_id)
+    if not repeat_match:
+        return subj_id, ""
+
+    return subj_id[: repeat_match.start()], repeat_match.group(0).strip(" -()")
+
+
+def extract_timestamp(filename: str) -> str:
+    """
+    Extract the scan timestamp, if any, from the given filename.
+
+    e.g. `102-2 2021-04-20_18-00-00_composite` becomes `2021-04-20_18-00-00`, while an empty string
+    is returned if the filename doesn't contain a timestamp. Timestamps are zero-padded, so they
+    sort chronologically as strings.
+    """
+    timestamp_match = re.search(TIMESTAMP_RE, filename)
+    if not timestamp_match:
+        return ""
+
+    return timestamp_match.group(1)
+
+
 def extract_measurement_names(data_file_src: str) -> list[str]:
     """Extract the row name (first column) from the provided plaintext data file."""
     data_lines = data_file_src.splitlines()
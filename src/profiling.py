@@ -0,0 +1,165 @@
+import json
+import time
+import typing as t
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+if t.TYPE_CHECKING:
+    from rich.table import Table
+
+
+STAGES = ("discovery", "read", "parse", "write", "console")
+
+# Shared no-op context for when profiling is disabled, so we don't pay for building a new context
+# manager for every stage
+_NULL_STAGE = nullcontext()
+
+
+class FileProfile(t.TypedDict):  # noqa: D101
+    file: str
+    stages: dict[str, float]
+    bytes_read: int
+    bytes_written: int
+    lines_parsed: int
+
+
+def new_file_profile(filepath: Path) -> FileProfile:
+    """Build an empty profile for the provided file."""
+    return {
+        "file": str(filepath),
+        "stages": dict.fromkeys(STAGES, 0.0),
+        "bytes_read": 0,
+        "bytes_written": 0,
+        "lines_parsed": 0,
+    }
+
+
+@contextmanager
+def timed(stages: dict[str, float], name: str) -> t.Iterator[None]:
+    """Add the wall time spent inside the context to the provided stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] += time.perf_counter() - start
+
+
+class Profiler:
+    """
+    Accumulate per-stage & per-file wall time for a pipeline run.
+
+    Stage timing is exclusive: if a stage is entered while another stage is active (e.g. anthro
+    files being read lazily while the consolidated file is being written), the outer stage is paused
+    until the inner stage is exited.
+
+    Per-file profiles may be generated in worker processes & merged using `add_file`, so with
+    multiple workers the sum of the stage times may exceed the wall time of the run.
+    """
+
+    def __init__(self) -> None:
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.files: list[FileProfile] = []
+        self._tracked: dict[str, FileProfile] = {}
+        self._active: list[tuple[str, t.Optional[FileProfile]]] = []
+        self._last = time.perf_counter()
+        self._start = self._last
+
+    def _charge(self) -> None:
+        """Charge the time elapsed since the last stage transition to the active stage, if any."""
+        now = time.perf_counter()
+        if self._active:
+            name, file_profile = self._active[-1]
+            self.stages[name] += now - self._last
+            if file_profile is not None:
+                file_profile["stages"][name] += now - self._last
+
+        self._last = now
+
+    @contextmanager
+    def stage(self, name: str, file_profile: t.Optional[FileProfile] = None) -> t.Iterator[None]:
+        """Time the wall time spent inside the context, optionally also charging it to a file."""
+        self._charge()
+        self._active.append((name, file_profile))
+        try:
+            yield
+        finally:
+            self._charge()
+            self._active.pop()
+
+    def track_file(self, filepath: Path) -> FileProfile:
+        """
+        Start tracking a profile for a file processed in this process.
+
+        If the file is already being tracked, its existing profile is returned.
+        """
+        file_profile = self._tracked.get(str(filepath))
+        if file_profile is None:
+            file_profile = new_file_profile(filepath)
+            self._tracked[file_profile["file"]] = file_profile
+            self.files.append(file_profile)
+
+        return file_profile
+
+    def add_file(self, file_profile: FileProfile) -> None:
+        """Merge a file profile generated elsewhere, e.g. by a worker process."""
+        self.files.append(file_profile)
+        for name, elapsed in file_profile["stages"].items():
+            self.stages[name] += elapsed
+
+    def report(self) -> dict[str, t.Any]:
+        """Build a JSON-serializable report of the profiled run."""
+        return {
+            "wall_time_s": time.perf_counter() - self._start,
+            "stages_s": self.stages,
+            "n_files": len(self.files),
+            "bytes_read": sum(file_profile["bytes_read"] for file_profile in self.files),
+            "bytes_written": sum(file_profile["bytes_written"] for file_profile in self.files),
+            "lines_parsed": sum(file_profile["lines_parsed"] for file_profile in self.files),
+            "files": self.files,
+        }
+
+    def summary_table(self) -> "Table":
+        """Build a summary table of the profiled run, suitable for printing with `rich`."""
+        from rich.table import Table
+
+        report = self.report()
+        total_stage_time = sum(self.stages.values()) or 1.0
+
+        table = Table(title=f"Profile Summary ({report['wall_time_s']:.3f} s wall time)")
+        table.add_column("Stage")
+        table.add_column("Time (s)", justify="right")
+        table.add_column("Share", justify="right")
+        for name, elapsed in self.stages.items():
+            table.add_row(name, f"{elapsed:.3f}", f"{elapsed / total_stage_time:.1%}")
+
+        table.caption = (
+            f"{report['n_files']} files, {report['bytes_read']:,} bytes read, "
+            f"{report['bytes_written']:,} bytes written, {report['lines_parsed']:,} lines parsed"
+        )
+        return table
+
+    def dump(self, filepath: Path) -> None:
+        """
+        Write the JSON report of the profiled run to the provided filepath.
+
+        NOTE: Any existing file will be overwritten
+        """
+        filepath.write_text(json.dumps(self.report(), indent=2))
+
+
+def stage(
+    profiler: t.Optional[Profiler], name: str, file_profile: t.Optional[FileProfile] = None
+) -> t.ContextManager[None]:
+    """Time the provided stage if profiling is enabled, otherwise this is a no-op."""
+    if profiler is None:
+        return _NULL_STAGE
+
+    return profiler.stage(name, file_profile)
+
+
+def track_file(profiler: t.Optional[Profiler], filepath: Path) -> t.Optional[FileProfile]:
+    """Track a profile for the provided file if profiling is enabled, otherwise return `None`."""
+    if profiler is None:
+        return None
+
+    return profiler.track_file(filepath)
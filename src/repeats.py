@@ -0,0 +1,86 @@
+import typing as t
+from enum import Enum
+from pathlib import Path
+
+import click
+from src import parser
+
+
+class RepeatPolicy(str, Enum):
+    """
+    Repeat scan selection policies.
+
+    `ALL` processes every scan, while `LATEST` & `FIRST` only process the latest or first scan of
+    each subject at each location; see `build_repeat_index` for how scans are ordered.
+    """
+
+    ALL = "all"
+    LATEST = "latest"
+    FIRST = "first"
+
+
+class RepeatScan(t.NamedTuple):
+    """A scan file, along with the filename fields used to order the repeat scans of a subject."""
+
+    timestamp: str
+    repeat: int
+    filepath: Path
+
+
+def build_repeat_index(
+    files: t.Iterable[Path], location_fill: str = ""
+) -> dict[tuple[str, str], list[RepeatScan]]:
+    """
+    Index the provided scan files by subject & location, from first to latest scan.
+
+    Subject IDs, locations, repeat numbers & timestamps are extracted from the file names, so no
+    files are read; see `parser.extract_subj_id` for the supported file names. If a file name has no
+    location, `location_fill` is used. Repeat scans are matched by subject & location alone, so
+    repeats in different child directories are still matched.
+
+    Scans are ordered by their timestamp, then by their repeat number, where the original scan of a
+    subject is considered repeat 1, then by their path. Files whose names don't contain a subject ID
+    aren't indexed.
+    """
+    repeat_index: dict[tuple[str, str], list[RepeatScan]] = {}
+    for file in files:
+        try:
+            subj_id, location = parser.extract_subj_id(file.name, location_fill)
+        except click.ClickException:
+            continue
+
+        # The original scan of a subject has no repeat number
+        subject, repeat = parser.split_repeat(subj_id)
+        scan = RepeatScan(parser.extract_timestamp(file.name), int(repeat or 1), file)
+        repeat_index.setdefault((subject, location), []).append(scan)
+
+    for scans in repeat_index.values():
+        scans.sort()
+
+    return repeat_index
+
+
+def select_repeats(
+    files: t.Iterable[Path], policy: RepeatPolicy, location_fill: str = ""
+) -> list[Path]:
+    """
+    Select the scan files to process under the provided repeat policy, in their original order.
+
+    For `RepeatPolicy.LATEST` & `RepeatPolicy.FIRST`, only the latest or first scan of each subject
+    & location is kept; see `build_repeat_index` for how scans are ordered. Files whose names don't
+    contain a subject ID are always kept.
+    """
+    files = list(files)
+    if policy == RepeatPolicy.ALL:
+        return files
+
+    repeat_index = build_repeat_index(files, location_fill)
+    pick = -1 if policy == RepeatPolicy.LATEST else 0
+    superseded = {
+        scan.filepath
+        for scans in repeat_index.values()
+        for scan in scans
+        if scan != scans[pick]
+    }
+
+    return [file for file in files if file not in superseded]
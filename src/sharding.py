@@ -0,0 +1,103 @@
+import re
+import typing as t
+from pathlib import Path, PurePosixPath
+
+import click
+
+
+# Shards are specified as `K/N`, numbered from 1
+SHARD_RE = r"^(\d+)/(\d+)$"
+
+# Match the partial output of a shard, e.g. `consolidated_anthro.shard-1-of-4.CSV`
+PARTIAL_RE = r"\.shard-(\d+)-of-(\d+)$"
+
+
+class Shard(t.NamedTuple):
+    """Shard `number` of `total` disjoint subsets of a cohort, numbered from 1."""
+
+    number: int
+    total: int
+
+    def __str__(self) -> str:
+        return f"{self.number}/{self.total}"
+
+
+def parse_shard(spec: str) -> Shard:
+    """
+    Parse the provided `K/N` shard specification, e.g. `2/4` for the second of 4 shards.
+
+    A `click.ClickException` is raised if the specification is malformed or out of range.
+    """
+    shard_match = re.match(SHARD_RE, spec.strip())
+    if not shard_match:
+        raise click.ClickException(f"Could not parse shard '{spec}', expected the form 'K/N'")
+
+    shard = Shard(*map(int, shard_match.groups()))
+    if not 1 <= shard.number <= shard.total:
+        raise click.ClickException(f"Shard '{spec}' is out of range, expected 1 <= K <= N")
+
+    return shard
+
+
+def shard_key(filepath: Path, root: Path) -> str:
+    """
+    Build the key used to assign the provided file to a shard.
+
+    The key is the POSIX path of the file relative to `root`, with everything from the first `.`
+    of its name removed. This drops any extensions & compression suffix, so a composite file &
+    the files split from it share a key, e.g. `child/001_composite.txt.gz` &
+    `child/001_composite.anthro.csv` both become `child/001_composite`.
+    """
+    relative = PurePosixPath(filepath.relative_to(root).as_posix())
+    return (relative.parent / relative.name.partition(".")[0]).as_posix()
+
+
+def in_shard(filepath: Path, root: Path, shard: Shard) -> bool:
+    """
+    Check whether the provided file is assigned to the provided shard.
+
+    Files are assigned by the SHA-256 hash of their `shard_key`, so assignment is stable across
+    runs, machines & platforms, & each file is assigned to exactly one of the `N` shards.
+    """
+    import hashlib  # Only needed for sharded runs, so don't pay for it at startup
+
+    digest = hashlib.sha256(shard_key(filepath, root).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard.total == shard.number - 1
+
+
+def filter_shard(
+    files: t.Iterable[Path], root: Path, shard: t.Optional[Shard]
+) -> t.Iterator[Path]:
+    """Lazily filter the provided files down to those assigned to `shard`, if one is provided."""
+    if shard is None:
+        yield from files
+        return
+
+    for file in files:
+        if in_shard(file, root, shard):
+            yield file
+
+
+def partial_filepath(filepath: Path, shard: Shard) -> Path:
+    """
+    Build the filepath of the partial output written by a shard in place of `filepath`.
+
+    e.g. `consolidated_anthro.CSV` becomes `consolidated_anthro.shard-2-of-4.CSV` for shard `2/4`.
+    """
+    shard_suffix = f".shard-{shard.number}-of-{shard.total}"
+    return filepath.with_name(f"{filepath.stem}{shard_suffix}{filepath.suffix}")
+
+
+def find_partials(filepath: Path) -> dict[Shard, Path]:
+    """
+    Find the partial outputs written by shards in place of `filepath`, keyed by their shard.
+
+    See `partial_filepath` for how partial outputs are named.
+    """
+    partials = {}
+    for partial in filepath.parent.glob(f"{filepath.stem}.shard-*{filepath.suffix}"):
+        partial_match = re.search(PARTIAL_RE, partial.stem)
+        if partial_match and partial.suffix == filepath.suffix:
+            partials[Shard(*map(int, partial_match.groups()))] = partial
+
+    return partials
@@ -0,0 +1,227 @@
+import os
+import typing as t
+from contextlib import nullcontext
+from pathlib import Path
+
+import click
+from src import profiling
+
+if t.TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor
+
+
+DEFAULT_READ_CONCURRENCY = 4
+DEFAULT_WRITE_CONCURRENCY = 4
+
+# Passed down a stage's queue once per worker when there is no more work for the stage
+_DONE = object()
+
+P = t.TypeVar("P")
+
+
+class StageLimits(t.NamedTuple):
+    """
+    Maximum number of files being processed at once by each stage of a staged pipeline.
+
+    Reads & writes are made from threads, so `read` & `write` bound the number of concurrent
+    requests made to storage. Files are parsed in a single thread if `parse` is `1`, otherwise
+    across `parse` worker processes; if `parse` is less than 1, one worker is used per CPU.
+    """
+
+    read: int = DEFAULT_READ_CONCURRENCY
+    parse: int = 1
+    write: int = DEFAULT_WRITE_CONCURRENCY
+
+
+def _resolve_limits(limits: StageLimits) -> StageLimits:
+    """Resolve the number of parse workers, raising a `click.ClickException` for invalid limits."""
+    if limits.read < 1 or limits.write < 1:
+        raise click.ClickException("Read & write concurrency must be at least 1.")
+
+    if limits.parse < 1:
+        return limits._replace(parse=os.cpu_count() or 1)
+
+    return limits
+
+
+def _timed(
+    file_profile: t.Optional[profiling.FileProfile], name: str
+) -> t.ContextManager[None]:
+    """Time the provided stage of the file, if it is being profiled."""
+    if file_profile is None:
+        return nullcontext()
+
+    return profiling.timed(file_profile["stages"], name)
+
+
+async def _run_worker(
+    in_queue: "asyncio.Queue[t.Any]",
+    out_queue: t.Optional["asyncio.Queue[t.Any]"],
+    process: t.Callable[[t.Any], t.Awaitable[t.Any]],
+) -> None:
+    """Process items from `in_queue` until it is exhausted, passing each result to `out_queue`."""
+    while True:
+        item = await in_queue.get()
+        if item is _DONE:
+            return
+
+        result = await process(item)
+        if out_queue is not None:
+            # Blocks while the next stage is saturated, which in turn stalls this stage
+            await out_queue.put(result)
+
+
+async def _run_stage(
+    n_workers: int,
+    in_queue: "asyncio.Queue[t.Any]",
+    out_queue: t.Optional["asyncio.Queue[t.Any]"],
+    n_next_workers: int,
+    process: t.Callable[[t.Any], t.Awaitable[t.Any]],
+) -> None:
+    """Run `n_workers` workers for a stage, then signal the next stage that the queue is done."""
+    import asyncio
+
+    await asyncio.gather(*(_run_worker(in_queue, out_queue, process) for _ in range(n_workers)))
+    if out_queue is not None:
+        for _ in range(n_next_workers):
+            await out_queue.put(_DONE)
+
+
+async def _feed(files: t.Iterable[Path], queue: "asyncio.Queue[t.Any]", n_workers: int) -> None:
+    """Queue up the provided files for the read stage."""
+    for file in files:
+        await queue.put(file)
+
+    for _ in range(n_workers):
+        await queue.put(_DONE)
+
+
+async def _run_stages(
+    files: t.Iterable[Path],
+    parse: t.Callable[[Path, bytes], P],
+    write: t.Callable[[Path, P], tuple[Path, ...]],
+    on_done: t.Callable[[Path, tuple[Path, ...]], None],
+    limits: StageLimits,
+    executors: tuple["Executor", "Executor", "Executor"],
+    profiler: t.Optional[profiling.Profiler],
+) -> int:
+    """Run the read, parse & write stages concurrently, see `run_staged` for details."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    read_executor, parse_executor, write_executor = executors
+
+    # Each queue holds at most as many files as its stage can process at once, so a stalled stage
+    # holds up the stages before it rather than letting files pile up in memory
+    read_queue: "asyncio.Queue[t.Any]" = asyncio.Queue(maxsize=limits.read)
+    parse_queue: "asyncio.Queue[t.Any]" = asyncio.Queue(maxsize=limits.parse)
+    write_queue: "asyncio.Queue[t.Any]" = asyncio.Queue(maxsize=limits.write)
+    n_done = 0
+
+    async def _read(file: Path) -> tuple[Path, bytes, t.Optional[profiling.FileProfile]]:
+        file_profile = None if profiler is None else profiling.new_file_profile(file)
+        with _timed(file_profile, "read"):
+            data = await loop.run_in_executor(read_executor, file.read_bytes)
+
+        if file_profile is not None:
+            file_profile["bytes_read"] = len(data)
+
+        return file, data, file_profile
+
+    async def _parse(
+        item: tuple[Path, bytes, t.Optional[profiling.FileProfile]]
+    ) -> tuple[Path, P, t.Optional[profiling.FileProfile]]:
+        file, data, file_profile = item
+        with _timed(file_profile, "parse"):
+            parsed = await loop.run_in_executor(parse_executor, parse, file, data)
+
+        return file, parsed, file_profile
+
+    async def _write(item: tuple[Path, P, t.Optional[profiling.FileProfile]]) -> None:
+        nonlocal n_done
+        file, parsed, file_profile = item
+        with _timed(file_profile, "write"):
+            outputs = await loop.run_in_executor(write_executor, write, file, parsed)
+
+        if profiler is not None and file_profile is not None:
+            file_profile["bytes_written"] = sum(output.stat().st_size for output in outputs)
+            profiler.add_file(file_profile)
+
+        n_done += 1
+        on_done(file, outputs)
+
+    tasks = [
+        asyncio.create_task(_feed(files, read_queue, limits.read)),
+        asyncio.create_task(_run_stage(limits.read, read_queue, parse_queue, limits.parse, _read)),
+        asyncio.create_task(
+            _run_stage(limits.parse, parse_queue, write_queue, limits.write, _parse)
+        ),
+        asyncio.create_task(_run_stage(limits.write, write_queue, None, 0, _write)),
+    ]
+
+    # If any stage fails, the stages around it would be left waiting on their queues forever
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    for task in pending:
+        task.cancel()
+
+    for task in done:
+        task.result()  # Re-raise any stage exception
+
+    return n_done
+
+
+def run_staged(
+    files: t.Iterable[Path],
+    parse: t.Callable[[Path, bytes], P],
+    write: t.Callable[[Path, P], tuple[Path, ...]],
+    on_done: t.Callable[[Path, tuple[Path, ...]], None],
+    limits: StageLimits,
+    profiler: t.Optional[profiling.Profiler] = None,
+) -> int:
+    """
+    Process the provided files in overlapping read, parse & write stages.
+
+    Each file is read in full as bytes, parsed by `parse` from its path & contents, and the parsed
+    result is written by `write`, which returns the filepaths it wrote. Stages run concurrently on
+    an `asyncio` event loop, so while one file is being parsed, upcoming files are already being
+    read & previous files are still being written. This keeps high-latency storage busy, e.g. a
+    network share, where reading & writing files one after another would leave it idle.
+
+    The number of files being processed at once by each stage is bounded by `limits`, see
+    `StageLimits`, & the queues between stages are bounded to match, so a slow stage applies
+    backpressure to the stages before it rather than accumulating files in memory. If parsing is
+    done in worker processes, `parse` must be picklable.
+
+    Once a file has been written, `on_done` is called with the file & its written outputs from the
+    event loop's thread. Files complete in no particular order. The number of files processed is
+    returned.
+
+    If a `profiler` is provided, the wall time each file spends in each stage is recorded to it;
+    since stages overlap, the sum of the stage times may exceed the wall time of the run.
+
+    If any stage raises, the remaining work is cancelled & the exception is re-raised.
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    limits = _resolve_limits(limits)
+    parse_executor: "Executor"
+    if limits.parse > 1:
+        parse_executor = ProcessPoolExecutor(max_workers=limits.parse)
+    else:
+        parse_executor = ThreadPoolExecutor(max_workers=1)
+
+    read_executor = ThreadPoolExecutor(max_workers=limits.read)
+    write_executor = ThreadPoolExecutor(max_workers=limits.write)
+    executors = (read_executor, parse_executor, write_executor)
+    with read_executor, parse_executor, write_executor:
+        try:
+            return asyncio.run(
+                _run_stages(files, parse, write, on_done, limits, executors, profiler)
+            )
+        except BaseException:
+            # Don't keep working through queued up files if something has gone wrong
+            for executor in executors:
+                executor.shutdown(cancel_futures=True)
+            raise
@@ -0,0 +1,136 @@
+import json
+import typing as t
+from pathlib import Path
+
+from src import parser
+
+
+LONG_HEADER = "subject,location,repeat,section,name,values"
+
+STORE_FILENAME = "consolidated_scans.csv"
+STORE_INDEX_SUFFIX = ".index.json"
+STORE_INDEX_VERSION = 1
+
+# Scans are small, so buffer writes to the store in large chunks rather than per scan
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+
+class StoreEntry(t.TypedDict):  # noqa: D101
+    subject: str
+    location: str
+    repeat: str
+    offset: int
+    length: int
+
+
+class StoreIndex(t.TypedDict):  # noqa: D101
+    version: int
+    scans: dict[str, StoreEntry]
+
+
+def long_format_block(
+    anthro: list[str],
+    landmark: list[str],
+    subject: str,
+    location: str = "",
+    repeat: str = "",
+) -> str:
+    """
+    Convert the provided parsed anthro & landmark rows of a scan into a block of long-format rows.
+
+    Each anthro & landmark row becomes one row of the block, prefixed with the scan's subject ID,
+    location, & repeat number, along with the row's section. Multiple values, e.g. landmark
+    coordinates, are joined with spaces into a single `values` column:
+        `001,CPEN,2,landmark,AbdomenBack,5.6 7.8 -9.10`
+
+    Every row of the block, including the last, ends in a newline so blocks may be concatenated.
+
+    See `parser.split_composite_file` for a description of the parsed rows.
+    """
+    prefix = f"{subject},{location},{repeat}"
+    rows = []
+    for section, section_rows in ((parser.ANTHRO, anthro), (parser.LANDMARK, landmark)):
+        for row in section_rows:
+            name, _, values = row.partition(",")
+            rows.append(f"{prefix},{section},{name},{values.replace(',', ' ')}\n")
+
+    return "".join(rows)
+
+
+def _index_path(store_filepath: Path) -> Path:
+    """Build the sidecar offset index filepath for the provided long-format store."""
+    return store_filepath.with_name(f"{store_filepath.name}{STORE_INDEX_SUFFIX}")
+
+
+class LongFormatWriter:
+    """
+    Write blocks of long-format scan rows to a single CSV store, along with an offset index.
+
+    The store begins with a `LONG_HEADER` line, followed by each scan's block of rows in the order
+    they were added; see `long_format_block` for the row format. Writes are buffered in chunks of
+    `WRITE_BUFFER_SIZE` bytes. The byte offset & length of each scan's block are recorded in a
+    sidecar index, so a single scan can be read back using `read_scan` without reading the whole
+    store. Use as a context manager, the index is written on exit.
+
+    NOTE: Any existing store & index will be overwritten
+    """
+
+    def __init__(self, store_filepath: Path) -> None:
+        self.store_filepath = store_filepath
+        self.scans: dict[str, StoreEntry] = {}
+        self._f: t.Optional[t.BinaryIO] = None
+        self._offset = 0
+
+    def __enter__(self) -> "LongFormatWriter":
+        self._f = self.store_filepath.open("wb", buffering=WRITE_BUFFER_SIZE)
+        header = f"{LONG_HEADER}\n".encode()
+        self._f.write(header)
+        self._offset = len(header)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._f is not None:
+            self._f.close()
+
+        # Keep the index of whatever we managed to write, even if something has gone wrong
+        store_index: StoreIndex = {"version": STORE_INDEX_VERSION, "scans": self.scans}
+        _index_path(self.store_filepath).write_text(json.dumps(store_index, indent=2))
+
+    def add(self, key: str, block: bytes, subject: str, location: str, repeat: str) -> None:
+        """Append the provided encoded block of long-format rows to the store, indexed by `key`."""
+        if self._f is None:
+            raise RuntimeError("Long-format store must be opened before scans can be added")
+
+        self._f.write(block)
+        self.scans[key] = {
+            "subject": subject,
+            "location": location,
+            "repeat": repeat,
+            "offset": self._offset,
+            "length": len(block),
+        }
+        self._offset += len(block)
+
+
+def load_index(store_filepath: Path) -> StoreIndex:
+    """Load the sidecar offset index for the provided long-format store."""
+    store_index: StoreIndex = json.loads(_index_path(store_filepath).read_text())
+    return store_index
+
+
+def read_scan(
+    store_filepath: Path, key: str, store_index: t.Optional[StoreIndex] = None
+) -> list[str]:
+    """
+    Read the long-format rows of a single scan from the provided store, using its offset index.
+
+    Only the scan's block of rows is read from the store. The index is loaded if not provided; when
+    reading many scans, load it once using `load_index` & pass it in.
+    """
+    if store_index is None:
+        store_index = load_index(store_filepath)
+
+    entry = store_index["scans"][key]
+    with store_filepath.open("rb") as f:
+        f.seek(entry["offset"])
+        return f.read(entry["length"]).decode().splitlines()
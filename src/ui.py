@@ -1,10 +1,11 @@
-import tkinter as tk
+import typing as t
 from pathlib import Path
-from tkinter import filedialog
 
 import click
 import typer
-from src import io
+from src import cache, compression, console, io, profiling, sharding, staging
+from src.console import rprint
+from src.repeats import RepeatPolicy
 
 
 scansplitter_cli = typer.Typer()
@@ -12,6 +13,10 @@ scansplitter_cli = typer.Typer()
 
 def _prompt_for_file(title: str, start_dir: Path = Path()) -> Path:  # pragma: no cover
     """Open a Tk file selection dialog to prompt the user to select a single file for processing."""
+    # Tk is only imported when prompting so scripted invocations never touch it
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
 
@@ -21,6 +26,7 @@ def _prompt_for_file(title: str, start_dir: Path = Path()) -> Path:  # pragma: n
         multiple=False,
         filetypes=[
             ("Composite Scan Data", "*.txt"),
+            ("Composite Scan Archives", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz"),
             ("All Files", "*.*"),
         ],
     )
@@ -33,6 +39,9 @@ def _prompt_for_file(title: str, start_dir: Path = Path()) -> Path:  # pragma: n
 
 def _prompt_for_dir(start_dir: Path = Path()) -> Path:  # pragma: no cover
     """Open a Tk file selection dialog to prompt the user to select a directory for processing."""
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
 
@@ -47,38 +56,374 @@ def _prompt_for_dir(start_dir: Path = Path()) -> Path:  # pragma: no cover
     return Path(picked)
 
 
+def _open_cache(cache_dir: t.Optional[Path], cache_size: float) -> t.Optional[cache.ParseCache]:
+    """Open a parse cache in the provided directory, capped to `cache_size` MB, if one is given."""
+    if cache_dir is None:
+        return None
+
+    return cache.ParseCache(cache_dir, max_bytes=int(cache_size * 1_000_000))
+
+
+def _parse_shard(shard: t.Optional[str]) -> t.Optional[sharding.Shard]:
+    """Parse the provided `K/N` shard specification, if one is given."""
+    if shard is None:
+        return None
+
+    return sharding.parse_shard(shard)
+
+
+def _configure_console(quiet: bool) -> None:
+    """Set the console output mode, either quiet or automatically selected for the terminal."""
+    console.set_mode(console.ConsoleMode.QUIET if quiet else console.ConsoleMode.AUTO)
+
+
+def _start_profiler(
+    profile: bool, profile_report: t.Optional[Path]
+) -> t.Optional[profiling.Profiler]:
+    """Start a profiler if profiling was requested, either directly or by a report filepath."""
+    if profile or profile_report is not None:
+        return profiling.Profiler()
+
+    return None
+
+
+def _report_profile(
+    profiler: t.Optional[profiling.Profiler], profile_report: t.Optional[Path]
+) -> None:
+    """Print the profile summary & write the JSON profile report, if requested."""
+    if profiler is None:
+        return
+
+    rprint(profiler.summary_table())
+    if profile_report is not None:
+        profiler.dump(profile_report)
+        rprint(f"Profile report written to: '{profile_report}'")
+
+
 @scansplitter_cli.command()
 def single(
     scan_filepath: Path = typer.Option(None, exists=True, file_okay=True, dir_okay=False),
+    member: str = typer.Option("*_composite.txt"),
+    output_format: io.OutputFormat = typer.Option(io.OutputFormat.CSV),
+    compress: compression.Compression = typer.Option(compression.Compression.NONE),
+    output_archive: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    cache_dir: Path = typer.Option(
+        None, envvar="SCANSPLITTER_CACHE_DIR", file_okay=False, dir_okay=True
+    ),
+    cache_size: float = cache.DEFAULT_CACHE_SIZE,
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
 ) -> None:
     """
     Split the specified scan file into its anthro & landmark components.
 
     If no file is specified, the user will be prompted to select one.
+
+    If a zip or tar archive is specified, the single archive member whose file name matches the
+    member pattern is split without extracting it (Default: `*_composite.txt`).
+
+    Components may be optionally output as a single binary `npz` file (Default: `csv`).
+
+    CSV components may be optionally compressed with `gz`, `bz2`, or `xz` (Default: `none`).
+    Compressed scan files are decompressed transparently.
+
+    Components of an archive member may be optionally written to a new zip or tar archive, rather
+    than next to the input archive (Default: `None`).
+
+    Parsed scans may be optionally cached in a directory, keyed by their contents, so unchanged
+    scans aren't parsed again by later runs; the cache is capped to an approximate size, in MB
+    (Default: `None`, `256`).
+
+    A per-stage timing summary may be optionally printed once processing is complete, and written
+    to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
     """
+    _configure_console(quiet)
     if scan_filepath is None:
         scan_filepath = _prompt_for_file(title="Select scan file to slice")
 
-    io.file_split_pipeline(scan_filepath)
+    profiler = _start_profiler(profile, profile_report)
+    io.file_split_pipeline(
+        scan_filepath,
+        output_format=output_format,
+        profiler=profiler,
+        member=member,
+        output_archive=output_archive,
+        compress=compress,
+        cache=_open_cache(cache_dir, cache_size),
+    )
+    _report_profile(profiler, profile_report)
 
 
 @scansplitter_cli.command()
 def batch(
     scan_dir: Path = typer.Option(None, exists=True, file_okay=False, dir_okay=True),
+    archive: Path = typer.Option(None, exists=True, file_okay=True, dir_okay=False),
     pattern: str = typer.Option("*_composite.txt"),
     recurse: bool = False,
+    exclude: t.List[str] = typer.Option(None),
+    prune: t.List[str] = typer.Option(None),
+    ignore_case: bool = False,
+    jobs: int = 1,
+    incremental: bool = False,
+    output_format: io.OutputFormat = typer.Option(io.OutputFormat.CSV),
+    compress: compression.Compression = typer.Option(compression.Compression.NONE),
+    output_archive: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    long_format: bool = False,
+    staged: bool = False,
+    read_concurrency: int = staging.DEFAULT_READ_CONCURRENCY,
+    write_concurrency: int = staging.DEFAULT_WRITE_CONCURRENCY,
+    shard: str = typer.Option(None),
+    repeats: RepeatPolicy = typer.Option(RepeatPolicy.ALL),
+    cache_dir: Path = typer.Option(
+        None, envvar="SCANSPLITTER_CACHE_DIR", file_okay=False, dir_okay=True
+    ),
+    cache_size: float = cache.DEFAULT_CACHE_SIZE,
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
 ) -> None:
     """
     Batch process all scans in the specified directory.
 
     If no processing directory is specified, the user will be prompted to select one.
 
+    Alternatively, all matching members of a zip or tar archive may be split without extracting
+    them. Archive members are split serially & may not be split incrementally. Their components may
+    be optionally written to a new zip or tar archive, rather than next to the input archive
+    (Default: `None`).
+
+    Recursive processing may be optionally specified (Default: `False`).
+
+    File names matching any of the optional exclusion patterns are skipped, as are child directories
+    matching any of the optional pruning patterns. Pattern matching may be optionally made
+    case-insensitive (Default: `False`).
+
+    Scans may optionally be split in parallel across `jobs` processes; use `0` to use all available
+    CPUs (Default: `1`).
+
+    Incremental processing may be optionally specified, where only new or modified scans are split
+    (Default: `False`).
+
+    Components may be optionally output as a single binary `npz` file per scan (Default: `csv`).
+
+    CSV components may be optionally compressed with `gz`, `bz2`, or `xz` (Default: `none`).
+    Compressed scan files are decompressed transparently & matched by the glob pattern.
+
+    Rather than splitting each scan into its own components, all scans may be optionally appended
+    to a single long-format CSV, `consolidated_scans.csv`, with an offset index for reading back
+    individual scans (Default: `False`). Long-format output can't be compressed or incremental.
+
+    Scans may be optionally split by a staged pipeline, where scans are read & written concurrently
+    while other scans are parsed, to keep high-latency storage such as network shares busy
+    (Default: `False`). Up to `read_concurrency` & `write_concurrency` scans are read & written at
+    once, and `jobs` sets the number of parsing processes (Default: `4`, `4`).
+
+    Scans may be optionally split across several machines sharing the scan directory, where each
+    machine splits a disjoint shard of the scans, specified as `K/N` for shard `K` of `N`
+    (Default: `None`). Sharded splitting can't be incremental or long-format.
+
+    Repeat scans of a subject may be optionally skipped, keeping only the `latest` or `first` scan
+    of each subject, selected by file name before any scans are parsed (Default: `all`).
+
+    Parsed scans may be optionally cached in a directory, keyed by their contents, so unchanged
+    scans aren't parsed again by later runs; the cache is capped to an approximate size, in MB
+    (Default: `None`, `256`).
+
+    A per-stage timing summary may be optionally printed once processing is complete, and written
+    to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
+    """
+    _configure_console(quiet)
+    batch_shard = _parse_shard(shard)
+    if archive is not None:
+        if incremental or jobs != 1 or staged or batch_shard is not None:
+            raise click.ClickException(
+                "Archive members are split serially & cannot be split incrementally or in parallel."
+            )
+        if long_format:
+            raise click.ClickException("Long-format output is not supported for archive input.")
+        if repeats != RepeatPolicy.ALL:
+            raise click.ClickException("Repeat scan selection is not supported for archive input.")
+
+        profiler = _start_profiler(profile, profile_report)
+        io.archive_split_pipeline(
+            archive,
+            pattern=pattern,
+            output_format=output_format,
+            output_archive=output_archive,
+            profiler=profiler,
+            exclude=exclude or (),
+            ignore_case=ignore_case,
+            compress=compress,
+            cache=_open_cache(cache_dir, cache_size),
+        )
+        _report_profile(profiler, profile_report)
+        return
+    elif output_archive is not None:
+        raise click.ClickException("An output archive may only be used with an archive input.")
+
+    if scan_dir is None:
+        scan_dir = _prompt_for_dir()
+
+    profiler = _start_profiler(profile, profile_report)
+    io.batch_split_pipeline(
+        scan_dir,
+        pattern=pattern,
+        recurse=recurse,
+        jobs=jobs,
+        incremental=incremental,
+        output_format=output_format,
+        profiler=profiler,
+        exclude=exclude or (),
+        prune=prune or (),
+        ignore_case=ignore_case,
+        compress=compress,
+        long_format=long_format,
+        cache=_open_cache(cache_dir, cache_size),
+        stage_limits=(
+            staging.StageLimits(read_concurrency, jobs, write_concurrency) if staged else None
+        ),
+        shard=batch_shard,
+        repeats=repeats,
+    )
+    _report_profile(profiler, profile_report)
+
+
+@scansplitter_cli.command()
+def watch(
+    scan_dir: Path = typer.Option(None, exists=True, file_okay=False, dir_okay=True),
+    pattern: str = typer.Option("*_composite.txt"),
+    recurse: bool = False,
+    exclude: t.List[str] = typer.Option(None),
+    prune: t.List[str] = typer.Option(None),
+    ignore_case: bool = False,
+    output_format: io.OutputFormat = typer.Option(io.OutputFormat.CSV),
+    compress: compression.Compression = typer.Option(compression.Compression.NONE),
+    aggregate: bool = True,
+    location_fill: str = "",
+    poll_interval: float = 2.0,
+    settle_time: float = 2.0,
+    cache_dir: Path = typer.Option(
+        None, envvar="SCANSPLITTER_CACHE_DIR", file_okay=False, dir_okay=True
+    ),
+    cache_size: float = cache.DEFAULT_CACHE_SIZE,
+    quiet: bool = False,
+) -> None:
+    """
+    Watch the specified directory & split new scans as they are written.
+
+    If no watch directory is specified, the user will be prompted to select one.
+
+    The directory is polled every `poll_interval` seconds (Default: `2.0`), & each new or modified
+    scan is split once its size is unchanged for `settle_time` seconds (Default: `2.0`). Split scans
+    are tracked in the same manifest as incremental batch processing.
+
+    Discovery & output options match those of `batch`.
+
+    The consolidated anthro measurements file may be optionally kept up to date as scans are split,
+    using the optional location fill (Default: `True`).
+
+    Parsed scans may be optionally cached in a directory, keyed by their contents, so unchanged
+    scans aren't parsed again by later runs; the cache is capped to an approximate size, in MB
+    (Default: `None`, `256`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
+    """
+    _configure_console(quiet)
+    if scan_dir is None:
+        scan_dir = _prompt_for_dir()
+
+    io.watch_pipeline(
+        scan_dir,
+        pattern=pattern,
+        recurse=recurse,
+        exclude=exclude or (),
+        prune=prune or (),
+        ignore_case=ignore_case,
+        output_format=output_format,
+        compress=compress,
+        aggregate=aggregate,
+        location_fill=location_fill,
+        poll_interval=poll_interval,
+        settle_time=settle_time,
+        cache=_open_cache(cache_dir, cache_size),
+    )
+
+
+@scansplitter_cli.command()
+def ingest(
+    scan_dir: Path = typer.Option(None, exists=True, file_okay=False, dir_okay=True),
+    database: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    pattern: str = typer.Option("*_composite.txt"),
+    recurse: bool = False,
+    exclude: t.List[str] = typer.Option(None),
+    prune: t.List[str] = typer.Option(None),
+    ignore_case: bool = False,
+    jobs: int = 1,
+    consolidate: bool = False,
+    location_fill: str = "",
+    cache_dir: Path = typer.Option(
+        None, envvar="SCANSPLITTER_CACHE_DIR", file_okay=False, dir_okay=True
+    ),
+    cache_size: float = cache.DEFAULT_CACHE_SIZE,
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
+) -> None:
+    """
+    Parse all scans in the specified directory into a local SQLite database.
+
+    If no processing directory is specified, the user will be prompted to select one.
+
+    The database is written to `scansplitter.db` in the scan directory, unless a database filepath
+    is specified. Scans whose contents are unchanged since they were last ingested are skipped,
+    while modified scans replace their previous version.
+
     Recursive processing may be optionally specified (Default: `False`).
+
+    File names matching any of the optional exclusion patterns are skipped, as are child directories
+    matching any of the optional pruning patterns. Pattern matching may be optionally made
+    case-insensitive (Default: `False`).
+
+    Scans may optionally be parsed in parallel across `jobs` processes; use `0` to use all available
+    CPUs (Default: `1`).
+
+    The consolidated anthro measurements CSV may be optionally written from the database once
+    ingest is complete (Default: `False`).
+
+    Parsed scans may be optionally cached in a directory, keyed by their contents, so unchanged
+    scans aren't parsed again by later runs; the cache is capped to an approximate size, in MB
+    (Default: `None`, `256`).
+
+    A per-stage timing summary may be optionally printed once processing is complete, and written
+    to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
     """
+    _configure_console(quiet)
     if scan_dir is None:
         scan_dir = _prompt_for_dir()
 
-    io.batch_split_pipeline(scan_dir, pattern=pattern, recurse=recurse)
+    profiler = _start_profiler(profile, profile_report)
+    io.ingest_pipeline(
+        scan_dir,
+        database_path=database,
+        pattern=pattern,
+        recurse=recurse,
+        jobs=jobs,
+        exclude=exclude or (),
+        prune=prune or (),
+        ignore_case=ignore_case,
+        consolidate=consolidate,
+        location_fill=location_fill,
+        profiler=profiler,
+        cache=_open_cache(cache_dir, cache_size),
+    )
+    _report_profile(profiler, profile_report)
 
 
 @scansplitter_cli.command()
@@ -88,38 +433,212 @@ def aggregate(
     location_fill: str = "",
     pattern: str = typer.Option("*_composite.anthro.csv"),
     recurse: bool = False,
+    exclude: t.List[str] = typer.Option(None),
+    prune: t.List[str] = typer.Option(None),
+    ignore_case: bool = False,
+    memory_budget: float = typer.Option(None),
+    incremental: bool = False,
+    align: io.RowAlignment = typer.Option(io.RowAlignment.POSITION),
+    missing_value: str = "",
+    shard: str = typer.Option(None),
+    repeats: RepeatPolicy = typer.Option(RepeatPolicy.ALL),
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
 ) -> None:
     """
     Aggregate a directory of split anthro measurement files into a single CSV.
 
     If no processing directory is specified, the user will be prompted to select one.
 
+    Compressed anthro files are decompressed transparently & matched by the glob pattern.
+
     Recursive processing may be optionally specified (Default: `False`).
+
+    File names matching any of the optional exclusion patterns are skipped, as are child directories
+    matching any of the optional pruning patterns. Pattern matching may be optionally made
+    case-insensitive (Default: `False`).
+
+    An approximate memory budget, in MB, may be optionally specified to bound the amount of
+    measurement data held in memory for very large cohorts (Default: `None`).
+
+    Incremental processing may be optionally specified, where only new or modified anthro files are
+    merged into an existing consolidated file (Default: `False`).
+
+    Measurements may be optionally aligned by name rather than position, keeping either the `union`
+    or `intersection` of measurement names across all anthro files; measurements missing from an
+    anthro file are filled with the optional missing value (Default: `position`).
+
+    Anthro files may be optionally aggregated across several machines sharing the anthro directory,
+    where each machine aggregates a disjoint shard of the anthro files, specified as `K/N` for shard
+    `K` of `N`, into a partial consolidated file; once every shard is done, the partial files are
+    combined using `merge-aggregates` (Default: `None`). Sharding requires `position` alignment.
+
+    Repeat scans of a subject may be optionally skipped, keeping only the anthro file of the
+    `latest` or `first` scan of each subject, selected by file name (Default: `all`).
+
+    A per-stage timing summary may be optionally printed once processing is complete, and written
+    to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
     """
+    _configure_console(quiet)
+    aggregate_shard = _parse_shard(shard)
     if anthro_dir is None:
         anthro_dir = _prompt_for_dir()
 
+    profiler = _start_profiler(profile, profile_report)
     io.anthro_measure_aggregation_pipeline(
         anthro_dir,
         new_row_names=new_row_names,
         location_fill=location_fill,
         pattern=pattern,
         recurse=recurse,
+        memory_budget=memory_budget,
+        incremental=incremental,
+        profiler=profiler,
+        exclude=exclude or (),
+        prune=prune or (),
+        ignore_case=ignore_case,
+        align=align,
+        missing_value=missing_value,
+        shard=aggregate_shard,
+        repeats=repeats,
     )
+    _report_profile(profiler, profile_report)
+
+
+@scansplitter_cli.command(name="merge-aggregates")
+def merge_aggregates(
+    anthro_dir: Path = typer.Option(None, exists=True, file_okay=False, dir_okay=True),
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
+) -> None:
+    """
+    Merge the partial consolidated files of a sharded aggregation into a single CSV.
+
+    Every shard must have been aggregated using `aggregate --shard`; the merged file is identical
+    to aggregating all of the anthro files at once.
+
+    If no processing directory is specified, the user will be prompted to select one.
+
+    A per-stage timing summary may be optionally printed once processing is complete, and written
+    to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
+    """
+    _configure_console(quiet)
+    if anthro_dir is None:
+        anthro_dir = _prompt_for_dir()
+
+    profiler = _start_profiler(profile, profile_report)
+    io.merge_aggregates_pipeline(anthro_dir, profiler=profiler)
+    _report_profile(profiler, profile_report)
+
+
+@scansplitter_cli.command(name="aggregate-landmarks")
+def aggregate_landmarks(
+    landmark_dir: Path = typer.Option(None, exists=True, file_okay=False, dir_okay=True),
+    location_fill: str = "",
+    pattern: str = typer.Option("*_composite.lmk.csv"),
+    recurse: bool = False,
+    exclude: t.List[str] = typer.Option(None),
+    prune: t.List[str] = typer.Option(None),
+    ignore_case: bool = False,
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
+) -> None:
+    """
+    Aggregate a directory of split landmark files into a single memory-mapped array.
+
+    Landmarks are written to a subjects x landmarks x 3 `.npy` file, along with a sidecar index of
+    subject IDs & landmark names. Requires the optional NumPy dependency.
+
+    If no processing directory is specified, the user will be prompted to select one.
+
+    Recursive processing may be optionally specified (Default: `False`).
+
+    File names matching any of the optional exclusion patterns are skipped, as are child directories
+    matching any of the optional pruning patterns. Pattern matching may be optionally made
+    case-insensitive (Default: `False`).
+
+    A per-stage timing summary may be optionally printed once processing is complete, and written
+    to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
+    """
+    _configure_console(quiet)
+    if landmark_dir is None:
+        landmark_dir = _prompt_for_dir()
+
+    profiler = _start_profiler(profile, profile_report)
+    io.landmark_aggregation_pipeline(
+        landmark_dir,
+        location_fill=location_fill,
+        pattern=pattern,
+        recurse=recurse,
+        profiler=profiler,
+        exclude=exclude or (),
+        prune=prune or (),
+        ignore_case=ignore_case,
+    )
+    _report_profile(profiler, profile_report)
 
 
 @scansplitter_cli.callback(invoke_without_command=True)
-def main(ctx: typer.Context) -> None:
+def main(
+    ctx: typer.Context,
+    jobs: int = 1,
+    write_splits: bool = True,
+    cache_dir: Path = typer.Option(
+        None, envvar="SCANSPLITTER_CACHE_DIR", file_okay=False, dir_okay=True
+    ),
+    cache_size: float = cache.DEFAULT_CACHE_SIZE,
+    memory_budget: float = typer.Option(None),
+    profile: bool = False,
+    profile_report: Path = typer.Option(None, file_okay=True, dir_okay=False),
+    quiet: bool = False,
+) -> None:
     """
     Split composite scan file(s) into separate landmark & measurement files.
 
     Invocation without args prompts the user to select a scan directory, then runs through the
-    default batch & aggregation pipelines.
+    default batch & aggregation pipelines in a single pass.
+
+    Scans may optionally be split in parallel across `jobs` processes; use `0` to use all available
+    CPUs (Default: `1`).
+
+    Writing of the per-scan anthro & landmark files may be optionally disabled, in which case only
+    the consolidated anthro measurements file is written (Default: `True`).
+
+    Parsed scans may be optionally cached in a directory, keyed by their contents, so unchanged
+    scans aren't parsed again by later runs; the cache is capped to an approximate size, in MB
+    (Default: `None`, `256`).
+
+    An approximate memory budget, in MB, may be optionally specified to bound the amount of
+    measurement data held in memory for very large cohorts (Default: `None`).
+
+    A per-stage timing summary of the bare invocation may be optionally printed once processing is
+    complete, and written to a JSON report if a report filepath is specified (Default: `False`).
+
+    Console output may be optionally suppressed, other than errors (Default: `False`).
     """
     if not ctx.invoked_subcommand:
-        anthro_dir = _prompt_for_dir()
-        io.batch_split_pipeline(anthro_dir)
-        io.anthro_measure_aggregation_pipeline(anthro_dir)
+        _configure_console(quiet)
+        scan_dir = _prompt_for_dir()
+
+        profiler = _start_profiler(profile, profile_report)
+        io.fused_split_aggregation_pipeline(
+            scan_dir,
+            jobs=jobs,
+            write_splits=write_splits,
+            profiler=profiler,
+            cache=_open_cache(cache_dir, cache_size),
+            memory_budget=memory_budget,
+        )
+        _report_profile(profiler, profile_report)
 
 
 if __name__ == "__main__":  # pragma: no cover
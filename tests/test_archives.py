@@ -0,0 +1,79 @@
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from src import archives
+
+
+MEMBERS = {
+    "001_composite.txt": "zero\none",
+    "nested/002_composite.txt": "two",
+    "nested/notes.txt": "skip me",
+}
+
+
+def _write_archive(archive: Path) -> None:
+    with archives.ArchiveWriter(archive) as writer:
+        for name, src in MEMBERS.items():
+            writer.write(name, src.encode())
+
+
+@pytest.mark.parametrize("archive_name", ("scans.zip", "scans.tar", "scans.tar.gz", "scans.txz"))
+def test_archive_round_trip(tmp_path: Path, archive_name: str) -> None:  # noqa: D103
+    archive = tmp_path / archive_name
+    _write_archive(archive)
+
+    members = [
+        (member.name, member.size, "".join(member.src))
+        for member in archives.iter_members(archive, ["*_composite.txt"])
+    ]
+    assert members == [
+        ("001_composite.txt", 8, "zero\none"),
+        ("nested/002_composite.txt", 3, "two"),
+    ]
+
+
+def test_written_archive_types(tmp_path: Path) -> None:
+    _write_archive(tmp_path / "scans.zip")
+    _write_archive(tmp_path / "scans.tar.bz2")
+
+    assert zipfile.is_zipfile(tmp_path / "scans.zip")
+    with tarfile.open(tmp_path / "scans.tar.bz2", "r:bz2") as tar_f:
+        assert tar_f.getnames() == list(MEMBERS)
+
+
+@pytest.mark.parametrize(
+    ("include", "exclude", "ignore_case", "truth_names"),
+    (
+        (["*.txt"], [], False, list(MEMBERS)),
+        (["*.txt"], ["notes*"], False, ["001_composite.txt", "nested/002_composite.txt"]),
+        (["*_COMPOSITE.txt"], [], False, []),
+        (["*_COMPOSITE.txt"], [], True, ["001_composite.txt", "nested/002_composite.txt"]),
+        ([], [], False, []),
+    ),
+)
+def test_list_members(  # noqa: D103
+    tmp_path: Path,
+    include: list[str],
+    exclude: list[str],
+    ignore_case: bool,
+    truth_names: list[str],
+) -> None:
+    archive = tmp_path / "scans.tgz"
+    _write_archive(archive)
+
+    assert archives.list_members(archive, include, exclude, ignore_case) == truth_names
+
+
+@pytest.mark.parametrize(
+    ("filename", "truth_is_archive"),
+    (("a.zip", True), ("a.TAR.GZ", True), ("a.tbz2", True), ("a.txt", False), ("a.gz", False)),
+)
+def test_is_archive(filename: str, truth_is_archive: bool) -> None:  # noqa: D103
+    assert archives.is_archive(Path(filename)) == truth_is_archive
+
+
+def test_unsupported_output_archive(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        archives.ArchiveWriter(tmp_path / "scans.rar")
@@ -0,0 +1,104 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from src import io
+
+# NumPy is an optional dependency
+np = pytest.importorskip("numpy")
+arrays = pytest.importorskip("src.arrays")
+
+
+SAMPLE_COMPOSITE = dedent(
+    """\
+    #SizeStream Core Measurements
+    #
+    1  Actual Weight: 1.2
+    #SizeStream Custom Measurements
+    #
+    1  Chest: 3.4
+    1  Halter
+    #SizeStream Landmarks
+    #
+    1  AbdomenBack	5.6	7.8	-9.10
+    1  Right heel	1.0	2.0
+    """
+)
+
+
+def test_split_composite_arrays() -> None:
+    scan = arrays.split_composite_arrays(SAMPLE_COMPOSITE.splitlines())
+
+    assert scan.measurement_names == ["Actual Weight", "Chest", "Halter"]
+    assert scan.measurements.dtype == np.float64
+    np.testing.assert_array_equal(scan.measurements, [1.2, 3.4, np.nan])
+
+    assert scan.landmark_names == ["AbdomenBack", "Right heel"]
+    assert scan.landmarks.shape == (2, 3)
+    np.testing.assert_array_equal(scan.landmarks, [[5.6, 7.8, -9.10], [1.0, 2.0, np.nan]])
+
+
+def test_empty_landmarks_shape() -> None:
+    scan = arrays.split_composite_arrays(["#", "1  A: 1.2", "#", "1  B: 3.4", "#", "1  ***"])
+    assert scan.landmarks.shape == (0, 3)
+
+
+def test_scan_round_trip(tmp_path: Path) -> None:
+    scan = arrays.split_composite_arrays(SAMPLE_COMPOSITE.splitlines())
+    filepath = tmp_path / "scan.npz"
+    arrays.dump_scan(filepath, scan)
+
+    loaded = arrays.load_scan(filepath)
+    assert loaded.measurement_names == scan.measurement_names
+    assert loaded.landmark_names == scan.landmark_names
+    np.testing.assert_array_equal(loaded.measurements, scan.measurements)
+    np.testing.assert_array_equal(loaded.landmarks, scan.landmarks)
+
+
+def test_binary_batch_split(tmp_path: Path) -> None:
+    for subj in ("001", "002"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    io.batch_split_pipeline(tmp_path, output_format=io.OutputFormat.NPZ, jobs=2)
+
+    npz_files = sorted(tmp_path.glob("*.npz"))
+    assert len(npz_files) == 2
+    assert not list(tmp_path.glob("*.csv"))
+    assert arrays.load_scan(npz_files[0]).measurement_names == ["Actual Weight", "Chest", "Halter"]
+
+
+def test_parse_landmark_csv() -> None:
+    landmark_names, landmarks = arrays.parse_landmark_csv(
+        "Landmark Name,x,y,z\nAbdomenBack,5.6,7.8,-9.10\nRight heel,1.0,2.0"
+    )
+
+    assert landmark_names == ["AbdomenBack", "Right heel"]
+    np.testing.assert_array_equal(landmarks, [[5.6, 7.8, -9.10], [1.0, 2.0, np.nan]])
+
+
+def test_align_landmarks() -> None:
+    coords = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    aligned = arrays.align_landmarks(["B", "C"], coords, ["A", "B"])
+    np.testing.assert_array_equal(aligned, [[np.nan] * 3, [1.0, 2.0, 3.0]])
+
+
+def test_landmark_aggregation(tmp_path: Path) -> None:
+    for subj in ("002", "001"):
+        composite_src = SAMPLE_COMPOSITE.replace("5.6", f"{subj}.6")
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(composite_src)
+
+    io.batch_split_pipeline(tmp_path)
+    io.landmark_aggregation_pipeline(tmp_path, location_fill="TBS")
+
+    stack, landmark_index = arrays.load_landmark_stack(tmp_path / "consolidated_landmarks.npy")
+    assert isinstance(stack, np.memmap)
+    assert stack.shape == tuple(landmark_index["shape"]) == (2, 2, 3)
+    assert landmark_index["subjects"] == ["TBS001", "TBS002"]
+    assert landmark_index["landmark_names"] == ["AbdomenBack", "Right heel"]
+    np.testing.assert_array_equal(stack[:, 0, 0], [1.6, 2.6])
+    np.testing.assert_array_equal(stack[1, 1], [1.0, 2.0, np.nan])
+
+
+def test_landmark_aggregation_no_files(tmp_path: Path) -> None:
+    io.landmark_aggregation_pipeline(tmp_path)
+    assert not (tmp_path / "consolidated_landmarks.npy").exists()
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from benchmarks import generator
+from src import parser
+
+
+def test_generated_composite_parses() -> None:
+    spec = generator.CompositeSpec(n_core=3, n_custom=4, n_landmarks=5, n_comments=2)
+    composite_src = generator.generate_composite(spec)
+
+    anthro, landmark = parser.split_composite_file(composite_src.splitlines())
+    assert len(anthro) == spec.n_core + spec.n_custom
+    assert len(landmark) == spec.n_landmarks
+    assert all(len(row.split(",")) == 4 for row in landmark)
+
+
+def test_generated_cohort_filenames(tmp_path: Path) -> None:
+    filepaths = generator.write_cohort(
+        tmp_path, 50, repeat_fraction=0.5, locations=("", "CPEN"), seed=42
+    )
+    assert len({filepath.name for filepath in filepaths}) == 50
+
+    subj_ids = [parser.extract_subj_id(filepath.stem) for filepath in filepaths]
+    assert any("-" in subj_id or "(" in subj_id for subj_id, _ in subj_ids)
@@ -0,0 +1,96 @@
+import gzip
+import os
+import struct
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from pytest_mock import MockerFixture
+from src import cache, parser
+from src.compression import Compression
+
+
+SAMPLE_COMPOSITE = dedent(
+    """\
+    #SizeStream Core Measurements
+    #format - Measurement Valid (1 = valid), Measurement Name, Measurement
+    #
+    1  Actual Weight: 1.2
+    #SizeStream Custom Measurements
+    #format - Measurement Valid (1 = valid), Measurement Name, Measurement
+    #
+    1  Chest: 3.4
+    #SizeStream Landmarks
+    #format - Landmarks Valid (1 = valid), Landmark Name, Landmark x y z
+    #
+    1  AbdomenBack	5.6	7.8	-9.10
+    """
+)
+TRUTH_PARSED = (["Actual Weight,1.2", "Chest,3.4"], ["AbdomenBack,5.6,7.8,-9.10"])
+
+
+@pytest.mark.parametrize("parsed", (TRUTH_PARSED, ([], []), (["a,1"], []), ([], ["b,1,2,3"])))
+def test_entry_round_trip(parsed: tuple[list[str], list[str]]) -> None:  # noqa: D103
+    assert cache.decode_entry(cache.encode_entry(*parsed)) == parsed
+
+
+@pytest.mark.parametrize(
+    "entry", (b"", b"12345678", struct.pack(cache.ENTRY_HEADER_FORMAT, 2, 0) + b"x")
+)
+def test_corrupt_entry_raises(entry: bytes) -> None:  # noqa: D103
+    with pytest.raises(ValueError):
+        cache.decode_entry(entry)
+
+
+def test_cache_hit_skips_parse(tmp_path: Path, mocker: MockerFixture) -> None:
+    composite_filepath = tmp_path / "001_composite.txt.gz"
+    composite_filepath.write_bytes(gzip.compress(SAMPLE_COMPOSITE.encode()))
+
+    parse_cache = cache.ParseCache(tmp_path / "cache")
+    assert parse_cache.split_composite_file(composite_filepath) == TRUTH_PARSED
+
+    parse_spy = mocker.spy(parser, "split_composite_file")
+    assert parse_cache.split_composite_file(composite_filepath) == TRUTH_PARSED
+    assert parse_cache.split_composite_src(SAMPLE_COMPOSITE.splitlines(True)) == TRUTH_PARSED
+    assert parse_spy.call_count == 1  # Only the uncompressed contents are new
+
+
+def test_parser_version_invalidates(tmp_path: Path, mocker: MockerFixture) -> None:
+    parse_cache = cache.ParseCache(tmp_path)
+    parse_cache.split_composite_bytes(SAMPLE_COMPOSITE.encode(), Compression.NONE)
+
+    mocker.patch.object(parser, "PARSER_VERSION", parser.PARSER_VERSION + 1)
+    parse_spy = mocker.spy(parser, "split_composite_file")
+    parse_cache.split_composite_bytes(SAMPLE_COMPOSITE.encode(), Compression.NONE)
+    assert parse_spy.call_count == 1
+
+
+def test_corrupt_entry_discarded(tmp_path: Path) -> None:
+    parse_cache = cache.ParseCache(tmp_path)
+    parse_cache.put("abc", *TRUTH_PARSED)
+    (entry_path,) = tmp_path.glob(f"*{cache.ENTRY_SUFFIX}")
+    entry_path.write_bytes(b"garbage")
+
+    assert parse_cache.get("abc") is None
+    assert not entry_path.exists()
+
+
+def test_lru_eviction(tmp_path: Path) -> None:
+    entry_size = len(cache.encode_entry(*TRUTH_PARSED))
+    parse_cache = cache.ParseCache(tmp_path, max_bytes=3 * entry_size)
+    for key in ("a", "b", "c"):
+        parse_cache.put(key, *TRUTH_PARSED)
+
+    # Age the entries, then use "a" so "b" becomes the least recently used
+    for age, entry_path in enumerate(sorted(tmp_path.glob(f"*{cache.ENTRY_SUFFIX}"))):
+        os.utime(entry_path, ns=(age, age))
+    assert parse_cache.get("a") is not None
+
+    # Entries are evicted oldest first until the cache is under its eviction target
+    parse_cache.put("d", *TRUTH_PARSED)
+    assert [parse_cache.get(key) is not None for key in ("a", "b", "c", "d")] == [
+        True,
+        False,
+        False,
+        True,
+    ]
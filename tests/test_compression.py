@@ -0,0 +1,61 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from src import compression
+from src.compression import Compression
+
+
+@pytest.mark.parametrize(
+    ("filename", "truth_compression", "truth_stripped"),
+    (
+        ("a_composite.txt", Compression.NONE, "a_composite.txt"),
+        ("a_composite.txt.gz", Compression.GZIP, "a_composite.txt"),
+        ("a.anthro.csv.BZ2", Compression.BZ2, "a.anthro.csv"),
+        ("a.anthro.csv.xz", Compression.XZ, "a.anthro.csv"),
+        ("a.tar.gz", Compression.GZIP, "a.tar"),
+    ),
+)
+def test_detect_compression(  # noqa: D103
+    filename: str, truth_compression: Compression, truth_stripped: str
+) -> None:
+    assert compression.detect(Path(filename)) == truth_compression
+    assert compression.strip_suffix(Path(filename)) == Path(truth_stripped)
+
+
+def test_with_suffixes() -> None:
+    assert compression.with_suffixes(["*.csv", "*.csv.gz", "a*"]) == [
+        "*.csv",
+        "*.csv.gz",
+        "*.csv.bz2",
+        "*.csv.xz",
+        "*.csv.gz",
+        "a*",
+    ]
+
+
+@pytest.mark.parametrize("compress", list(Compression))
+def test_text_round_trip(tmp_path: Path, compress: Compression) -> None:  # noqa: D103
+    filepath = tmp_path / f"some.anthro.csv{compress.suffix}"
+    compression.write_text(filepath, "some,header\nmeasurement a,11")
+
+    assert compression.read_text(filepath) == "some,header\nmeasurement a,11"
+    with compression.open_text(filepath) as f:
+        assert list(f) == ["some,header\n", "measurement a,11"]
+
+    # In-memory compression should be readable as a compressed file of the same format
+    filepath.write_bytes(compression.compress(b"measurement b,12", compress))
+    assert compression.read_text(filepath) == "measurement b,12"
+    assert compression.decompress(filepath.read_bytes(), compress) == b"measurement b,12"
+
+    with compression.open_binary(filepath, "w") as f:
+        f.write(b"measurement c,13")
+
+    assert compression.read_text(filepath) == "measurement c,13"
+
+
+def test_gzip_is_readable_by_gzip(tmp_path: Path) -> None:
+    filepath = tmp_path / "some.anthro.csv.gz"
+    compression.write_text(filepath, "some,header")
+
+    assert gzip.decompress(filepath.read_bytes()) == b"some,header"
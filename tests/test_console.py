@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+from src import console
+
+
+@pytest.fixture
+def scan_files(tmp_path: Path) -> list[Path]:  # noqa: D103
+    scan_files = []
+    for subj in ("001", "002", "003"):
+        filepath = tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt"
+        filepath.write_text("foo")
+        scan_files.append(filepath)
+
+    return scan_files
+
+
+def test_auto_mode_not_a_tty(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(console, "_mode", console.ConsoleMode.AUTO)
+    assert console.get_mode() == console.ConsoleMode.LOG  # stdout is captured by pytest
+
+
+def test_quiet_mode_suppresses_output(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture, scan_files: list[Path]
+) -> None:
+    monkeypatch.setattr(console, "_mode", console.ConsoleMode.QUIET)
+    console.rprint("foo")
+    with console.ProgressReporter(len(scan_files)) as progress:
+        for filepath in scan_files:
+            progress.advance(filepath)
+
+    assert capsys.readouterr().out == ""
+    assert progress.n_files == 3
+    assert progress.n_bytes == 9
+
+
+@pytest.mark.parametrize(("log_interval", "truth_n_lines"), ((0, 3), (1e6, 1)))
+def test_log_mode_is_throttled(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    scan_files: list[Path],
+    log_interval: float,
+    truth_n_lines: int,
+) -> None:
+    monkeypatch.setattr(console, "_mode", console.ConsoleMode.LOG)
+    monkeypatch.setattr(console, "LOG_INTERVAL", log_interval)
+    with console.ProgressReporter(len(scan_files)) as progress:
+        for filepath in scan_files:
+            progress.advance(filepath)
+
+    log_lines = capsys.readouterr().out.splitlines()
+    assert len(log_lines) == truth_n_lines
+    assert log_lines[-1].startswith("Processing 3/3 files (")
+    assert "files/s" in log_lines[-1] and "MB/s" in log_lines[-1] and "ETA" in log_lines[-1]
+
+
+def test_advance_without_file(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(console, "_mode", console.ConsoleMode.QUIET)
+    with console.ProgressReporter(None) as progress:
+        progress.advance(Path("scans.zip/001_composite.txt"), n_bytes=5)
+
+    assert progress.n_bytes == 5
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from src import database
+
+
+def _scan_record(path: str, sha256: str = "abc", value: str = "1.2") -> database.ScanRecord:
+    return database.ScanRecord(
+        path=path,
+        sha256=sha256,
+        subject=path[:3],
+        location="",
+        anthro=[f"Actual Weight,{value}", "Chest,3.4"],
+        landmark=["AbdomenBack,5.6,7.8,-9.10", "Short,1.0"],
+    )
+
+
+def test_upsert_round_trip(tmp_path: Path) -> None:
+    connection = database.connect(tmp_path / database.DATABASE_FILENAME)
+    assert database.upsert_scans(connection, [_scan_record("002"), _scan_record("001")]) == 2
+
+    assert database.scan_hashes(connection) == {"001": "abc", "002": "abc"}
+    assert database.subject_ids(connection, location_fill="CPEN") == ["CPEN001", "CPEN002"]
+    assert database.measurement_names(connection) == ["Actual Weight", "Chest"]
+    assert list(database.iter_measurement_columns(connection)) == [["1.2", "3.4"], ["1.2", "3.4"]]
+
+    landmarks = connection.execute("SELECT name, x, y, z FROM landmarks ORDER BY scan_id, position")
+    assert landmarks.fetchmany(2) == [("AbdomenBack", 5.6, 7.8, -9.1), ("Short", 1.0, None, None)]
+
+
+def test_upsert_replaces_scan(tmp_path: Path) -> None:
+    connection = database.connect(tmp_path / database.DATABASE_FILENAME)
+    database.upsert_scans(connection, [_scan_record("001")])
+    database.upsert_scans(connection, [_scan_record("001", sha256="def", value="5.6")])
+
+    assert database.scan_hashes(connection) == {"001": "def"}
+    assert list(database.iter_measurement_columns(connection)) == [["5.6", "3.4"]]
+    (n_landmarks,) = connection.execute("SELECT COUNT(*) FROM landmarks").fetchone()
+    assert n_landmarks == 2
+
+
+def test_indexes_created(tmp_path: Path) -> None:
+    connection = database.connect(tmp_path / database.DATABASE_FILENAME)
+    indexes = {name for (name,) in connection.execute("SELECT name FROM sqlite_master")}
+    assert {"scans_subject", "scans_location", "measurements_name", "landmarks_name"} <= indexes
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import pytest
+from src import discovery
+
+
+@pytest.fixture
+def scan_tree(tmp_path: Path) -> Path:  # noqa: D103
+    for dirpath in (tmp_path, tmp_path / "child", tmp_path / "child" / "output"):
+        dirpath.mkdir(exist_ok=True)
+        (dirpath / "001_composite.txt").write_text("foo")
+        (dirpath / "002_COMPOSITE.TXT").write_text("foo")
+        (dirpath / "003_composite.anthro.csv").write_text("foo")
+
+    return tmp_path
+
+
+def _relative(filepaths: list[Path], root: Path) -> list[str]:
+    return sorted(filepath.relative_to(root).as_posix() for filepath in filepaths)
+
+
+LISTING_TEST_CASES = [
+    ({}, [], ["001_composite.txt"]),
+    ({"ignore_case": True}, [], ["001_composite.txt", "002_COMPOSITE.TXT"]),
+    ({}, ["001*"], []),
+    (
+        {"recurse": True},
+        [],
+        ["001_composite.txt", "child/001_composite.txt", "child/output/001_composite.txt"],
+    ),
+    ({"recurse": True, "prune": ["out*"]}, [], ["001_composite.txt", "child/001_composite.txt"]),
+    (
+        {"recurse": True, "prune": ["OUT*"]},
+        [],
+        ["001_composite.txt", "child/001_composite.txt", "child/output/001_composite.txt"],
+    ),
+]
+
+
+@pytest.mark.parametrize(("listing_kwargs", "exclude", "truth_files"), LISTING_TEST_CASES)
+def test_iter_files(  # noqa: D103
+    scan_tree: Path, listing_kwargs: dict, exclude: list[str], truth_files: list[str]
+) -> None:
+    listing = discovery.FileListing(scan_tree, **listing_kwargs)
+    found = list(listing.iter_files(["*_composite.txt"], exclude))
+    assert _relative(found, scan_tree) == truth_files
+
+
+def test_listing_is_cached(scan_tree: Path) -> None:
+    listing = discovery.FileListing(scan_tree)
+    assert len(list(listing.iter_files(["*.txt"]))) == 1
+
+    # New files aren't seen by a completed listing unless they're registered
+    new_file = scan_tree / "004_composite.txt"
+    new_file.write_text("foo")
+    assert len(list(listing.iter_files(["*.txt"]))) == 1
+
+    listing.add([new_file, scan_tree / "001_composite.txt"])
+    assert _relative(list(listing.iter_files(["*.txt"])), scan_tree) == [
+        "001_composite.txt",
+        "004_composite.txt",
+    ]
+
+
+def test_interrupted_scan_is_not_cached(scan_tree: Path) -> None:
+    listing = discovery.FileListing(scan_tree)
+    next(listing.iter_files(["*"]))
+
+    (scan_tree / "004_composite.txt").write_text("foo")
+    assert len(list(listing.iter_files(["*_composite.txt"]))) == 2
+
+
+def test_settled_files(tmp_path: Path) -> None:
+    filepath = tmp_path / "001_composite.txt"
+    filepath.write_text("foo")
+    settled_files = discovery.SettledFiles(settle_time=1.0)
+
+    # Files must be seen unchanged across polls for at least the settle time
+    assert settled_files.update([filepath], now=0.0) == []
+    assert settled_files.update([filepath], now=0.5) == []
+    assert settled_files.update([filepath], now=1.0) == [filepath]
+    assert settled_files.update([filepath], now=5.0) == []
+
+    # Modified files settle again
+    filepath.write_text("foobar")
+    assert settled_files.update([filepath], now=6.0) == []
+    assert settled_files.update([filepath], now=7.0) == [filepath]
+
+    # Removed files are forgotten, so they're reported again if they're replaced
+    filepath.unlink()
+    assert settled_files.update([filepath], now=8.0) == []
+    filepath.write_text("foobar")
+    assert settled_files.update([filepath], now=9.0) == []
+    assert settled_files.update([filepath], now=10.0) == [filepath]
@@ -1,8 +1,29 @@
+import itertools
+import locale
+import os
+import typing as t
+from contextlib import ExitStack
 from pathlib import Path
 from textwrap import dedent
 
+import click
 import pytest
-from src import io
+from pytest_mock import MockerFixture
+from src import (
+    archives,
+    compression,
+    discovery,
+    io,
+    manifest,
+    parser,
+    profiling,
+    sharding,
+    staging,
+    store,
+)
+from src.cache import ParseCache
+from src.compression import Compression
+from src.repeats import RepeatPolicy
 
 
 LINE_COUNTER_TEST_CASES = [
@@ -106,3 +127,1065 @@ def test_measurement_merging(tmp_path: Path) -> None:  # noqa: D103
     merged_measurements = io._merge_measurements(files, MERGED_ROW_NAMES)
 
     assert merged_measurements == TRUTH_MERGED
+
+
+SAMPLE_COMPOSITE = dedent(
+    """\
+    #SizeStream Measurements
+    #Stored on Tue May 18 06:49:24 2021
+    #SizeStream Core Measurements
+    #format - Measurement Valid (1 = valid), Measurement Name, Measurement
+    #
+    1  Actual Weight: 1.2
+    #SizeStream Custom Measurements
+    #format - Measurement Valid (1 = valid), Measurement Name, Measurement
+    #
+    1  *****  Body Fat / Fitness: *****
+    1  Chest: 3.4
+    #SizeStream Landmarks
+    #format - Landmarks Valid (1 = valid), Landmark Name, Landmark x y z
+    #
+    1  AbdomenBack	5.6	7.8	-9.10
+    """
+)
+TRUTH_ANTHRO = "Measurement Name,Measurement\nActual Weight,1.2\nChest,3.4"
+TRUTH_LANDMARK = "Landmark Name,x,y,z\nAbdomenBack,5.6,7.8,-9.10"
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_batch_split(tmp_path: Path, jobs: int) -> None:
+    for subj in ("001", "002", "003"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    io.batch_split_pipeline(tmp_path, jobs=jobs)
+
+    anthro_files = sorted(tmp_path.glob("*.anthro.csv"))
+    landmark_files = sorted(tmp_path.glob("*.lmk.csv"))
+    assert len(anthro_files) == len(landmark_files) == 3
+    assert all(file.read_text() == TRUTH_ANTHRO for file in anthro_files)
+    assert all(file.read_text() == TRUTH_LANDMARK for file in landmark_files)
+
+
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_profiled_batch_split(tmp_path: Path, jobs: int) -> None:
+    for subj in ("001", "002"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    profiler = profiling.Profiler()
+    io.batch_split_pipeline(tmp_path, jobs=jobs, profiler=profiler)
+
+    # Profiling shouldn't change the split output
+    anthro_files = sorted(tmp_path.glob("*.anthro.csv"))
+    assert len(anthro_files) == 2
+    assert all(file.read_text() == TRUTH_ANTHRO for file in anthro_files)
+
+    report = profiler.report()
+    assert report["n_files"] == 2
+    assert report["bytes_read"] == 2 * len(SAMPLE_COMPOSITE)
+    assert report["bytes_written"] == 2 * (len(TRUTH_ANTHRO) + len(TRUTH_LANDMARK))
+    assert report["lines_parsed"] == 2 * len(SAMPLE_COMPOSITE.splitlines())
+    assert all(report["stages_s"][stage] > 0 for stage in ("discovery", "read", "parse", "write"))
+
+
+def test_parallel_batch_split_reraises(tmp_path: Path) -> None:
+    (tmp_path / "001 2021-05-18_06-49-24_composite.txt").write_text("1  Actual Weight: 1.2")
+
+    with pytest.raises(ValueError):
+        io.batch_split_pipeline(tmp_path, jobs=2)
+
+
+@pytest.mark.parametrize("newline", ("\n", "\r\n"))
+def test_mapped_split_matches_text(tmp_path: Path, newline: str) -> None:
+    # Compressed composite files are split using the text parser, uncompressed files are mapped
+    raw_src = SAMPLE_COMPOSITE.replace("\n", newline).encode()
+    mapped_file = tmp_path / "001 2021-05-18_06-49-24_composite.txt"
+    mapped_file.write_bytes(raw_src)
+    text_file = tmp_path / "002 2021-05-18_06-49-24_composite.txt.gz"
+    text_file.write_bytes(compression.compress(raw_src, Compression.GZIP))
+
+    mapped_anthro = io._split_file(mapped_file, collect_anthro=True)
+    text_anthro = io._split_file(text_file, collect_anthro=True)
+    assert mapped_anthro == text_anthro == TRUTH_ANTHRO.splitlines()[1:]
+
+    for suffix in (".anthro.csv", ".lmk.csv"):
+        mapped_output = tmp_path / f"001 2021-05-18_06-49-24_composite{suffix}"
+        text_output = tmp_path / f"002 2021-05-18_06-49-24_composite{suffix}"
+        assert mapped_output.read_bytes() == text_output.read_bytes()
+
+
+def test_empty_section_split_matches_dump_chunk(tmp_path: Path) -> None:
+    # A landmark chunk of only comments has no rows, so it's written as a header & trailing newline
+    raw_src = SAMPLE_COMPOSITE.replace("AbdomenBack\t5.6\t7.8\t-9.10", "*** Missing ***").encode()
+    truth_filepath = tmp_path / "truth.csv"
+    io._dump_chunk(truth_filepath, [], header=io.LANDMARK_HEADER)
+    assert truth_filepath.read_text() == "Landmark Name,x,y,z\n"
+
+    parse_cache = ParseCache(tmp_path / "cache")
+    split_kwargs = ({}, {"cache": parse_cache}, {"cache": parse_cache})  # Cold & warm cache
+    for idx, kwargs in enumerate((*split_kwargs, {}), start=1):
+        # The last scan is compressed, so it is split as text rather than mapped
+        suffix = ".gz" if idx == len(split_kwargs) + 1 else ""
+        composite_filepath = tmp_path / f"{idx:03} 2021-05-18_06-49-24_composite.txt{suffix}"
+        in_compression = compression.detect(composite_filepath)
+        composite_filepath.write_bytes(compression.compress(raw_src, in_compression))
+        io._split_file(composite_filepath, **kwargs)
+
+    landmark_files = sorted(tmp_path.glob("*.lmk.csv"))
+    assert len(landmark_files) == 4
+    assert all(file.read_bytes() == truth_filepath.read_bytes() for file in landmark_files)
+
+
+UNMAPPABLE_COMPOSITES = [
+    SAMPLE_COMPOSITE.replace("Chest: 3.4", "Chest:\u00a03.4"),  # Non-ASCII whitespace
+    SAMPLE_COMPOSITE.replace("Chest: 3.4", "Chest:\x1f3.4"),  # ASCII separator
+    SAMPLE_COMPOSITE.replace("Chest: 3.4\n", "Chest: 3.4\r1  Waist: 5.6\n"),  # Lone CR newline
+]
+
+
+@pytest.mark.parametrize("composite_src", UNMAPPABLE_COMPOSITES, ids=("nbsp", "separator", "cr"))
+def test_unmappable_split_matches_text(tmp_path: Path, composite_src: str) -> None:  # noqa: D103
+    raw_src = composite_src.encode(locale.getpreferredencoding(False))
+    mapped_file = tmp_path / "001 2021-05-18_06-49-24_composite.txt"
+    mapped_file.write_bytes(raw_src)
+    text_file = tmp_path / "002 2021-05-18_06-49-24_composite.txt.gz"
+    text_file.write_bytes(compression.compress(raw_src, Compression.GZIP))
+
+    assert io._split_file(mapped_file, collect_anthro=True) == io._split_file(
+        text_file, collect_anthro=True
+    )
+    for suffix in (".anthro.csv", ".lmk.csv"):
+        mapped_output = tmp_path / f"001 2021-05-18_06-49-24_composite{suffix}"
+        text_output = tmp_path / f"002 2021-05-18_06-49-24_composite{suffix}"
+        assert mapped_output.read_bytes() == text_output.read_bytes()
+
+
+def test_mapped_split_undecodable_raises(tmp_path: Path) -> None:
+    raw_src = SAMPLE_COMPOSITE.replace("Chest", "Chest \xff").encode("latin-1")
+    try:
+        raw_src.decode(locale.getpreferredencoding(False))
+    except UnicodeDecodeError:
+        pass
+    else:
+        pytest.skip("Composite file is decodable in the locale encoding")
+
+    # Files that aren't in the locale encoding fail to split, as they do when decoded as text
+    mapped_file = tmp_path / "001 2021-05-18_06-49-24_composite.txt"
+    mapped_file.write_bytes(raw_src)
+    with pytest.raises(UnicodeDecodeError):
+        io._split_file(mapped_file)
+
+
+def test_mapped_split_empty_file_raises(tmp_path: Path) -> None:
+    empty_file = tmp_path / "001 2021-05-18_06-49-24_composite.txt"
+    empty_file.touch()
+
+    with pytest.raises(ValueError):
+        io._split_file(empty_file)
+
+
+@pytest.mark.parametrize("composite_name", ("001_composite.txt", "001_composite.txt.gz"))
+def test_malformed_split_leaves_no_partial_outputs(  # noqa: D103
+    tmp_path: Path, composite_name: str
+) -> None:
+    # The extra chunk is only found after the first 3 chunks have been parsed & written
+    malformed_src = f"{SAMPLE_COMPOSITE}#Extra Chunk\n1  Extra: 1.2\n"
+    composite_file = tmp_path / composite_name
+    raw_src = compression.compress(malformed_src.encode(), compression.detect(composite_file))
+    composite_file.write_bytes(raw_src)
+
+    anthro_file, landmark_file = io._split_output_paths(composite_file)
+    anthro_file.write_text("previous split")
+
+    with pytest.raises(ValueError):
+        io._split_file(composite_file)
+
+    assert anthro_file.read_text() == "previous split"
+    assert set(tmp_path.iterdir()) == {composite_file, anthro_file}
+
+
+def test_incremental_batch_split(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    for subj in ("001", "002"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    io.batch_split_pipeline(tmp_path, incremental=True)
+    assert "Processed 2 files, skipped 0 unchanged files" in capsys.readouterr().out
+
+    (tmp_path / "003 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+    io.batch_split_pipeline(tmp_path, incremental=True)
+    assert "Processed 1 files, skipped 2 unchanged files" in capsys.readouterr().out
+    assert len(list(tmp_path.glob("*.anthro.csv"))) == 3
+
+
+@pytest.mark.parametrize("profile", (False, True))
+@pytest.mark.parametrize("compress", list(Compression))
+def test_compressed_batch_split(  # noqa: D103
+    tmp_path: Path, compress: Compression, profile: bool
+) -> None:
+    # Compressed & uncompressed scans should both be found & split
+    compression.write_text(tmp_path / "001 2021-05-18_06-49-24_composite.txt.gz", SAMPLE_COMPOSITE)
+    (tmp_path / "002 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    profiler = profiling.Profiler() if profile else None
+    io.batch_split_pipeline(tmp_path, compress=compress, profiler=profiler)
+
+    anthro_files = sorted(tmp_path.glob(f"*_composite.anthro.csv{compress.suffix}"))
+    landmark_files = sorted(tmp_path.glob(f"*_composite.lmk.csv{compress.suffix}"))
+    assert [file.name[:3] for file in anthro_files] == ["001", "002"]
+    assert all(compression.read_text(file) == TRUTH_ANTHRO for file in anthro_files)
+    assert all(compression.read_text(file) == TRUTH_LANDMARK for file in landmark_files)
+
+    # Compressed anthro files are aggregated transparently
+    io.anthro_measure_aggregation_pipeline(tmp_path)
+    header, *rows = (tmp_path / "consolidated_anthro.CSV").read_text().splitlines()
+    assert sorted(header.split(",")) == ["001", "002", "Measurement Name"]
+    assert rows == ["Actual Weight,1.2,1.2", "Chest,3.4,3.4"]
+
+
+@pytest.mark.parametrize("profile", (False, True))
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_long_format_batch_split(tmp_path: Path, jobs: int, profile: bool) -> None:  # noqa: D103
+    (tmp_path / "001 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+    (tmp_path / "CPEN002-2 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    profiler = profiling.Profiler() if profile else None
+    io.batch_split_pipeline(tmp_path, jobs=jobs, profiler=profiler, long_format=True)
+
+    # Scans are consolidated rather than split into their own outputs
+    assert not list(tmp_path.glob("*.anthro.csv"))
+    store_filepath = tmp_path / store.STORE_FILENAME
+    assert store_filepath.read_text().splitlines()[0] == store.LONG_HEADER
+
+    truth_rows = [
+        "002,CPEN,2,anthro,Actual Weight,1.2",
+        "002,CPEN,2,anthro,Chest,3.4",
+        "002,CPEN,2,landmark,AbdomenBack,5.6 7.8 -9.10",
+    ]
+    key = "CPEN002-2 2021-05-18_06-49-24_composite.txt"
+    assert store.read_scan(store_filepath, key) == truth_rows
+    if profiler is not None:
+        assert profiler.report()["n_files"] == 2
+
+
+@pytest.mark.parametrize("compress", (Compression.NONE, Compression.GZIP))
+@pytest.mark.parametrize("parse_limit", (1, 2))
+def test_staged_batch_split(  # noqa: D103
+    tmp_path: Path, capsys: pytest.CaptureFixture, parse_limit: int, compress: Compression
+) -> None:
+    compression.write_text(tmp_path / "001 2021-05-18_06-49-24_composite.txt.gz", SAMPLE_COMPOSITE)
+    for subj in ("002", "003"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    stage_limits = staging.StageLimits(read=2, parse=parse_limit, write=2)
+    io.batch_split_pipeline(
+        tmp_path, incremental=True, compress=compress, stage_limits=stage_limits
+    )
+    assert "Processed 3 files, skipped 0 unchanged files" in capsys.readouterr().out
+
+    # Staged output should match the serial split
+    anthro_files = sorted(tmp_path.glob(f"*_composite.anthro.csv{compress.suffix}"))
+    landmark_files = sorted(tmp_path.glob(f"*_composite.lmk.csv{compress.suffix}"))
+    assert len(anthro_files) == len(landmark_files) == 3
+    assert all(compression.read_text(file) == TRUTH_ANTHRO for file in anthro_files)
+    assert all(compression.read_text(file) == TRUTH_LANDMARK for file in landmark_files)
+
+    # Split files should be recorded in the manifest as they complete
+    io.batch_split_pipeline(
+        tmp_path, incremental=True, compress=compress, stage_limits=stage_limits
+    )
+    assert "Processed 0 files, skipped 3 unchanged files" in capsys.readouterr().out
+
+
+def test_profiled_staged_batch_split(tmp_path: Path) -> None:
+    for subj in ("001", "002"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    profiler = profiling.Profiler()
+    io.batch_split_pipeline(tmp_path, profiler=profiler, stage_limits=staging.StageLimits())
+
+    report = profiler.report()
+    assert report["n_files"] == 2
+    assert report["bytes_read"] == 2 * len(SAMPLE_COMPOSITE)
+    assert report["bytes_written"] == 2 * (len(TRUTH_ANTHRO) + len(TRUTH_LANDMARK))
+
+
+@pytest.mark.parametrize(
+    "options",
+    (
+        {"output_format": io.OutputFormat.NPZ},
+        {"compress": Compression.GZIP},
+        {"incremental": True},
+        {"stage_limits": staging.StageLimits()},
+    ),
+)
+def test_long_format_unsupported_options(tmp_path: Path, options: dict[str, t.Any]) -> None:
+    with pytest.raises(click.ClickException):
+        io.batch_split_pipeline(tmp_path, long_format=True, **options)
+
+
+@pytest.mark.parametrize("profile", (False, True))
+@pytest.mark.parametrize("jobs", (1, 2))
+def test_ingest(  # noqa: D103
+    tmp_path: Path, capsys: pytest.CaptureFixture, jobs: int, profile: bool
+) -> None:
+    for subj in ("001", "002"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    profiler = profiling.Profiler() if profile else None
+    io.ingest_pipeline(tmp_path, jobs=jobs, consolidate=True, profiler=profiler)
+    assert "Ingested 2 files, skipped 0 unchanged files" in capsys.readouterr().out
+
+    # The consolidated file from the database should match aggregating the split files
+    consolidated_filepath = tmp_path / "consolidated_anthro.CSV"
+    ingested_src = consolidated_filepath.read_text()
+    io.batch_split_pipeline(tmp_path)
+    io.anthro_measure_aggregation_pipeline(tmp_path)
+    assert ingested_src == consolidated_filepath.read_text()
+
+    # Only modified scans are re-ingested
+    modified_composite = SAMPLE_COMPOSITE.replace("Chest: 3.4", "Chest: 5.6")
+    (tmp_path / "002 2021-05-18_06-49-24_composite.txt").write_text(modified_composite)
+    capsys.readouterr()
+    io.ingest_pipeline(tmp_path, consolidate=True)
+    assert "Ingested 1 files, skipped 1 unchanged files" in capsys.readouterr().out
+    assert consolidated_filepath.read_text().splitlines()[-1] == "Chest,3.4,5.6"
+
+
+@pytest.mark.parametrize("profile", (False, True))
+def test_cached_batch_split(tmp_path: Path, mocker: MockerFixture, profile: bool) -> None:
+    scan_dir = tmp_path / "scans"
+    scan_dir.mkdir()
+    for subj in ("001", "002"):
+        (scan_dir / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    parse_cache = ParseCache(tmp_path / "cache")
+    profiler = profiling.Profiler() if profile else None
+    io.batch_split_pipeline(scan_dir, profiler=profiler, cache=parse_cache)
+
+    # Identical scans share a cache entry, so nothing should need parsing the second time around
+    parse_spy = mocker.spy(parser, "split_composite_file")
+    for anthro_file in scan_dir.glob("*.anthro.csv"):
+        anthro_file.unlink()
+    io.batch_split_pipeline(scan_dir, profiler=profiler, cache=parse_cache)
+    io.batch_split_pipeline(scan_dir, long_format=True, cache=parse_cache)
+    io.ingest_pipeline(scan_dir, cache=parse_cache)
+    io.fused_split_aggregation_pipeline(scan_dir, write_splits=False, cache=parse_cache)
+    parse_spy.assert_not_called()
+
+    anthro_files = sorted(scan_dir.glob("*.anthro.csv"))
+    landmark_files = sorted(scan_dir.glob("*.lmk.csv"))
+    assert len(anthro_files) == len(landmark_files) == 2
+    assert all(file.read_text() == TRUTH_ANTHRO for file in anthro_files)
+    assert all(file.read_text() == TRUTH_LANDMARK for file in landmark_files)
+
+
+def test_compressed_npz_split_errors(tmp_path: Path) -> None:
+    with pytest.raises(click.ClickException):
+        io.batch_split_pipeline(
+            tmp_path, output_format=io.OutputFormat.NPZ, compress=Compression.GZIP
+        )
+
+
+def test_compressed_dump_chunk(tmp_path: Path) -> None:
+    out_filepath = tmp_path / "some.anthro.csv.xz"
+    io._dump_chunk(out_filepath, ["measurement a,11"], header=["some,header"])
+
+    assert compression.read_text(out_filepath) == "some,header\nmeasurement a,11"
+
+
+def _write_scan_archive(archive: Path) -> None:
+    with archives.ArchiveWriter(archive) as writer:
+        writer.write("001 2021-05-18_06-49-24_composite.txt", SAMPLE_COMPOSITE.encode())
+        writer.write("child/002 2021-05-18_06-49-24_composite.txt", SAMPLE_COMPOSITE.encode())
+        writer.write("notes.txt", b"Not a scan")
+
+
+@pytest.mark.parametrize("archive_name", ("scans.zip", "scans.tar.gz"))
+def test_archive_split(tmp_path: Path, archive_name: str) -> None:
+    archive = tmp_path / archive_name
+    _write_scan_archive(archive)
+
+    io.archive_split_pipeline(archive)
+
+    # Outputs are written under the archive's directory, without extracting any members
+    assert sorted(path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob("*.*")) == [
+        "001 2021-05-18_06-49-24_composite.anthro.csv",
+        "001 2021-05-18_06-49-24_composite.lmk.csv",
+        "child/002 2021-05-18_06-49-24_composite.anthro.csv",
+        "child/002 2021-05-18_06-49-24_composite.lmk.csv",
+        archive_name,
+    ]
+    assert all(file.read_text() == TRUTH_ANTHRO for file in tmp_path.rglob("*.anthro.csv"))
+    assert all(file.read_text() == TRUTH_LANDMARK for file in tmp_path.rglob("*.lmk.csv"))
+
+
+def test_archive_split_same_named_members(tmp_path: Path) -> None:
+    archive = tmp_path / "scans.zip"
+    with archives.ArchiveWriter(archive) as writer:
+        for site in (1, 2):
+            composite_src = SAMPLE_COMPOSITE.replace("1.2", f"{site}1.2").encode()
+            writer.write(f"site{site}/001 2021-03-31_18-20-36_composite.txt", composite_src)
+
+    io.archive_split_pipeline(archive)
+
+    # Neither member's outputs should overwrite the other's
+    for site in (1, 2):
+        anthro_filepath = tmp_path / f"site{site}" / "001 2021-03-31_18-20-36_composite.anthro.csv"
+        assert anthro_filepath.read_text() == TRUTH_ANTHRO.replace("1.2", f"{site}1.2")
+
+
+@pytest.mark.parametrize("member_name", ("../001_composite.txt", "/tmp/001_composite.txt"))
+def test_archive_split_unsafe_member_raises(tmp_path: Path, member_name: str) -> None:
+    archive = tmp_path / "scans" / "scans.tar"
+    archive.parent.mkdir()
+    with archives.ArchiveWriter(archive) as writer:
+        writer.write(member_name, SAMPLE_COMPOSITE.encode())
+
+    with pytest.raises(click.ClickException, match="unsafe"):
+        io.archive_split_pipeline(archive)
+
+    assert not list(tmp_path.rglob("*.csv"))
+
+
+@pytest.mark.parametrize("output_archive_name", ("split.zip", "split.tar.xz"))
+def test_archive_split_to_archive(tmp_path: Path, output_archive_name: str) -> None:
+    archive = tmp_path / "scans.zip"
+    _write_scan_archive(archive)
+
+    profiler = profiling.Profiler()
+    output_archive = tmp_path / output_archive_name
+    io.archive_split_pipeline(archive, output_archive=output_archive, profiler=profiler)
+
+    outputs = {
+        member.name: "".join(member.src)
+        for member in archives.iter_members(output_archive, ["*.csv"])
+    }
+    assert outputs == {
+        "001 2021-05-18_06-49-24_composite.anthro.csv": TRUTH_ANTHRO,
+        "001 2021-05-18_06-49-24_composite.lmk.csv": TRUTH_LANDMARK,
+        "child/002 2021-05-18_06-49-24_composite.anthro.csv": TRUTH_ANTHRO,
+        "child/002 2021-05-18_06-49-24_composite.lmk.csv": TRUTH_LANDMARK,
+    }
+
+    report = profiler.report()
+    assert report["n_files"] == 2
+    assert report["bytes_read"] == 2 * len(SAMPLE_COMPOSITE)
+    assert report["lines_parsed"] == 2 * len(SAMPLE_COMPOSITE.splitlines())
+
+
+def test_archive_split_to_input_archive(tmp_path: Path) -> None:
+    archive = tmp_path / "scans.zip"
+    _write_scan_archive(archive)
+
+    with pytest.raises(click.ClickException):
+        io.archive_split_pipeline(archive, output_archive=archive)
+
+
+def test_single_archive_member_split(tmp_path: Path) -> None:
+    archive = tmp_path / "scans.tar"
+    _write_scan_archive(archive)
+
+    # Multiple members match the default pattern
+    with pytest.raises(click.ClickException):
+        io.file_split_pipeline(archive)
+
+    io.file_split_pipeline(archive, member="002*")
+    anthro_filepath = tmp_path / "child" / "002 2021-05-18_06-49-24_composite.anthro.csv"
+    assert anthro_filepath.read_text() == TRUTH_ANTHRO
+    assert not (tmp_path / "001 2021-05-18_06-49-24_composite.anthro.csv").exists()
+
+
+@pytest.mark.parametrize("block_size", (None, 1, 2, 3, 4))
+def test_blocked_measurement_merging(tmp_path: Path, block_size: t.Optional[int]) -> None:
+    columns = [["11", "12"], ["21", "22"], ["31", "32"]]
+    out_filepath = tmp_path / "merged.CSV"
+    io._dump_merged_measurements(
+        out_filepath, "some header,1,2,3", MERGED_ROW_NAMES, columns, block_size
+    )
+
+    assert out_filepath.read_text() == "\n".join(["some header,1,2,3", *TRUTH_MERGED])
+
+
+@pytest.mark.parametrize("fill_value", (None, "NA"))
+def test_spilled_blocks_are_merged(  # noqa: D103
+    mocker: MockerFixture, fill_value: t.Optional[str]
+) -> None:
+    # Spill far more blocks than may be read at once, with short columns when padding
+    mocker.patch.object(io, "MAX_OPEN_SPILLS", 2)
+    columns = [
+        [f"{col}{row}" for row in range(2 if fill_value and col % 3 else 3)] for col in range(11)
+    ]
+
+    with ExitStack() as stack:
+        blocks = io._merge_column_blocks(columns, stack, block_size=1, fill_value=fill_value)
+        assert len(blocks) == 3  # 2 merged spill files & the final block
+        rows = [",".join(row) for row in itertools.islice(zip(*blocks), 3)]
+
+    assert rows == [
+        ",".join(column[row] if row < len(column) else str(fill_value) for column in columns)
+        for row in range(3)
+    ]
+
+
+@pytest.mark.parametrize("block_size", (None, 1))
+def test_merged_measurements_without_rows(  # noqa: D103
+    tmp_path: Path, block_size: t.Optional[int]
+) -> None:
+    out_filepath = tmp_path / "merged.CSV"
+    io._dump_merged_measurements(
+        out_filepath, "some header,1,2", ["some header"], [[], []], block_size
+    )
+
+    assert out_filepath.read_text() == "some header,1,2\n"
+
+
+@pytest.mark.parametrize("memory_budget", (None, 1e-6))
+def test_aggregation_pipeline(tmp_path: Path, memory_budget: t.Optional[float]) -> None:
+    for subj, contents in zip(("001", "002", "003"), MERGER_DUMMY_FILES):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.anthro.csv").write_text(contents)
+
+    io.anthro_measure_aggregation_pipeline(tmp_path, memory_budget=memory_budget)
+
+    # Columns are ordered by path, regardless of file discovery order
+    header, *rows = (tmp_path / "consolidated_anthro.CSV").read_text().splitlines()
+    assert header == "some,001,002,003"
+    assert rows == TRUTH_MERGED
+
+
+def test_profiled_aggregation_pipeline(tmp_path: Path) -> None:
+    for subj, contents in zip(("001", "002", "003"), MERGER_DUMMY_FILES):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.anthro.csv").write_text(contents)
+
+    io.anthro_measure_aggregation_pipeline(tmp_path)
+    truth_src = (tmp_path / "consolidated_anthro.CSV").read_text()
+
+    profiler = profiling.Profiler()
+    io.anthro_measure_aggregation_pipeline(tmp_path, memory_budget=1e-6, profiler=profiler)
+    assert (tmp_path / "consolidated_anthro.CSV").read_text() == truth_src
+
+    # Each file is tracked once, including the sample file used for the row names
+    report = profiler.report()
+    assert report["n_files"] == 3
+    assert all(file_profile["stages"]["read"] > 0 for file_profile in report["files"])
+
+
+def _write_anthro(anthro_dir: Path, subj: str, values: tuple[str, str]) -> Path:
+    filepath = anthro_dir / f"{subj} 2021-05-18_06-49-24_composite.anthro.csv"
+    filepath.write_text(f"some,header\nmeasurement a,{values[0]}\nmeasurement b,{values[1]}")
+    return filepath
+
+
+def _full_rebuild(anthro_dir: Path) -> str:
+    # Rebuild non-incrementally, then restore the incrementally built file & its index
+    out_filepath = anthro_dir / "consolidated_anthro.CSV"
+    index_filepath = out_filepath.with_name(f"{out_filepath.name}{manifest.AGGREGATE_INDEX_SUFFIX}")
+    incremental_src = out_filepath.read_text()
+    incremental_stat = out_filepath.stat()
+    index_src = index_filepath.read_text()
+    index_filepath.unlink()
+    io.anthro_measure_aggregation_pipeline(anthro_dir)
+    full_src = out_filepath.read_text()
+    out_filepath.write_text(incremental_src)
+    os.utime(out_filepath, ns=(incremental_stat.st_atime_ns, incremental_stat.st_mtime_ns))
+    index_filepath.write_text(index_src)
+
+    return full_src
+
+
+def test_incremental_aggregation(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    _write_anthro(tmp_path, "001", ("11", "12"))
+    _write_anthro(tmp_path, "003", ("31", "32"))
+
+    # Initial run needs to build the consolidated file & index from scratch
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+    assert "written to" in capsys.readouterr().out
+
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+    assert "already up to date" in capsys.readouterr().out
+
+    # New files are inserted in column order
+    _write_anthro(tmp_path, "002", ("21", "22"))
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+    assert "Merging 1 new or modified" in capsys.readouterr().out
+    assert out_filepath.read_text() == _full_rebuild(tmp_path)
+    assert out_filepath.read_text().splitlines()[0] == "some,001,002,003"
+
+    # Stale columns are dropped & modified files are re-merged
+    (tmp_path / "001 2021-05-18_06-49-24_composite.anthro.csv").unlink()
+    modified = _write_anthro(tmp_path, "003", ("33", "34"))
+    os.utime(modified, ns=(0, 0))
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+    assert "Merging 1 new or modified" in capsys.readouterr().out
+    assert out_filepath.read_text() == _full_rebuild(tmp_path)
+    assert out_filepath.read_text().splitlines()[1] == "measurement a,21,33"
+
+
+def test_incremental_aggregation_matches_full_rebuild(tmp_path: Path) -> None:  # noqa: D103
+    # Written out of path order, so discovery order is unlikely to match
+    subjects = [f"{subj:03}" for subj in (102, 103, 100, 106, 105, 107, 108, 101, 104, 109)]
+    for subj in subjects[:5]:
+        _write_anthro(tmp_path, subj, (f"{subj}.1", f"{subj}.2"))
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+
+    for subj in subjects[5:]:
+        _write_anthro(tmp_path, subj, (f"{subj}.1", f"{subj}.2"))
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+
+    incremental_src = (tmp_path / "consolidated_anthro.CSV").read_text()
+    io.anthro_measure_aggregation_pipeline(tmp_path)
+    assert incremental_src == (tmp_path / "consolidated_anthro.CSV").read_text()
+    assert incremental_src.splitlines()[0] == f"some,{','.join(sorted(subjects))}"
+
+
+def test_incremental_aggregation_stale_index_rebuilds(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    _write_anthro(tmp_path, "001", ("11", "12"))
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+
+    # Modifying the consolidated file outside of the incremental pipeline invalidates the index
+    out_filepath.write_text("foo")
+    _write_anthro(tmp_path, "002", ("21", "22"))
+    capsys.readouterr()
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+    assert "written to" in capsys.readouterr().out
+    assert out_filepath.read_text() == _full_rebuild(tmp_path)
+
+
+@pytest.mark.parametrize("memory_budget", (None, 1e-6))
+def test_incremental_aggregation_reads_new_files_only(  # noqa: D103
+    tmp_path: Path, mocker: MockerFixture, memory_budget: t.Optional[float]
+) -> None:
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    files = [_write_anthro(tmp_path, subj, (f"{subj}.1", f"{subj}.2")) for subj in ("001", "002")]
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+
+    # Unchanged files, including the sample file, are never read & every file is stat-ed once
+    new_files = [
+        _write_anthro(tmp_path, subj, (f"{subj}.1", f"{subj}.2")) for subj in ("003", "004")
+    ]
+    read_spy = mocker.spy(compression, "read_text")
+    stat_spy = mocker.spy(manifest, "file_stat")
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True, memory_budget=memory_budget)
+
+    assert [call.args[0] for call in read_spy.call_args_list] == new_files
+    stat_files = [call.args[0] for call in stat_spy.call_args_list if call.args[0] != out_filepath]
+    assert sorted(stat_files) == [*files, *new_files]
+    assert out_filepath.read_text() == _full_rebuild(tmp_path)
+
+
+def test_incremental_aggregation_length_mismatch_raises(tmp_path: Path) -> None:
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    _write_anthro(tmp_path, "001", ("11", "12"))
+    io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+    consolidated_src = out_filepath.read_text()
+
+    # Rows are aligned by position, so a short column would otherwise truncate every row
+    (tmp_path / "002 2021-05-18_06-49-24_composite.anthro.csv").write_text(
+        "some,header\nmeasurement a,21"
+    )
+    with pytest.raises(click.ClickException, match="002"):
+        io.anthro_measure_aggregation_pipeline(tmp_path, incremental=True)
+
+    assert out_filepath.read_text() == consolidated_src
+
+
+def test_update_merged_measurements_row_mismatch_raises(tmp_path: Path) -> None:
+    filepath = tmp_path / "merged.CSV"
+    filepath.write_text("some,001\nmeasurement a,11\nmeasurement b,12")
+    with pytest.raises(click.ClickException):
+        io._update_merged_measurements(filepath, "some,001,002", [0, 1], 1, iter([("21",)]))
+
+    assert filepath.read_text() == "some,001\nmeasurement a,11\nmeasurement b,12"
+    assert list(tmp_path.iterdir()) == [filepath]
+
+
+def test_aggregation_orders_columns_by_path(tmp_path: Path, mocker: MockerFixture) -> None:
+    files = [_write_anthro(tmp_path, subj, (subj, subj)) for subj in ("003", "001", "002")]
+    mocker.patch.object(io, "_find_files", return_value=iter(files))
+
+    io.anthro_measure_aggregation_pipeline(tmp_path)
+    header = (tmp_path / "consolidated_anthro.CSV").read_text().splitlines()[0]
+    assert header == "some,001,002,003"
+
+
+# Mixed software versions: renamed, reordered, dropped & added measurements
+ALIGNMENT_DUMMY_FILES = {
+    "001": "some,header\nmeasurement a,11\nmeasurement b,12\nmeasurement c,13",
+    "002": "some,header\nmeasurement c,23\nmeasurement a,21\n",
+    "003": "some,header\nmeasurement a,31\nmeasurement d,34\nmeasurement c,33",
+}
+
+TRUTH_ALIGNED = {
+    io.RowAlignment.UNION: [
+        "some,001,002,003",
+        "measurement a,11,21,31",
+        "measurement b,12,NA,NA",
+        "measurement c,13,23,33",
+        "measurement d,NA,NA,34",
+    ],
+    io.RowAlignment.INTERSECTION: [
+        "some,001,002,003",
+        "measurement a,11,21,31",
+        "measurement c,13,23,33",
+    ],
+}
+
+
+@pytest.mark.parametrize("memory_budget", (None, 1e-6))
+@pytest.mark.parametrize("align", (io.RowAlignment.UNION, io.RowAlignment.INTERSECTION))
+def test_name_aligned_aggregation(  # noqa: D103
+    tmp_path: Path, align: io.RowAlignment, memory_budget: t.Optional[float]
+) -> None:
+    for subj, contents in ALIGNMENT_DUMMY_FILES.items():
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.anthro.csv").write_text(contents)
+
+    io.anthro_measure_aggregation_pipeline(
+        tmp_path, memory_budget=memory_budget, align=align, missing_value="NA"
+    )
+
+    consolidated_src = (tmp_path / "consolidated_anthro.CSV").read_text()
+    assert consolidated_src.splitlines() == TRUTH_ALIGNED[align]
+
+
+def test_measurement_index_repeated_names() -> None:
+    index = io._MeasurementIndex()
+    assert index.align("some,header\nrepeat,1\nrepeat,2") == ["1", "2"]
+    assert index.align("some,header\nrepeat,3") == ["3", ""]
+
+    assert index.names == ["repeat", "repeat"]
+    assert index.shared_rows() == [True, False]
+
+
+def test_measurement_index_row_without_value() -> None:
+    index = io._MeasurementIndex("NA")
+    assert index.align("some,header\nmeasurement a\nmeasurement b,12,extra") == ["", "12"]
+    assert index.names == ["measurement a", "measurement b"]
+
+
+@pytest.mark.parametrize("kwargs", ({"incremental": True}, {"new_row_names": Path("names.txt")}))
+def test_name_aligned_aggregation_unsupported_options(  # noqa: D103
+    tmp_path: Path, kwargs: dict[str, t.Any]
+) -> None:
+    with pytest.raises(click.ClickException):
+        io.anthro_measure_aggregation_pipeline(tmp_path, align=io.RowAlignment.UNION, **kwargs)
+
+
+def test_sharded_split(tmp_path: Path) -> None:
+    composite_files = []
+    for subj in range(10):
+        filepath = tmp_path / f"{subj:03} 2021-05-18_06-49-24_composite.txt"
+        filepath.write_text(SAMPLE_COMPOSITE)
+        composite_files.append(filepath)
+
+    split_files = []
+    for number in (1, 2, 3):
+        before = set(tmp_path.glob("*.anthro.csv"))
+        io.batch_split_pipeline(tmp_path, shard=sharding.Shard(number, 3))
+        split_files.append(set(tmp_path.glob("*.anthro.csv")) - before)
+
+    # Each file is split by exactly one shard
+    assert sum(len(shard_files) for shard_files in split_files) == len(composite_files)
+    assert set.union(*split_files) == {
+        filepath.with_name(f"{filepath.stem}.anthro.csv") for filepath in composite_files
+    }
+
+
+@pytest.mark.parametrize("kwargs", ({"incremental": True}, {"long_format": True}))
+def test_sharded_split_unsupported_options(  # noqa: D103
+    tmp_path: Path, kwargs: dict[str, t.Any]
+) -> None:
+    with pytest.raises(click.ClickException):
+        io.batch_split_pipeline(tmp_path, shard=sharding.Shard(1, 2), **kwargs)
+
+
+def _write_sharded_cohort(anthro_dir: Path) -> None:
+    # Interleave subjects across child directories, so each shard's columns are interleaved too
+    for subj in range(12):
+        child_dir = anthro_dir / ("a" if subj % 2 else "b")
+        child_dir.mkdir(exist_ok=True)
+        _write_anthro(child_dir, f"{subj:03}", (f"{subj}.1", f"{subj}.2"))
+
+    # Rows are aligned by position, so the extra row should be truncated from the merged file
+    (anthro_dir / "a" / "001 2021-05-18_06-49-24_composite.anthro.csv").write_text(
+        "some,header\nmeasurement a,1.1\nmeasurement b,1.2\nmeasurement c,1.3"
+    )
+
+
+def _unsharded_aggregation(
+    anthro_dir: Path,
+    recurse: bool = False,
+    location_fill: str = "",
+    repeats: RepeatPolicy = RepeatPolicy.ALL,
+) -> str:
+    # Aggregate on a single node, then remove the output so it can't be mistaken for the merge
+    io.anthro_measure_aggregation_pipeline(
+        anthro_dir, recurse=recurse, location_fill=location_fill, repeats=repeats
+    )
+    out_filepath = anthro_dir / "consolidated_anthro.CSV"
+    single_src = out_filepath.read_text()
+    out_filepath.unlink()
+
+    return single_src
+
+
+@pytest.mark.parametrize("n_shards", (1, 3, 32))
+def test_sharded_aggregation_merge(tmp_path: Path, n_shards: int) -> None:  # noqa: D103
+    _write_sharded_cohort(tmp_path)
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    truth_src = _unsharded_aggregation(tmp_path, recurse=True, location_fill="X")
+
+    # With 32 shards most are empty
+    for number in range(1, n_shards + 1):
+        io.anthro_measure_aggregation_pipeline(
+            tmp_path, recurse=True, location_fill="X", shard=sharding.Shard(number, n_shards)
+        )
+    assert not out_filepath.exists()
+
+    io.merge_aggregates_pipeline(tmp_path)
+    assert out_filepath.read_text() == truth_src
+
+
+def test_merge_aggregates_empty_shards(tmp_path: Path) -> None:
+    io.anthro_measure_aggregation_pipeline(tmp_path, shard=sharding.Shard(1, 2))
+    io.anthro_measure_aggregation_pipeline(tmp_path, shard=sharding.Shard(2, 2))
+    assert (tmp_path / "consolidated_anthro.shard-1-of-2.CSV").read_text() == ""
+
+    io.merge_aggregates_pipeline(tmp_path)
+    assert not (tmp_path / "consolidated_anthro.CSV").exists()
+
+
+def test_merge_aggregates_missing_shard_raises(tmp_path: Path) -> None:
+    _write_sharded_cohort(tmp_path)
+    for number in (1, 3):
+        io.anthro_measure_aggregation_pipeline(
+            tmp_path, recurse=True, shard=sharding.Shard(number, 3)
+        )
+
+    with pytest.raises(click.ClickException, match="2/3"):
+        io.merge_aggregates_pipeline(tmp_path)
+
+
+def test_merge_aggregates_mixed_shard_counts_raise(tmp_path: Path) -> None:
+    _write_sharded_cohort(tmp_path)
+    for shard in (sharding.Shard(1, 1), sharding.Shard(1, 2), sharding.Shard(2, 2)):
+        io.anthro_measure_aggregation_pipeline(tmp_path, recurse=True, shard=shard)
+
+    with pytest.raises(click.ClickException):
+        io.merge_aggregates_pipeline(tmp_path)
+
+
+def test_merge_aggregates_stale_partial_raises(tmp_path: Path) -> None:
+    _write_sharded_cohort(tmp_path)
+    for number in (1, 2):
+        io.anthro_measure_aggregation_pipeline(
+            tmp_path, recurse=True, shard=sharding.Shard(number, 2)
+        )
+
+    partial_filepath = tmp_path / "consolidated_anthro.shard-2-of-2.CSV"
+    partial_filepath.write_text(partial_filepath.read_text() + "\nmeasurement c,1,2")
+    with pytest.raises(click.ClickException):
+        io.merge_aggregates_pipeline(tmp_path)
+
+
+@pytest.mark.parametrize(
+    ("contents", "match"),
+    (
+        ("some,header\nmeasurement a,1\nmeasurement x,2", "measurement names"),
+        ("some,header\nmeasurement a,1\nmeasurement b,2\nmeasurement c,3", "numbers"),
+    ),
+)
+def test_merge_aggregates_mismatched_rows_raise(  # noqa: D103
+    tmp_path: Path, contents: str, match: str
+) -> None:
+    _write_sharded_cohort(tmp_path)
+    io.anthro_measure_aggregation_pipeline(tmp_path, recurse=True, shard=sharding.Shard(1, 2))
+
+    # Rename or add a measurement in the files aggregated by the second shard
+    for filepath in tmp_path.rglob("*.anthro.csv"):
+        filepath.write_text(contents)
+    io.anthro_measure_aggregation_pipeline(tmp_path, recurse=True, shard=sharding.Shard(2, 2))
+
+    with pytest.raises(click.ClickException, match=match):
+        io.merge_aggregates_pipeline(tmp_path)
+
+    assert not (tmp_path / "consolidated_anthro.CSV").exists()
+    assert not (tmp_path / ".tmp-consolidated_anthro.CSV").exists()
+
+
+def test_merge_aggregates_no_partials_raises(tmp_path: Path) -> None:
+    with pytest.raises(click.ClickException):
+        io.merge_aggregates_pipeline(tmp_path)
+
+
+def test_sharded_name_aligned_aggregation_raises(tmp_path: Path) -> None:
+    with pytest.raises(click.ClickException):
+        io.anthro_measure_aggregation_pipeline(
+            tmp_path, align=io.RowAlignment.UNION, shard=sharding.Shard(1, 2)
+        )
+
+
+def _write_repeat_cohort(scan_dir: Path) -> list[Path]:
+    composite_files = [
+        scan_dir / "001 2021-05-18_06-49-24_composite.txt",
+        scan_dir / "001-2 2021-05-18_07-00-00_composite.txt",
+        scan_dir / "002 2021-05-18_06-49-24_composite.txt",
+    ]
+    for composite_file in composite_files:
+        composite_file.write_text(SAMPLE_COMPOSITE)
+
+    return composite_files
+
+
+@pytest.mark.parametrize(
+    ("policy", "truth_idx"),
+    ((RepeatPolicy.ALL, (0, 1, 2)), (RepeatPolicy.LATEST, (1, 2)), (RepeatPolicy.FIRST, (0, 2))),
+)
+def test_batch_split_repeats(  # noqa: D103
+    tmp_path: Path, policy: RepeatPolicy, truth_idx: tuple[int, ...]
+) -> None:
+    composite_files = _write_repeat_cohort(tmp_path)
+
+    io.batch_split_pipeline(tmp_path, repeats=policy)
+    assert sorted(tmp_path.glob("*.anthro.csv")) == [
+        composite_files[idx].with_name(f"{composite_files[idx].stem}.anthro.csv")
+        for idx in truth_idx
+    ]
+
+
+def test_superseded_repeats_are_not_parsed(tmp_path: Path, mocker: MockerFixture) -> None:
+    composite_files = _write_repeat_cohort(tmp_path)
+    split_spy = mocker.spy(io, "_split_file")
+
+    io.batch_split_pipeline(tmp_path, repeats=RepeatPolicy.LATEST)
+    assert sorted(call.args[0] for call in split_spy.call_args_list) == composite_files[1:]
+
+
+def test_sharded_repeats_match_single_node(tmp_path: Path) -> None:
+    for subj in range(12):
+        for repeat in ("", "-2"):
+            _write_anthro(tmp_path, f"{subj:03}{repeat}", (f"{subj}{repeat}", "1"))
+
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    truth_src = _unsharded_aggregation(tmp_path, repeats=RepeatPolicy.LATEST)
+    assert "001-2" in truth_src and "001," not in truth_src
+
+    # Repeats are selected before sharding, so a subject's repeats never straddle shards
+    for number in (1, 2, 3):
+        io.anthro_measure_aggregation_pipeline(
+            tmp_path, repeats=RepeatPolicy.LATEST, shard=sharding.Shard(number, 3)
+        )
+    io.merge_aggregates_pipeline(tmp_path)
+    assert out_filepath.read_text() == truth_src
+
+
+def _two_step_pipeline(scan_dir: Path) -> str:
+    io.batch_split_pipeline(scan_dir)
+    io.anthro_measure_aggregation_pipeline(scan_dir)
+    return (scan_dir / "consolidated_anthro.CSV").read_text()
+
+
+def test_shared_listing(tmp_path: Path, mocker: MockerFixture) -> None:
+    for subj in ("001", "002", "003"):
+        filepath = tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt"
+        filepath.write_text(SAMPLE_COMPOSITE.replace("1.2", f"{subj}.2"))
+
+    # The aggregation stage should find the split outputs without rescanning the directory
+    listing = discovery.FileListing(tmp_path)
+    io.batch_split_pipeline(tmp_path, listing=listing)
+    spy = mocker.spy(listing, "_scan")
+    io.anthro_measure_aggregation_pipeline(tmp_path, listing=listing)
+
+    spy.assert_not_called()
+    header = (tmp_path / "consolidated_anthro.CSV").read_text().splitlines()[0]
+    assert header == "Measurement Name,001,002,003"
+
+
+@pytest.mark.parametrize("memory_budget", (None, 1e-6))
+@pytest.mark.parametrize(("jobs", "write_splits"), ((1, True), (1, False), (2, True)))
+def test_fused_split_aggregation(  # noqa: D103
+    tmp_path: Path, jobs: int, write_splits: bool, memory_budget: t.Optional[float]
+) -> None:
+    fused_dir = tmp_path / "fused"
+    two_step_dir = tmp_path / "two_step"
+    for scan_dir in (fused_dir, two_step_dir):
+        scan_dir.mkdir()
+        for subj in ("001", "002", "003"):
+            filepath = scan_dir / f"{subj} 2021-05-18_06-49-24_composite.txt"
+            filepath.write_text(SAMPLE_COMPOSITE.replace("1.2", f"{subj}.2"))
+
+    io.fused_split_aggregation_pipeline(
+        fused_dir, jobs=jobs, write_splits=write_splits, memory_budget=memory_budget
+    )
+    fused_src = (fused_dir / "consolidated_anthro.CSV").read_text()
+
+    two_step_src = _two_step_pipeline(two_step_dir)
+    assert fused_src == two_step_src
+    assert len(list(fused_dir.glob("*.anthro.csv"))) == (3 if write_splits else 0)
+
+
+@pytest.mark.parametrize("write_splits", (True, False))
+def test_profiled_fused_split_aggregation(tmp_path: Path, write_splits: bool) -> None:
+    for subj in ("001", "002"):
+        (tmp_path / f"{subj} 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    io.fused_split_aggregation_pipeline(tmp_path)
+    truth_src = (tmp_path / "consolidated_anthro.CSV").read_text()
+    for split_file in tmp_path.glob("*.csv"):
+        split_file.unlink()
+
+    profiler = profiling.Profiler()
+    io.fused_split_aggregation_pipeline(tmp_path, write_splits=write_splits, profiler=profiler)
+    assert (tmp_path / "consolidated_anthro.CSV").read_text() == truth_src
+    assert len(list(tmp_path.glob("*.anthro.csv"))) == (2 if write_splits else 0)
+    assert (profiler.report()["bytes_written"] > 0) == write_splits
+
+
+def test_fused_split_aggregation_no_files(tmp_path: Path) -> None:
+    io.fused_split_aggregation_pipeline(tmp_path)
+    assert not (tmp_path / "consolidated_anthro.CSV").exists()
+
+
+def test_watch_pipeline(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    (tmp_path / "001 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+    (tmp_path / "002 2021-05-18_06-49-24_composite.txt").write_text("1  Actual Weight: 1.2")
+
+    # Files need to be seen across 2 polls before they're considered fully written
+    io.watch_pipeline(tmp_path, poll_interval=0, settle_time=0, max_polls=1)
+    assert not list(tmp_path.glob("*.anthro.csv"))
+
+    io.watch_pipeline(tmp_path, poll_interval=0, settle_time=0, max_polls=2)
+    out = capsys.readouterr().out
+    assert "Split '001 2021-05-18_06-49-24_composite.txt'" in out
+    assert "Failed to split '002 2021-05-18_06-49-24_composite.txt'" in out
+    consolidated_filepath = tmp_path / "consolidated_anthro.CSV"
+    assert consolidated_filepath.read_text().splitlines()[0] == "Measurement Name,001"
+
+    # Restarting the watch only splits new scans & updates the consolidated file incrementally
+    (tmp_path / "003 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+    io.watch_pipeline(tmp_path, poll_interval=0, settle_time=0, max_polls=2)
+    out = capsys.readouterr().out
+    assert "Split '001" not in out
+    assert "Split '003 2021-05-18_06-49-24_composite.txt'" in out
+    assert "measurements file updated" in out
+    assert consolidated_filepath.read_text().splitlines()[0] == "Measurement Name,001,003"
+
+
+def test_watch_pipeline_aggregation_failure(
+    tmp_path: Path, capsys: pytest.CaptureFixture, mocker: MockerFixture
+) -> None:
+    (tmp_path / "001 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+    (tmp_path / "scan_composite.txt").write_text(SAMPLE_COMPOSITE)  # No subject ID
+
+    # Land a new scan after the first failed aggregation, to check the watch keeps splitting
+    def land_scan(_: float) -> None:
+        if sleep.call_count == 2:
+            (tmp_path / "002 2021-05-18_06-49-24_composite.txt").write_text(SAMPLE_COMPOSITE)
+
+    sleep = mocker.patch.object(io.time, "sleep", side_effect=land_scan)
+    io.watch_pipeline(tmp_path, poll_interval=0, settle_time=0, max_polls=4)
+
+    out = capsys.readouterr().out
+    assert "Split '002 2021-05-18_06-49-24_composite.txt'" in out
+    assert out.count("Failed to aggregate") == 2
@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+
+from src import manifest
+
+
+def _write_scan(tmp_path: Path, contents: str = "foo") -> tuple[Path, list[Path]]:
+    in_file = tmp_path / "001 2021-05-18_06-49-24_composite.txt"
+    in_file.write_text(contents)
+
+    output = tmp_path / "001 2021-05-18_06-49-24_composite.anthro.csv"
+    output.write_text("bar")
+
+    return in_file, [output]
+
+
+def test_missing_manifest_is_empty(tmp_path: Path) -> None:
+    assert manifest.load_manifest(tmp_path) == {}
+
+
+def test_corrupt_manifest_is_empty(tmp_path: Path) -> None:
+    (tmp_path / manifest.MANIFEST_FILENAME).write_text("{")
+    assert manifest.load_manifest(tmp_path) == {}
+
+
+def test_manifest_version_mismatch_is_empty(tmp_path: Path) -> None:
+    (tmp_path / manifest.MANIFEST_FILENAME).write_text('{"version": 0, "files": {"a": {}}}')
+    assert manifest.load_manifest(tmp_path) == {}
+
+
+def test_manifest_round_trip(tmp_path: Path) -> None:
+    in_file, outputs = _write_scan(tmp_path)
+    split_manifest: manifest.Manifest = {}
+    manifest.record(in_file, tmp_path, split_manifest, outputs)
+    manifest.save_manifest(tmp_path, split_manifest)
+
+    assert manifest.load_manifest(tmp_path) == split_manifest
+    assert split_manifest[in_file.name]["outputs"] == [outputs[0].name]
+
+
+def test_new_file_is_changed(tmp_path: Path) -> None:
+    in_file, _ = _write_scan(tmp_path)
+    assert not manifest.is_unchanged(in_file, tmp_path, {})
+
+
+def test_recorded_file_is_unchanged(tmp_path: Path) -> None:
+    in_file, outputs = _write_scan(tmp_path)
+    split_manifest: manifest.Manifest = {}
+    manifest.record(in_file, tmp_path, split_manifest, outputs)
+
+    assert manifest.is_unchanged(in_file, tmp_path, split_manifest)
+
+
+def test_touched_file_is_unchanged(tmp_path: Path) -> None:
+    in_file, outputs = _write_scan(tmp_path)
+    split_manifest: manifest.Manifest = {}
+    manifest.record(in_file, tmp_path, split_manifest, outputs)
+
+    new_mtime_ns = split_manifest[in_file.name]["mtime_ns"] + 1_000_000_000
+    os.utime(in_file, ns=(new_mtime_ns, new_mtime_ns))
+
+    assert manifest.is_unchanged(in_file, tmp_path, split_manifest)
+    assert split_manifest[in_file.name]["mtime_ns"] == new_mtime_ns
+
+
+def test_modified_file_is_changed(tmp_path: Path) -> None:
+    in_file, outputs = _write_scan(tmp_path)
+    split_manifest: manifest.Manifest = {}
+    manifest.record(in_file, tmp_path, split_manifest, outputs)
+
+    # Keep the same size so we fall through to the content hash
+    in_file.write_text("baz")
+    new_mtime_ns = split_manifest[in_file.name]["mtime_ns"] + 1_000_000_000
+    os.utime(in_file, ns=(new_mtime_ns, new_mtime_ns))
+
+    assert not manifest.is_unchanged(in_file, tmp_path, split_manifest)
+
+
+def test_resized_file_is_changed(tmp_path: Path) -> None:
+    in_file, outputs = _write_scan(tmp_path)
+    split_manifest: manifest.Manifest = {}
+    manifest.record(in_file, tmp_path, split_manifest, outputs)
+
+    in_file.write_text("foobar")
+
+    assert not manifest.is_unchanged(in_file, tmp_path, split_manifest)
+
+
+def test_missing_output_is_changed(tmp_path: Path) -> None:
+    in_file, outputs = _write_scan(tmp_path)
+    split_manifest: manifest.Manifest = {}
+    manifest.record(in_file, tmp_path, split_manifest, outputs)
+
+    outputs[0].unlink()
+
+    assert not manifest.is_unchanged(in_file, tmp_path, split_manifest)
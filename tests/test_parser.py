@@ -1,4 +1,6 @@
+import io
 import itertools
+import typing as t
 from textwrap import dedent
 
 import click
@@ -100,6 +102,46 @@ def test_line2csv(raw_line: str, truth_csv: str) -> None:  # noqa: D103
     assert parser._line2csv(raw_line) == truth_csv
 
 
+TOKENIZER_TEST_CASES = [
+    ("1  *****  Body Fat / Fitness: *****", None),
+    ("1  AbdomenBack	5.6	7.8	-9.10", "AbdomenBack,5.6,7.8,-9.10"),
+    ("1  Actual Weight: 1.2", "Actual Weight,1.2"),
+    ("1  Body Fat (men): 1.2", "Body Fat (men),1.2"),
+    ("1  Waist at 50%: 1.2", "Waist at 50%,1.2"),
+    ("1  Chest / Bust Circum Tape Measure: 1.2", "Chest / Bust Circum Tape Measure,1.2"),
+    ("1  Bust60DegreesLeft	1.2	1.2	1.2", "Bust60DegreesLeft,1.2,1.2,1.2"),
+    ("0  Right heel	5.6	7.8	-9.10\n", "Right heel,5.6,7.8,-9.10"),
+    ("1  Halter 1.2", "Halter,1.2"),
+    ("1  Halter +.5", "Halter,+.5"),
+    ("1  Halter 1.2cm", "Halter,1.2,cm"),
+    ("1  Halter: 1.2.3", "Halter,1.2,.3"),
+    ("1  Halter:  1.2", "Halter ,1.2"),
+    ("1  Halter", "Halter,"),
+    ("1  Halter 12", "Halter 12,"),
+    ("1  Halter 1.x", "Halter 1.x,"),
+    ("1  .5 1.2", ".5,1.2"),
+]
+
+
+@pytest.mark.parametrize(("raw_line", "truth_csv"), TOKENIZER_TEST_CASES)
+def test_tokenizer(raw_line: str, truth_csv: str) -> None:
+    assert parser._tokenize_line(raw_line) == truth_csv
+
+
+@pytest.mark.parametrize("raw_line", [raw_line for raw_line, _ in TOKENIZER_TEST_CASES])
+def test_tokenizer_matches_cleaner(raw_line: str) -> None:
+    cleaned = parser._clean_line(raw_line)
+    truth_csv = None if cleaned.startswith("*") else parser._line2csv(cleaned)
+
+    assert parser._tokenize_line(raw_line) == truth_csv
+
+
+@pytest.mark.parametrize(("raw_line", "truth_csv"), TOKENIZER_TEST_CASES)
+def test_bytes_tokenizer(raw_line: str, truth_csv: t.Optional[str]) -> None:  # noqa: D103
+    truth_row = None if truth_csv is None else truth_csv.encode()
+    assert parser._tokenize_line_bytes(raw_line.encode()) == truth_row
+
+
 COMPOSITE_TEST_CASES = [
     (
         dedent(  # Check that headers are discarded; anthro is joined
@@ -223,6 +265,30 @@ def test_no_subject_id_raises() -> None:  # noqa: D103
         parser.extract_subj_id("2021-04-20_18-00-00_composite")
 
 
+SPLIT_REPEAT_TEST_CASES = [
+    ("1234", ("1234", "")),
+    ("1234-2", ("1234", "2")),
+    ("1234 (12)", ("1234", "12")),
+]
+
+
+@pytest.mark.parametrize(("subj_id", "truth_split"), SPLIT_REPEAT_TEST_CASES)
+def test_split_repeat(subj_id: str, truth_split: tuple[str, str]) -> None:  # noqa: D103
+    assert parser.split_repeat(subj_id) == truth_split
+
+
+TIMESTAMP_TEST_CASES = [
+    ("1234 2021-04-20_18-00-00_composite.txt", "2021-04-20_18-00-00"),
+    ("1234 (2) 2021-04-20_18-00-00_composite.anthro.csv", "2021-04-20_18-00-00"),
+    ("1234_composite.txt", ""),
+]
+
+
+@pytest.mark.parametrize(("filename", "truth_timestamp"), TIMESTAMP_TEST_CASES)
+def test_timestamp_extraction(filename: str, truth_timestamp: str) -> None:  # noqa: D103
+    assert parser.extract_timestamp(filename) == truth_timestamp
+
+
 SAMPLE_DEFAULT_LOCATION = "FOO"
 LOCATION_INSERTION_TEST_CASES = [
     (
@@ -276,3 +342,42 @@ ROW_EXTRACTION_TEST_CASES = [
 @pytest.mark.parametrize(("raw_src", "truth_rownames"), ROW_EXTRACTION_TEST_CASES)
 def test_row_name_extraction(raw_src: str, truth_rownames: list[str]) -> None:  # noqa: D103
     assert parser.extract_measurement_names(raw_src) == truth_rownames
+
+
+def test_composite_file_iteration() -> None:
+    raw_src = io.StringIO(COMPOSITE_TEST_CASES[1][0])  # Provide lines with trailing newlines
+    rows = list(parser.iter_composite_file(raw_src))
+
+    assert rows == [
+        (parser.ANTHRO, "Actual Weight,1.2"),
+        (parser.ANTHRO, "Chest,3.4"),
+        (parser.LANDMARK, "AbdomenBack,5.6,7.8,-9.10"),
+    ]
+
+
+BAD_CHUNK_COUNT_TEST_CASES = [
+    "#Header\n1  Actual Weight: 1.2\n#Header\n1  Chest: 3.4",
+    "#Header\n1  A: 1.2\n#Header\n1  B: 3.4\n#Header\n1  C 5.6 7.8 -9.10\n#Header\n1  D: 1.2",
+    "#Header",
+]
+
+
+@pytest.mark.parametrize("raw_src", BAD_CHUNK_COUNT_TEST_CASES)
+def test_composite_bad_chunk_count_raises(raw_src: str) -> None:
+    with pytest.raises(ValueError):
+        parser.split_composite_file(raw_src.splitlines())
+
+    with pytest.raises(ValueError):
+        list(parser.iter_composite_bytes(raw_src.encode()))
+
+
+@pytest.mark.parametrize("newline", ("\n", "\r\n"))
+@pytest.mark.parametrize("raw_src", [raw_src for raw_src, *_ in COMPOSITE_TEST_CASES])
+def test_composite_bytes_matches_text(raw_src: str, newline: str) -> None:  # noqa: D103
+    truth_rows = [
+        (section, row.encode()) for section, row in parser.iter_composite_file(io.StringIO(raw_src))
+    ]
+
+    data = raw_src.replace("\n", newline).encode()
+    assert list(parser.iter_composite_bytes(data)) == truth_rows
+    assert list(parser.iter_composite_bytes(data.rstrip())) == truth_rows  # No trailing newline
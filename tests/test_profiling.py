@@ -0,0 +1,56 @@
+import json
+import time
+from pathlib import Path
+
+from src import profiling
+
+
+def test_disabled_stage_is_noop() -> None:
+    with profiling.stage(None, "read"):
+        pass
+
+    assert profiling.track_file(None, Path("foo")) is None
+
+
+def test_nested_stages_are_exclusive() -> None:
+    profiler = profiling.Profiler()
+    file_profile = profiler.track_file(Path("foo"))
+    with profiler.stage("write"):
+        with profiler.stage("read", file_profile):
+            time.sleep(0.02)
+
+    assert profiler.stages["read"] >= 0.02
+    assert profiler.stages["write"] < profiler.stages["read"]
+    assert file_profile["stages"]["read"] == profiler.stages["read"]
+
+
+def test_track_file_is_idempotent() -> None:
+    profiler = profiling.Profiler()
+    assert profiler.track_file(Path("foo")) is profiler.track_file(Path("foo"))
+    assert len(profiler.files) == 1
+
+
+def test_add_file_merges_stages() -> None:
+    profiler = profiling.Profiler()
+    for _ in range(2):
+        file_profile = profiling.new_file_profile(Path("foo"))
+        file_profile["stages"]["parse"] = 1.5
+        file_profile["bytes_read"] = 10
+        profiler.add_file(file_profile)
+
+    report = profiler.report()
+    assert report["stages_s"]["parse"] == 3.0
+    assert report["n_files"] == 2
+    assert report["bytes_read"] == 20
+
+
+def test_report_dump(tmp_path: Path) -> None:
+    profiler = profiling.Profiler()
+    profiler.add_file(profiling.new_file_profile(Path("foo")))
+
+    report_filepath = tmp_path / "profile.json"
+    profiler.dump(report_filepath)
+
+    report = json.loads(report_filepath.read_text())
+    assert set(report["stages_s"]) == set(profiling.STAGES)
+    assert report["files"][0]["file"] == "foo"
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from src import repeats
+from src.repeats import RepeatPolicy
+
+
+COHORT = [
+    Path("001 2021-05-18_06-49-24_composite.txt"),
+    Path("001-2 2021-05-18_07-10-00_composite.txt"),
+    Path("001 (3) 2021-05-19_08-00-00_composite.txt"),
+    Path("CPEN001 2021-05-20_09-00-00_composite.txt"),
+    Path("002 2021-05-18_06-49-24_composite.txt"),
+    Path("notes_composite.txt"),
+]
+
+
+def test_build_repeat_index() -> None:
+    repeat_index = repeats.build_repeat_index(reversed(COHORT), location_fill="TBS")
+
+    # Files without a subject ID aren't indexed, & locations are kept separate
+    assert {key: [scan.filepath for scan in scans] for key, scans in repeat_index.items()} == {
+        ("001", "TBS"): COHORT[:3],
+        ("001", "CPEN"): [COHORT[3]],
+        ("002", "TBS"): [COHORT[4]],
+    }
+    assert [scan.repeat for scan in repeat_index[("001", "TBS")]] == [1, 2, 3]
+
+
+def test_timestamp_orders_before_repeat_number() -> None:
+    # e.g. a rescan that was renamed after the fact
+    files = [
+        Path("001-2 2021-05-18_06-49-24_composite.txt"),
+        Path("001 2021-05-19_06-49-24_composite.txt"),
+    ]
+    assert [scan.filepath for scan in repeats.build_repeat_index(files)[("001", "")]] == files
+
+
+def test_repeat_number_breaks_timestamp_ties() -> None:
+    files = [
+        Path("001-10 2021-05-18_06-49-24_composite.txt"),
+        Path("001-2 2021-05-18_06-49-24_composite.txt"),
+        Path("001 2021-05-18_06-49-24_composite.txt"),
+    ]
+    scans = repeats.build_repeat_index(files)[("001", "")]
+    assert [scan.filepath for scan in scans] == files[::-1]
+
+
+def test_repeats_matched_across_directories() -> None:
+    files = [
+        Path("a/001 2021-05-18_06-49-24_composite.txt"),
+        Path("b/001-2 2021-05-19_06-49-24_composite.txt"),
+    ]
+    assert repeats.select_repeats(files, RepeatPolicy.FIRST) == files[:1]
+
+
+SELECT_REPEATS_TEST_CASES = [
+    (RepeatPolicy.ALL, COHORT),
+    (RepeatPolicy.LATEST, [COHORT[2], *COHORT[3:]]),
+    (RepeatPolicy.FIRST, [COHORT[0], *COHORT[3:]]),
+]
+
+
+@pytest.mark.parametrize(("policy", "truth_files"), SELECT_REPEATS_TEST_CASES)
+def test_select_repeats(policy: RepeatPolicy, truth_files: list[Path]) -> None:  # noqa: D103
+    assert repeats.select_repeats(iter(COHORT), policy) == truth_files
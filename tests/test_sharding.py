@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import click
+import pytest
+from src import sharding
+
+
+SHARD_TEST_CASES = [
+    ("1/1", sharding.Shard(1, 1)),
+    ("2/4", sharding.Shard(2, 4)),
+    (" 4/4 ", sharding.Shard(4, 4)),
+]
+
+
+@pytest.mark.parametrize(("spec", "truth_shard"), SHARD_TEST_CASES)
+def test_parse_shard(spec: str, truth_shard: sharding.Shard) -> None:
+    assert sharding.parse_shard(spec) == truth_shard
+
+
+@pytest.mark.parametrize("spec", ("", "1", "1/", "a/4", "0/4", "5/4", "1/0", "-1/4"))
+def test_bad_shard_raises(spec: str) -> None:
+    with pytest.raises(click.ClickException):
+        sharding.parse_shard(spec)
+
+
+SHARD_KEY_TEST_CASES = [
+    ("001_composite.txt", "001_composite"),
+    ("001_composite.txt.gz", "001_composite"),
+    ("001_composite.anthro.csv", "001_composite"),
+    ("child/001_composite.lmk.csv.xz", "child/001_composite"),
+    ("child/001_composite.npz", "child/001_composite"),
+]
+
+
+@pytest.mark.parametrize(("relative_path", "truth_key"), SHARD_KEY_TEST_CASES)
+def test_shard_key(tmp_path: Path, relative_path: str, truth_key: str) -> None:  # noqa: D103
+    assert sharding.shard_key(tmp_path / relative_path, tmp_path) == truth_key
+
+
+def test_shards_are_disjoint(tmp_path: Path) -> None:
+    files = [tmp_path / f"{subj:03} 2021-05-18_06-49-24_composite.txt" for subj in range(100)]
+
+    shards = [sharding.Shard(number, 4) for number in range(1, 5)]
+    assigned = [
+        [file for file in files if sharding.in_shard(file, tmp_path, shard)] for shard in shards
+    ]
+
+    assert sorted(file for shard_files in assigned for file in shard_files) == files
+    assert all(shard_files for shard_files in assigned)
+
+
+def test_shard_assignment_is_stable(tmp_path: Path) -> None:
+    # Assignment must not depend on the run, e.g. through hash randomization, or the directory
+    composite_file = Path("a/001 2021-05-18_06-49-24_composite.txt")
+    anthro_file = Path("b/001 2021-05-18_06-49-24_composite.anthro.csv")
+    assert sharding.shard_key(Path("/data") / composite_file, Path("/data")) == (
+        "a/001 2021-05-18_06-49-24_composite"
+    )
+
+    shard = sharding.Shard(1, 3)
+    assert sharding.in_shard(tmp_path / composite_file, tmp_path, shard)
+    assert not sharding.in_shard(tmp_path / anthro_file, tmp_path, shard)
+
+
+def test_filter_shard(tmp_path: Path) -> None:
+    files = [tmp_path / f"{subj:03}_composite.txt" for subj in range(10)]
+    assert list(sharding.filter_shard(files, tmp_path, None)) == files
+
+    shard = sharding.Shard(1, 2)
+    truth_files = [file for file in files if sharding.in_shard(file, tmp_path, shard)]
+    assert list(sharding.filter_shard(iter(files), tmp_path, shard)) == truth_files
+
+
+def test_find_partials(tmp_path: Path) -> None:
+    out_filepath = tmp_path / "consolidated_anthro.CSV"
+    shards = [sharding.Shard(1, 2), sharding.Shard(2, 2)]
+    for shard in shards:
+        sharding.partial_filepath(out_filepath, shard).touch()
+
+    # Neither the full output nor the partial indexes are partials
+    out_filepath.touch()
+    (tmp_path / "consolidated_anthro.shard-1-of-2.CSV.index.json").touch()
+
+    assert sharding.find_partials(out_filepath) == {
+        shards[0]: tmp_path / "consolidated_anthro.shard-1-of-2.CSV",
+        shards[1]: tmp_path / "consolidated_anthro.shard-2-of-2.CSV",
+    }
@@ -0,0 +1,99 @@
+import threading
+import time
+from pathlib import Path
+
+import click
+import pytest
+from src import profiling, staging
+
+
+def _parse_upper(in_file: Path, data: bytes) -> bytes:
+    return data.upper()
+
+
+def _parse_raises(in_file: Path, data: bytes) -> bytes:
+    raise ValueError(f"Could not parse {in_file}")
+
+
+def _write_upper(in_file: Path, parsed: bytes) -> tuple[Path, ...]:
+    output = in_file.with_suffix(".out")
+    output.write_bytes(parsed)
+    return (output,)
+
+
+def _make_files(tmp_path: Path, n: int) -> list[Path]:
+    files = [tmp_path / f"{idx:03}.txt" for idx in range(n)]
+    for file in files:
+        file.write_bytes(f"scan {file.stem}".encode())
+
+    return files
+
+
+@pytest.mark.parametrize("parse_limit", (1, 2))
+def test_run_staged(tmp_path: Path, parse_limit: int) -> None:  # noqa: D103
+    files = _make_files(tmp_path, 10)
+    done = []
+
+    limits = staging.StageLimits(read=3, parse=parse_limit, write=2)
+    n = staging.run_staged(
+        files, _parse_upper, _write_upper, lambda file, _: done.append(file), limits
+    )
+
+    assert n == 10
+    assert sorted(done) == files
+    assert all(file.with_suffix(".out").read_text() == f"SCAN {file.stem}" for file in files)
+
+
+def test_run_staged_bounds_stage_concurrency(tmp_path: Path) -> None:
+    files = _make_files(tmp_path, 12)
+    lock = threading.Lock()
+    n_writing = max_writing = 0
+
+    def _slow_write(in_file: Path, parsed: bytes) -> tuple[Path, ...]:
+        nonlocal n_writing, max_writing
+        with lock:
+            n_writing += 1
+            max_writing = max(max_writing, n_writing)
+
+        time.sleep(0.01)
+        with lock:
+            n_writing -= 1
+
+        return ()
+
+    limits = staging.StageLimits(read=4, parse=1, write=3)
+    staging.run_staged(files, _parse_upper, _slow_write, lambda *_: None, limits)
+
+    # Writes are slower than everything else, so they should saturate their limit without
+    # exceeding it
+    assert max_writing == 3
+
+
+@pytest.mark.parametrize("parse_limit", (1, 2))
+def test_run_staged_reraises(tmp_path: Path, parse_limit: int) -> None:  # noqa: D103
+    files = _make_files(tmp_path, 10)
+
+    limits = staging.StageLimits(parse=parse_limit)
+    with pytest.raises(ValueError):
+        staging.run_staged(files, _parse_raises, _write_upper, lambda *_: None, limits)
+
+
+def test_run_staged_profiled(tmp_path: Path) -> None:
+    files = _make_files(tmp_path, 3)
+
+    profiler = profiling.Profiler()
+    staging.run_staged(
+        files, _parse_upper, _write_upper, lambda *_: None, staging.StageLimits(), profiler
+    )
+
+    report = profiler.report()
+    n_bytes = sum(file.stat().st_size for file in files)
+    assert report["n_files"] == 3
+    assert report["bytes_read"] == report["bytes_written"] == n_bytes
+    assert all(report["stages_s"][stage] > 0 for stage in ("read", "parse", "write"))
+
+
+@pytest.mark.parametrize("limits", (staging.StageLimits(read=0), staging.StageLimits(write=0)))
+def test_invalid_stage_limits_raise(limits: staging.StageLimits) -> None:  # noqa: D103
+    with pytest.raises(click.ClickException):
+        staging.run_staged([], _parse_upper, _write_upper, lambda *_: None, limits)
@@ -0,0 +1,58 @@
+from pathlib import Path
+from textwrap import dedent
+
+import pytest
+from src import parser, store
+
+
+SAMPLE_COMPOSITE = dedent(
+    """\
+    #SizeStream Core Measurements
+    #format - Measurement Valid (1 = valid), Measurement Name, Measurement
+    #
+    1  Actual Weight: 1.2
+    #SizeStream Custom Measurements
+    #format - Measurement Valid (1 = valid), Measurement Name, Measurement
+    #
+    1  Chest: 3.4
+    #SizeStream Landmarks
+    #format - Landmarks Valid (1 = valid), Landmark Name, Landmark x y z
+    #
+    1  AbdomenBack	5.6	7.8	-9.10
+    """
+)
+TRUTH_BLOCK = (
+    "001,CPEN,2,anthro,Actual Weight,1.2\n"
+    "001,CPEN,2,anthro,Chest,3.4\n"
+    "001,CPEN,2,landmark,AbdomenBack,5.6 7.8 -9.10\n"
+)
+
+
+def test_long_format_block() -> None:
+    anthro, landmark = parser.split_composite_file(SAMPLE_COMPOSITE.splitlines())
+    block = store.long_format_block(anthro, landmark, "001", "CPEN", "2")
+    assert block == TRUTH_BLOCK
+
+
+def test_long_format_round_trip(tmp_path: Path) -> None:
+    store_filepath = tmp_path / store.STORE_FILENAME
+    with store.LongFormatWriter(store_filepath) as writer:
+        anthro, landmark = parser.split_composite_file(SAMPLE_COMPOSITE.splitlines())
+        for subj in ("001", "002"):
+            block = store.long_format_block(anthro, landmark, subj)
+            writer.add(f"{subj}_composite.txt", block.encode(), subj, "", "")
+
+    store_lines = store_filepath.read_text().splitlines()
+    assert store_lines[0] == store.LONG_HEADER
+    assert len(store_lines) == 7
+
+    store_index = store.load_index(store_filepath)
+    assert store_index["version"] == store.STORE_INDEX_VERSION
+    assert list(store_index["scans"]) == ["001_composite.txt", "002_composite.txt"]
+    assert store.read_scan(store_filepath, "002_composite.txt", store_index) == store_lines[4:]
+
+
+def test_add_before_open_raises(tmp_path: Path) -> None:
+    writer = store.LongFormatWriter(tmp_path / store.STORE_FILENAME)
+    with pytest.raises(RuntimeError):
+        writer.add("001_composite.txt", b"", "001", "", "")
@@ -1,5 +1,10 @@
+import subprocess
+import sys
+from pathlib import Path
+
 from pytest_mock import MockerFixture
-from src import io, ui
+from src import compression, console, io, profiling, sharding, staging, ui
+from src.repeats import RepeatPolicy
 from typer.testing import CliRunner
 
 RUNNER = CliRunner()
@@ -61,11 +66,285 @@ def test_aggregate_dir_no_prompt(mocker: MockerFixture) -> None:
 
 def test_bare_invocation_streamlined_pipeline(mocker: MockerFixture) -> None:
     mocker.patch.object(ui, "_prompt_for_dir", autospec=True)
-    mocker.patch.object(io, "anthro_measure_aggregation_pipeline")  # Don't run the pipeline
-    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+    mocker.patch.object(io, "fused_split_aggregation_pipeline")  # Don't run the pipeline
 
     result = RUNNER.invoke(ui.scansplitter_cli)
     assert result.exit_code == 0
     ui._prompt_for_dir.assert_called()
-    io.batch_split_pipeline.assert_called()
-    io.anthro_measure_aggregation_pipeline.assert_called()
+    io.fused_split_aggregation_pipeline.assert_called()
+
+
+def test_batch_archive_no_prompt(mocker: MockerFixture) -> None:
+    mocker.patch.object(ui, "_prompt_for_dir", autospec=True)
+    mocker.patch.object(io, "archive_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["batch", "--archive", "README.md", "--output-archive", "split.zip"],
+    )
+    assert result.exit_code == 0
+    ui._prompt_for_dir.assert_not_called()
+    call_kwargs = io.archive_split_pipeline.call_args.kwargs
+    assert call_kwargs["output_archive"] == Path("split.zip")
+
+
+def test_batch_archive_incremental_errors(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "archive_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli, ["batch", "--archive", "README.md", "--incremental"]
+    )
+    assert result.exit_code != 0
+    io.archive_split_pipeline.assert_not_called()
+
+
+def test_compress_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--compress", "xz"])
+    assert result.exit_code == 0
+    call_kwargs = io.batch_split_pipeline.call_args.kwargs
+    assert call_kwargs["compress"] == compression.Compression.XZ
+
+
+def test_long_format_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--long-format"])
+    assert result.exit_code == 0
+    call_kwargs = io.batch_split_pipeline.call_args.kwargs
+    assert call_kwargs["long_format"] is True
+
+
+def test_staged_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["batch", "--scan-dir", ".", "--staged", "--jobs", "2", "--read-concurrency", "8"],
+    )
+    assert result.exit_code == 0
+    stage_limits = io.batch_split_pipeline.call_args.kwargs["stage_limits"]
+    assert stage_limits == staging.StageLimits(read=8, parse=2, write=4)
+
+
+def test_not_staged_by_default(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", "."])
+    assert result.exit_code == 0
+    assert io.batch_split_pipeline.call_args.kwargs["stage_limits"] is None
+
+
+def test_ingest_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "ingest_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["ingest", "--scan-dir", ".", "--database", "scans.db", "--consolidate"],
+    )
+    assert result.exit_code == 0
+    call_kwargs = io.ingest_pipeline.call_args.kwargs
+    assert call_kwargs["database_path"] == Path("scans.db")
+    assert call_kwargs["consolidate"] is True
+
+
+def test_cache_dir_envvar(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["batch", "--scan-dir", ".", "--cache-size", "1"],
+        env={"SCANSPLITTER_CACHE_DIR": str(tmp_path)},
+    )
+    assert result.exit_code == 0
+    parse_cache = io.batch_split_pipeline.call_args.kwargs["cache"]
+    assert parse_cache.cache_dir == tmp_path
+    assert parse_cache.max_bytes == 1_000_000
+
+
+def test_no_cache_by_default(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", "."])
+    assert result.exit_code == 0
+    assert io.batch_split_pipeline.call_args.kwargs["cache"] is None
+
+
+def test_batch_jobs_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--jobs", "4"])
+    assert result.exit_code == 0
+    assert io.batch_split_pipeline.call_args.kwargs["jobs"] == 4
+
+
+def test_bare_invocation_jobs_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(ui, "_prompt_for_dir", autospec=True)
+    mocker.patch.object(io, "fused_split_aggregation_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli, ["--jobs", "4", "--no-write-splits", "--memory-budget", "1.5"]
+    )
+    assert result.exit_code == 0
+    assert io.fused_split_aggregation_pipeline.call_args.kwargs["jobs"] == 4
+    assert io.fused_split_aggregation_pipeline.call_args.kwargs["write_splits"] is False
+    assert io.fused_split_aggregation_pipeline.call_args.kwargs["memory_budget"] == 1.5
+
+
+def test_single_output_format_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "file_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["single", "--scan-filepath", "README.md", "--output-format", "npz"],
+    )
+    assert result.exit_code == 0
+    assert io.file_split_pipeline.call_args.kwargs["output_format"] == io.OutputFormat.NPZ
+
+
+def test_batch_profile_report(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    report_filepath = tmp_path / "profile.json"
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["batch", "--scan-dir", ".", "--profile-report", str(report_filepath)],
+    )
+    assert result.exit_code == 0
+    assert isinstance(io.batch_split_pipeline.call_args.kwargs["profiler"], profiling.Profiler)
+    assert "Profile Summary" in result.stdout
+    assert report_filepath.exists()
+
+
+def test_no_profile_by_default(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", "."])
+    assert result.exit_code == 0
+    assert io.batch_split_pipeline.call_args.kwargs["profiler"] is None
+
+
+def test_headless_import_is_lazy() -> None:
+    # Run in a fresh interpreter, since our test dependencies may have already imported these
+    heavy_modules = ("tkinter", "rich", "hashlib", "struct")
+    check = f"import sys, src.ui; print(*(m for m in {heavy_modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.strip() == ""
+
+
+def test_quiet_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+    mocker.patch.object(console, "set_mode")
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--quiet"])
+    assert result.exit_code == 0
+    console.set_mode.assert_called_with(console.ConsoleMode.QUIET)
+
+
+def test_aggregate_landmarks_dir_no_prompt(mocker: MockerFixture) -> None:
+    mocker.patch.object(ui, "_prompt_for_dir", autospec=True)
+    mocker.patch.object(io, "landmark_aggregation_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["aggregate-landmarks", "--landmark-dir", "."])
+    assert result.exit_code == 0
+    ui._prompt_for_dir.assert_not_called()
+    io.landmark_aggregation_pipeline.assert_called()
+
+
+def test_discovery_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "anthro_measure_aggregation_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["aggregate", "--anthro-dir", ".", "--exclude", "a*", "--exclude", "b*", "--ignore-case"],
+    )
+    assert result.exit_code == 0
+    call_kwargs = io.anthro_measure_aggregation_pipeline.call_args.kwargs
+    assert list(call_kwargs["exclude"]) == ["a*", "b*"]
+    assert list(call_kwargs["prune"]) == []
+    assert call_kwargs["ignore_case"] is True
+
+
+def test_alignment_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "anthro_measure_aggregation_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli,
+        ["aggregate", "--anthro-dir", ".", "--align", "union", "--missing-value", "NA"],
+    )
+    assert result.exit_code == 0
+    call_kwargs = io.anthro_measure_aggregation_pipeline.call_args.kwargs
+    assert call_kwargs["align"] == io.RowAlignment.UNION
+    assert call_kwargs["missing_value"] == "NA"
+
+
+def test_shard_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+    mocker.patch.object(io, "anthro_measure_aggregation_pipeline")
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--shard", "2/4"])
+    assert result.exit_code == 0
+    assert io.batch_split_pipeline.call_args.kwargs["shard"] == sharding.Shard(2, 4)
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli, ["aggregate", "--anthro-dir", ".", "--shard", "1/2"]
+    )
+    assert result.exit_code == 0
+    assert io.anthro_measure_aggregation_pipeline.call_args.kwargs["shard"] == sharding.Shard(1, 2)
+
+
+def test_bad_shard_errors(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--shard", "5/4"])
+    assert result.exit_code != 0
+    io.batch_split_pipeline.assert_not_called()
+
+
+def test_merge_aggregates_dir_no_prompt(mocker: MockerFixture) -> None:
+    mocker.patch.object(ui, "_prompt_for_dir", autospec=True)
+    mocker.patch.object(io, "merge_aggregates_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["merge-aggregates", "--anthro-dir", "."])
+    assert result.exit_code == 0
+    ui._prompt_for_dir.assert_not_called()
+    assert io.merge_aggregates_pipeline.call_args.args == (Path("."),)
+
+
+def test_repeats_passthrough(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "batch_split_pipeline")  # Don't run the pipeline
+    mocker.patch.object(io, "anthro_measure_aggregation_pipeline")
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["batch", "--scan-dir", ".", "--repeats", "latest"])
+    assert result.exit_code == 0
+    assert io.batch_split_pipeline.call_args.kwargs["repeats"] == RepeatPolicy.LATEST
+
+    result = RUNNER.invoke(ui.scansplitter_cli, ["aggregate", "--anthro-dir", "."])
+    assert result.exit_code == 0
+    assert io.anthro_measure_aggregation_pipeline.call_args.kwargs["repeats"] == RepeatPolicy.ALL
+
+
+def test_batch_archive_repeats_errors(mocker: MockerFixture) -> None:
+    mocker.patch.object(io, "archive_split_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli, ["batch", "--archive", "README.md", "--repeats", "first"]
+    )
+    assert result.exit_code != 0
+    io.archive_split_pipeline.assert_not_called()
+
+
+def test_watch_dir_no_prompt(mocker: MockerFixture) -> None:
+    mocker.patch.object(ui, "_prompt_for_dir", autospec=True)
+    mocker.patch.object(io, "watch_pipeline")  # Don't run the pipeline
+
+    result = RUNNER.invoke(
+        ui.scansplitter_cli, ["watch", "--scan-dir", ".", "--settle-time", "5", "--no-aggregate"]
+    )
+    assert result.exit_code == 0
+    ui._prompt_for_dir.assert_not_called()
+    call_kwargs = io.watch_pipeline.call_args.kwargs
+    assert call_kwargs["settle_time"] == 5.0
+    assert call_kwargs["aggregate"] is False